@@ -1,81 +1,85 @@
 import os
 from PyQt5.QtCore import QThread, pyqtSignal, pyqtSlot
 
-from AnalyseClimb import Pressure, Positioning, Progress
-import pandas as pd, numpy as np, json, random
+from AnalyseClimb import Scoring
+import json, random
 import csv
 
+from DataCapture.SessionWriter import waitForSessionWriters
+from DataCapture.Session import ANALYSED
+
 
 class ClimbAnalyserThread(QThread):
     ClimbAnalysisComplete = pyqtSignal()  # Signal to indicate that analysis is complete
 
-    metricsWeights = {"pressure": 0.3, "positioning": 0.4, "progress": 0.3}
-
-    submetricsLabels = {"pressure": ["Efficiency", "Adjustments"],
-                        "positioning": ["Smoothness", "Arm Bend"],
-                        "progress": ["Completion", "Pathfinding"]
-    }
-
-    submetricsWeights = {"pressure": [0.5, 0.5],
-                         "positioning": [0.5, 0.5],
-                         "progress": [0.5, 0.5]
-    }
+    # the scoring itself has no Qt dependencies, see AnalyseClimb/Scoring.py
+    metricsWeights = Scoring.METRICS_WEIGHTS
+    submetricsLabels = Scoring.SUBMETRICS_LABELS
+    submetricsWeights = Scoring.SUBMETRICS_WEIGHTS
+    metricsTimeout = Scoring.METRICS_TIMEOUT # seconds, metrics that take longer are shown as placeholders
 
-    def __init__(self, climberName, climbSuccessful, parent):
+    def __init__(self, climberName, climbSuccessful, parent, session=None):
+        """
+        Args:
+            climberName: Name of the climber, for the leaderboard.
+            climbSuccessful: True if the climber reached the top hold.
+            parent: The results screen.
+            session: The climb's session (see DataCapture/Session.py), which the climb data is read from and the scores saved to.
+                Defaults to None, which reads the climb data from the legacy files in data/.
+        """
         super().__init__(parent)
         self.climberName = climberName
         self.climbSuccessful = climbSuccessful
         self.parent = parent
+        self.session = session
 
-    def run(self):
         cwd = os.getcwd()
-        dataDirectory = os.path.join(cwd, 'data')
-        climbDataDirectory = os.path.join(dataDirectory, "output.csv")   
-        holdsCoordinatesDirectory = os.path.join(dataDirectory, "holdCoordinates.csv")
-        forceDataDirectory = os.path.join(dataDirectory, "forceData.csv")
-        self.leaderBoardDirectory = os.path.join(dataDirectory, 'leaderboard.csv')
-        self.climbingTipsDirectory = os.path.join(dataDirectory, 'climbingTips.json')
-
-        climbData = []
-        holdsCoordinates = []
-        forceData = []
-
-        # Read climb data from file
-        climbData = pd.read_csv(climbDataDirectory)
-
-        # Read holds coordinates from file
-        holdsCoordinates = pd.read_csv(holdsCoordinatesDirectory)
-       
-        # Read force data from file
-        forceData = pd.read_csv(forceDataDirectory)
-
-        if any([len(climbData) == 0, len(holdsCoordinates) == 0, len(forceData) == 0]):
-            raise FileNotFoundError("Could not find data files")
-        
-        climbData = pd.DataFrame(climbData)
-        print(climbData.columns)
-
-        holdsCoordinates = pd.DataFrame(holdsCoordinates)
-        print(holdsCoordinates.columns)
-        # Calculate pressure
-        self.pressureSubmetrics = Pressure.calculatePressure(forceData)
-        self.pressureVisualisation = Pressure.visualisePressure(forceData, self.pressureSubmetrics)
-
-        # Calculate positioning
-        self.positionSubmetrics = Positioning.calculatePosition(climbData, holdsCoordinates)
-        self.positionVisualisation = Positioning.visualisePosition(climbData)
-
-        # Calculate progress
-        self.progressSubmetrics = Progress.calculateProgress(climbData, holdsCoordinates, self.climbSuccessful, forceData)
-        self.progressVisualisation = Progress.visualiseProgress(climbData, holdsCoordinates, self.climbSuccessful)
+        self.dataDirectory = os.path.join(cwd, 'data')
+        self.leaderBoardDirectory = os.path.join(self.dataDirectory, 'leaderboard.csv')
+        self.climbingTipsDirectory = os.path.join(self.dataDirectory, 'climbingTips.json')
 
-        # calculte the lowest weighted submetric and get a climbing tip based on that submetric
-        self.lowestWeightedSubmetric = self.findLowestWeightedSubmetric()
-        self.climbingTip = self.findClimbingTip(self.lowestWeightedSubmetric)
+    def run(self):
+        # the climb's recordings are written in the background, wait until they have been sealed and exported
+        if not waitForSessionWriters(timeout=10):
+            print("Timed out waiting for the climb data to be saved")
+
+        # Read climb data, hold coordinates and force data from the session's column tables, falling back to the CSV files
+        # (the legacy files in data/ if there is no session)
+        # every quantity the metrics and visualisations need is computed once and shared, see AnalyseClimb/ClimbFeatures.py
+        self.analyse(Scoring.loadClimbFeatures(self.session, self.dataDirectory, self.climbSuccessful))
+
+        # keep the scores with the climb's data, so old climbs can be looked up without the leaderboard
+        if self.session is not None:
+            self.session.update(status=ANALYSED, scores=Scoring.getSessionScores(self.scores))
 
         # Emit signal to parent to indicate that analysis is complete
         self.ClimbAnalysisComplete.emit()
 
+    def analyse(self, features):
+        """
+        Calculates the scores, visualisations and climbing tip of a climb from its features. Called by run with the features of
+        the saved climb data, or directly with the features the live analysis computed while the climb was recorded
+        (see AnalyseClimb/LiveMetrics.py), which only takes a few milliseconds.
+
+        Args:
+            features: The climb's ClimbFeatures.
+        """
+        self.features = features
+        # the metrics are calculated concurrently, any that miss the deadline are None
+        self.scores = Scoring.scoreClimb(features, ClimbAnalyserThread.metricsWeights, self.submetricsWeights,
+                                         timeout=self.metricsTimeout)
+
+        self.pressureSubmetrics = self.scores["pressure"]
+        self.pressureVisualisation = self.scores["visualisations"]["pressure"]
+        self.positionSubmetrics = self.scores["positioning"]
+        self.positionVisualisation = self.scores["visualisations"]["positioning"]
+        self.progressSubmetrics = self.scores["progress"]
+        self.progressVisualisation = self.scores["visualisations"]["progress"]
+
+        # calculte the lowest weighted submetric and get a climbing tip based on that submetric
+        self.lowestWeightedSubmetric = self.findLowestWeightedSubmetric()
+        self.climbingTip = self.findClimbingTip(self.lowestWeightedSubmetric)
+
     def getPressureSubmetrics(self):
         return self.pressureSubmetrics  
       
@@ -131,28 +135,7 @@ class ClimbAnalyserThread(QThread):
         returns:
         minSubmetric: str
         """
-        minSubmetric = ""
-        minScore = 100
-        
-        for metric in ClimbAnalyserThread.metricsWeights.keys():
-            for submetric in ClimbAnalyserThread.submetricsLabels[metric]:
-                if metric == "progress":
-                    metricScoreList = self.progressSubmetrics
-                elif metric == "positioning":
-                    metricScoreList = self.positionSubmetrics
-                elif metric == "pressure":
-                    metricScoreList = self.pressureSubmetrics
-                else:
-                        raise ValueError("Invalid metric name")
-                subMetricWeight = self.submetricsWeights[metric][ClimbAnalyserThread.submetricsLabels[metric].index(submetric)]
-                submetricScore = metricScoreList[ClimbAnalyserThread.submetricsLabels[metric].index(submetric)+1]
-                metricWeight = self.metricsWeights[metric]
-                weightedSubmetricScore = subMetricWeight*submetricScore*metricWeight
-                # print(metric, metricWeight, submetric, subMetricWeight, weightedSubmetricScore)
-                if weightedSubmetricScore < minScore:
-                    minScore = weightedSubmetricScore
-                    minSubmetric = submetric
-        return minSubmetric
+        return Scoring.findLowestWeightedSubmetric(self.scores, ClimbAnalyserThread.metricsWeights, self.submetricsWeights)
     
     def getLowestWeightedSubmetric(self):
         """
@@ -164,11 +147,7 @@ class ClimbAnalyserThread(QThread):
         """
         calculates the climbing score based on the weighs of the metrics and submetrics
         """
-        overallScore = ClimbAnalyserThread.metricsWeights["pressure"] * self.pressureSubmetrics[0] + \
-                        ClimbAnalyserThread.metricsWeights["positioning"] * self.positionSubmetrics[0] + \
-                        ClimbAnalyserThread.metricsWeights["progress"] * self.progressSubmetrics[0]
-       
-        return round(overallScore)
+        return Scoring.getClimbingScore(self.scores, ClimbAnalyserThread.metricsWeights)
     
     def saveClimbRecord(self):
         """
@@ -178,19 +157,7 @@ class ClimbAnalyserThread(QThread):
         work in progress
         """
 
-        newRecord = []
-        newRecord.append(self.climberName)
-        newRecord.append(self.getClimbingScore())
-
-        if 'pressure' in ClimbAnalyserThread.metricsWeights.keys():
-            newRecord.append(self.pressureSubmetrics[0])
-        
-        if 'positioning' in ClimbAnalyserThread.metricsWeights.keys():
-            newRecord.append(self.positionSubmetrics[0])
-
-        if 'progress' in ClimbAnalyserThread.metricsWeights.keys():
-            newRecord.append(self.progressSubmetrics[0])
-
+        newRecord = Scoring.getLeaderboardRecord(self.climberName, self.scores, ClimbAnalyserThread.metricsWeights)
 
         with open(self.leaderBoardDirectory, 'a', newline='') as f:
             writer = csv.writer(f)
@@ -0,0 +1,71 @@
+"""
+Feature graph of a climb: every quantity the metrics and visualisations derive from the climb data is computed once per
+climb, and cached.
+
+Features are functions of a ClimbFeatures object, registered with the @feature decorator by the module that owns them
+(Pressure, Positioning, Progress), and are read with features["feature_name"]. A feature can read other features, which are
+computed the first time they are needed. For example the forward filled keypoints are read by the position and the progress
+metrics and their visualisations, but filled only once.
+
+Features can be read from several threads at once (the metrics are calculated concurrently, see AnalyseClimb/Scoring.py).
+Each feature has its own lock, so a feature two metrics need is computed once while the other waits for it, and features that
+don't depend on each other are computed in parallel.
+"""
+import threading
+
+FEATURES = {} # feature name -> function computing it from a ClimbFeatures object
+
+# the keypoint columns the features read, the only ones AnalyseClimb/Scoring.py loads. A feature that reads another keypoint
+# column has to add it here
+KEYPOINT_COLUMNS = ["Timestamp(ms)", "Center of Gravity X", "Center of Gravity Y", "Left Arm Angle", "Right Arm Angle",
+                    "left_wrist_X", "left_wrist_Y", "right_wrist_X", "right_wrist_Y"]
+
+
+def feature(function):
+    """
+    Registers a function as a feature, under its name.
+    """
+    FEATURES[function.__name__] = function
+    return function
+
+
+class ClimbFeatures:
+    def __init__(self, climbData=None, holdsCoordinates=None, forceData=None, climbSuccessful=False):
+        """
+        Args:
+            climbData: The climb's keypoints, as read from output.csv. Not modified, features that fill in missing values copy it.
+            holdsCoordinates: The hold coordinates, as read from holdCoordinates.csv.
+            forceData: The force data, as read from forceData.csv. Not modified.
+            climbSuccessful: True if the climber reached the top hold.
+        """
+        self.climbData = climbData
+        self.holdsCoordinates = holdsCoordinates
+        self.forceData = forceData
+        self.climbSuccessful = climbSuccessful
+        self.cache = {}
+        self.lock = threading.Lock() # guards featureLocks
+        self.featureLocks = {}
+
+    def __getitem__(self, name):
+        if name in self.cache:
+            return self.cache[name]
+        with self.lock:
+            featureLock = self.featureLocks.setdefault(name, threading.Lock())
+        with featureLock:
+            # another thread may have computed it while this one waited
+            if name not in self.cache:
+                self.cache[name] = FEATURES[name](self)
+        return self.cache[name]
+
+    def __contains__(self, name):
+        return name in self.cache
+
+
+@feature
+def climb_data(features):
+    # Forward fill the keypoints, missing values take the last valid observation
+    return features.climbData.ffill()
+
+@feature
+def frame_count(features):
+    return len(features.climbData)
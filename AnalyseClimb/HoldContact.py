@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+# limbs whose keypoints can touch a hold, in the order of the last axis of the contact tensor
+LIMBS = ['left_wrist', 'right_wrist', 'left_ankle', 'right_ankle']
+
+FRAME_BLOCK = 1024 # frames whose contacts are found at once, bounds the size of the temporary arrays
+
+
+def hold_contacts(climb_data, hold_positions, threshold_distance, limbs=LIMBS):
+    """
+    Finds which holds each limb is touching in every frame of a climb, by comparing the positions of all limbs against all holds
+    at once. A limb touches a hold when its keypoint is within threshold_distance of the hold's position.
+
+    Args:
+        climb_data: The climb's keypoints, with a Timestamp(ms) column and <limb>_X, <limb>_Y columns. Missing keypoints (NaN)
+            touch nothing.
+        hold_positions: (holds, 2) array of the x, y positions of the holds.
+        threshold_distance: Maximum distance between a limb and a hold for the limb to touch it.
+        limbs: Limbs to check, as keypoint names. Defaults to LIMBS.
+
+    Returns:
+        dict: With
+            "contact": (frames, holds, limbs) bool array, True if the limb is touching the hold in that frame.
+            "dwell_time": (holds, limbs) array of the time each limb spent on each hold in ms. Each frame lasts until the next one.
+            "first_contact", "last_contact": (holds, limbs) arrays of the timestamps of the first and last frame each limb touched
+                each hold, NaN if it never did.
+            "timestamps": (frames,) array of the frames' timestamps.
+    """
+    timestamps = np.asarray(climb_data['Timestamp(ms)'], dtype=np.float64)
+    limb_x = np.column_stack([np.asarray(climb_data[f'{limb}_X'], dtype=np.float64) for limb in limbs])
+    limb_y = np.column_stack([np.asarray(climb_data[f'{limb}_Y'], dtype=np.float64) for limb in limbs])
+    hold_positions = np.asarray(hold_positions, dtype=np.float64).reshape(-1, 2)
+
+    frames, holds = len(timestamps), len(hold_positions)
+    contact = np.zeros((frames, holds, len(limbs)), dtype=bool)
+    # a limb can only touch the holds within threshold_distance of it horizontally, which are found by binary search in the
+    # holds sorted by x, so the exact distance is only calculated for nearby holds
+    hold_order = np.argsort(hold_positions[:, 0], kind='stable')
+    sorted_hold_x = hold_positions[hold_order, 0]
+    window = threshold_distance * (1 + 1e-9) # the exact test below decides the holds on the edge of the window
+    contact_frames, contact_keys = [], [] # frame and hold * limbs + limb of every contact
+    for start in range(0, frames, FRAME_BLOCK):
+        end = min(start + FRAME_BLOCK, frames)
+        x, y = limb_x[start:end].ravel(), limb_y[start:end].ravel()
+        first = np.searchsorted(sorted_hold_x, x - window, side='left') # NaN positions sort after every hold
+        counts = np.searchsorted(sorted_hold_x, x + window, side='right') - first
+        counts = np.clip(counts, 0, None)
+
+        # one candidate per nearby (frame and limb, hold) pair
+        point = np.repeat(np.arange(len(x)), counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        hold = hold_order[np.repeat(first, counts) + offset]
+        touching = (x[point] - hold_positions[hold, 0])**2 + (y[point] - hold_positions[hold, 1])**2 <= threshold_distance**2
+
+        point, hold = point[touching], hold[touching]
+        frame, limb = start + point // len(limbs), point % len(limbs)
+        contact[frame, hold, limb] = True
+        contact_frames.append(frame)
+        contact_keys.append(hold * len(limbs) + limb)
+
+    # each frame lasts until the next one, the last frame lasts for the typical frame interval
+    if frames > 1:
+        intervals = np.diff(timestamps)
+        durations = np.clip(np.append(intervals, np.median(intervals)), 0, None)
+    else:
+        durations = np.zeros(frames)
+
+    # contacts are sparse, so the totals are accumulated from the list of contacts rather than the contact tensor
+    contact_frames = np.concatenate(contact_frames) if contact_frames else np.zeros(0, dtype=int)
+    contact_keys = np.concatenate(contact_keys) if contact_keys else np.zeros(0, dtype=int)
+    size = holds * len(limbs)
+    dwell_time = np.bincount(contact_keys, weights=durations[contact_frames], minlength=size).reshape(holds, len(limbs))
+    first_frame = np.full(size, frames)
+    last_frame = np.full(size, -1)
+    np.minimum.at(first_frame, contact_keys, contact_frames)
+    np.maximum.at(last_frame, contact_keys, contact_frames)
+    touched = last_frame >= 0
+    first_contact = np.full(size, np.nan)
+    last_contact = np.full(size, np.nan)
+    first_contact[touched] = timestamps[first_frame[touched]]
+    last_contact[touched] = timestamps[last_frame[touched]]
+    first_contact = first_contact.reshape(holds, len(limbs))
+    last_contact = last_contact.reshape(holds, len(limbs))
+
+    return {"contact": contact,
+            "dwell_time": dwell_time,
+            "first_contact": first_contact,
+            "last_contact": last_contact,
+            "timestamps": timestamps}
+
+
+def legacy_time_on_holds(climb_data, hold_ids, hold_positions, threshold_distance):
+    """
+    Time on holds of the left and right hands in the format calculate_time_on_holds has always returned: one row per hold with
+    'Hold_Id', 'Total_Time_<Side>(ms)' (the sum of the timestamps of the frames the hand touched the hold), and the first and last
+    timestamps the hand touched it, 0 if it never did.
+
+    Returns:
+        tuple: (result_df_left, result_df_right, contacts), contacts being the output of hold_contacts for the wrists.
+    """
+    contacts = hold_contacts(climb_data, hold_positions, threshold_distance, limbs=['left_wrist', 'right_wrist'])
+    timestamp_sum = np.einsum('f,fhl->hl', contacts["timestamps"], contacts["contact"])
+    result_df_left, result_df_right = legacy_hold_frames(hold_ids, timestamp_sum, contacts["first_contact"], contacts["last_contact"])
+    return result_df_left, result_df_right, contacts
+
+
+def legacy_hold_frames(hold_ids, timestamp_sum, first_contact, last_contact):
+    """
+    Builds the left and right hand frames of legacy_time_on_holds from (holds, 2) arrays of the wrists' contacts, e.g. accumulated
+    while the climb was recorded (see AnalyseClimb/LiveMetrics.py).
+
+    Args:
+        hold_ids: Id of each hold.
+        timestamp_sum: Sum of the timestamps of the frames each wrist touched each hold.
+        first_contact, last_contact: Timestamps of the first and last frame each wrist touched each hold, NaN if it never did.
+    """
+    first_contact = np.nan_to_num(first_contact, nan=0)
+    last_contact = np.nan_to_num(last_contact, nan=0)
+
+    results = []
+    for limb, side in enumerate(['Left', 'Right']):
+        results.append(pd.DataFrame({
+            'Hold_Id': np.asarray(hold_ids),
+            f'Total_Time_{side}(ms)': timestamp_sum[:, limb],
+            f'Start_Timestamp_{side}(ms)': first_contact[:, limb],
+            f'End_Timestamp_{side}(ms)': last_contact[:, limb]
+        }))
+    return results[0], results[1]
+
+
+if __name__ == '__main__':
+    import time
+
+    # a 120 s climb at the camera's frame rate, on a wall with hundreds of holds
+    rng = np.random.default_rng(0)
+    frames, holds = 120 * 30, 500
+    climb = pd.DataFrame({'Timestamp(ms)': np.arange(frames) * 33})
+    for limb in LIMBS:
+        climb[f'{limb}_X'] = rng.uniform(0, 1, frames)
+        climb[f'{limb}_Y'] = rng.uniform(0, 1, frames)
+    positions = rng.uniform(0, 1, (holds, 2))
+
+    startTime = time.perf_counter()
+    contacts = hold_contacts(climb, positions, 0.03)
+    print(f"{frames} frames x {holds} holds x {len(LIMBS)} limbs in {(time.perf_counter() - startTime) * 1000:.1f} ms, "
+          f"{contacts['contact'].sum()} contacts")
@@ -0,0 +1,379 @@
+"""
+Analysis of a climb while it is being recorded: the pose and force threads feed every row they record into a LiveClimbMetrics,
+which updates running totals (rolling centre of gravity spread, time weighted arm angles, time on holds, de-spiked force...), so
+the features the scores are calculated from are ready as soon as the climb finishes, instead of being computed from the saved
+files afterwards.
+
+The features are the same ones AnalyseClimb/ClimbFeatures.py computes from the files, using the same score formulas, so
+ClimbAnalyserThread.analyse gives the same scores from either.
+"""
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from AnalyseClimb.ClimbFeatures import ClimbFeatures
+from AnalyseClimb.HoldContact import legacy_hold_frames
+from AnalyseClimb.Positioning import COG_MIN_SAMPLES, COG_WINDOW_MS, score_arm_angle, score_smoothness
+from AnalyseClimb.Pressure import SPIKE_THRESHOLD, adjustment_from_std, ratio_of_totals, segment_std
+from AnalyseClimb.Progress import score_reach
+
+HOLD_COLUMNS = ["holdNumber", "left", "right", "top", "bottom"] # columns of holdCoordinates.csv
+HOLD_THRESHOLD_DISTANCE = 10 # same as Progress.hold_times
+COG_WINDOW_SAMPLES = 5 # window of Positioning.centre_of_gravity if the timestamps go backwards
+FORCE_HOLD_THRESHOLD = 3000 # same as Progress.hold_number_force
+
+
+class SpikeFilter:
+    """
+    Pressure.detect_spikes one reading at a time, for a row of columns at once. A reading is only known not to be a spike once the
+    next one has arrived, so the filtered readings come out one reading behind.
+    """
+
+    def __init__(self):
+        self.previous = None
+        self.current = None
+        self.previousSpike = None
+
+    def push(self, values):
+        """
+        Returns the filtered reading before values, or None if it can't be decided yet.
+        """
+        if self.current is None:
+            # the first reading is never a spike
+            self.current = values
+            self.previousSpike = np.zeros(len(values), dtype=bool)
+            return values
+        if self.previous is None:
+            self.previous, self.current = self.current, values
+            return None
+        spike = (np.abs(self.current - self.previous) > SPIKE_THRESHOLD) & (np.abs(self.current - values) > SPIKE_THRESHOLD)
+        # a reading after a spike has taken its value, so it is not far from it, see Pressure.detect_spikes
+        spike &= ~self.previousSpike
+        filtered = np.where(spike, values, self.current)
+        self.previous, self.current, self.previousSpike = self.current, values, spike
+        return filtered
+
+    def finish(self):
+        """
+        Returns the last reading, which is never a spike, or None if it has already been returned.
+        """
+        if self.previous is None:
+            return None
+        self.previous = None
+        return self.current
+
+
+class RollingStd:
+    """
+    Mean of the rolling standard deviation of a column, as np.mean(column.rolling(...).std()) gives it, over a time window or a
+    number of samples.
+    """
+
+    def __init__(self, windowMs=None, windowSamples=None, minPeriods=3):
+        self.windowMs = windowMs
+        self.windowSamples = windowSamples
+        self.minPeriods = minPeriods
+        self.window = deque()
+        self.total = 0.0
+        self.count = 0
+
+    def push(self, timestamp, value):
+        self.window.append((timestamp, value))
+        if self.windowMs is not None:
+            # the window is (timestamp - windowMs, timestamp], like pandas' time based windows
+            while self.window[0][0] <= timestamp - self.windowMs:
+                self.window.popleft()
+        elif len(self.window) > self.windowSamples:
+            self.window.popleft()
+        values = np.array([value for _, value in self.window])
+        values = values[~np.isnan(values)]
+        if len(values) >= self.minPeriods:
+            self.total += np.std(values, ddof=1)
+            self.count += 1
+
+    def mean(self):
+        return self.total / self.count if self.count > 0 else np.nan
+
+
+class LiveClimbMetrics:
+    def __init__(self, holdsCoordinates, climbSuccessful=False):
+        """
+        Args:
+            holdsCoordinates: The hold coordinates, as rows of holdCoordinates.csv (holdNumber, left, right, top, bottom) or as a
+                DataFrame read from it.
+            climbSuccessful: True if the climber reached the top hold, can be changed until getFeatures is called.
+        """
+        self.holdsCoordinates = pd.DataFrame(np.asarray(holdsCoordinates, dtype=np.float64).reshape(-1, len(HOLD_COLUMNS)),
+                                             columns=HOLD_COLUMNS)
+        self.holdsCoordinates["holdNumber"] = self.holdsCoordinates["holdNumber"].astype(int)
+        self.holdPositions = self.holdsCoordinates[["left", "top"]].to_numpy()
+        self.climbSuccessful = climbSuccessful
+        self.lock = threading.Lock() # rows arrive from the pose and force threads, features are read from the main thread
+        self.finished = False
+        self.features = None
+
+        # keypoints
+        self.frameCount = 0
+        self.lastValues = {} # last valid value of each column, the keypoints are forward filled like ClimbFeatures.climb_data
+        self.firstTimestamp = None
+        self.lastTimestamp = None
+        self.timestampsIncreasing = True
+        self.cogByTime = [RollingStd(windowMs=COG_WINDOW_MS, minPeriods=COG_MIN_SAMPLES),
+                          RollingStd(windowMs=COG_WINDOW_MS, minPeriods=COG_MIN_SAMPLES)]
+        self.cogBySamples = [RollingStd(windowSamples=COG_WINDOW_SAMPLES, minPeriods=COG_WINDOW_SAMPLES),
+                             RollingStd(windowSamples=COG_WINDOW_SAMPLES, minPeriods=COG_WINDOW_SAMPLES)]
+        self.previousAngles = None # arm angles of the previous frame, weighted by how long they lasted once the next frame arrives
+        self.angleSums = np.zeros(2)
+        self.angleDurations = np.zeros(2)
+        self.angleValueSums = np.zeros(2) # for the plain mean, if the frames have no duration
+        self.angleValueCounts = np.zeros(2)
+        self.frameIntervals = []
+        self.firstWristX = [np.nan, np.nan]
+        self.lowestWristX = [np.nan, np.nan]
+        self.wristSeen = False
+        holds = len(self.holdsCoordinates)
+        self.contactTimestampSums = np.zeros((holds, 2))
+        self.firstContact = np.full((holds, 2), np.nan)
+        self.lastContact = np.full((holds, 2), np.nan)
+
+        # force
+        self.forceColumns = None
+        self.forceRows = 0
+        self.spikeFilter = SpikeFilter() # the force readings, as Pressure.despiked_force
+        self.ratioSpikeFilter = SpikeFilter() # calculate_ratio filters the de-spiked readings again
+        self.forceTotals = None
+        self.forceOverThreshold = None
+        self.timeOverThreshold = False
+        self.lastNonZero = None
+        self.lastNonZeroIndex = None
+        self.despikedCount = 0
+        self.largestStd = 0.0
+
+    def addKeypoints(self, row):
+        """
+        Adds a frame of keypoints, e.g. a row of KeypointBuffer, or anything else indexed by the column names of output.csv.
+        """
+        with self.lock:
+            if self.finished:
+                return
+            timestamp = float(row["Timestamp(ms)"])
+            values = {}
+            for column in ("Center of Gravity X", "Center of Gravity Y", "Left Arm Angle", "Right Arm Angle",
+                           "left_wrist_X", "left_wrist_Y", "right_wrist_X", "right_wrist_Y"):
+                value = float(row[column]) if row[column] is not None else np.nan
+                if np.isnan(value):
+                    value = self.lastValues.get(column, np.nan)
+                else:
+                    self.lastValues[column] = value
+                values[column] = value
+
+            if self.firstTimestamp is None:
+                self.firstTimestamp = timestamp
+            elif timestamp < self.lastTimestamp:
+                self.timestampsIncreasing = False
+
+            # smoothness, see Positioning.centre_of_gravity
+            for axis, column in enumerate(("Center of Gravity X", "Center of Gravity Y")):
+                self.cogByTime[axis].push(timestamp, values[column])
+                self.cogBySamples[axis].push(timestamp, values[column])
+
+            # arm bend, each frame lasts until the next one, see Positioning.time_weighted_mean
+            angles = np.array([values["Left Arm Angle"], values["Right Arm Angle"]])
+            if self.previousAngles is not None:
+                interval = timestamp - self.lastTimestamp
+                self.frameIntervals.append(interval)
+                self.addAngles(self.previousAngles, max(interval, 0))
+            self.previousAngles = angles
+            valid = ~np.isnan(angles)
+            self.angleValueSums[valid] += angles[valid]
+            self.angleValueCounts += valid
+
+            # completion, see Progress.calculate_hold_score
+            for side, column in enumerate(("left_wrist_X", "right_wrist_X")):
+                if self.frameCount == 0:
+                    self.firstWristX[side] = values[column]
+                if not np.isnan(values[column]) and not values[column] >= self.lowestWristX[side]:
+                    self.lowestWristX[side] = values[column]
+            self.wristSeen |= not np.isnan(values["left_wrist_X"])
+
+            # time on holds, see HoldContact.legacy_time_on_holds
+            wrists = np.array([[values["left_wrist_X"], values["right_wrist_X"]],
+                               [values["left_wrist_Y"], values["right_wrist_Y"]]])
+            contact = ((wrists[0] - self.holdPositions[:, [0]])**2 + (wrists[1] - self.holdPositions[:, [1]])**2
+                       <= HOLD_THRESHOLD_DISTANCE**2)
+            self.contactTimestampSums += contact * timestamp
+            self.firstContact[contact & np.isnan(self.firstContact)] = timestamp
+            self.lastContact[contact] = timestamp
+
+            self.lastTimestamp = timestamp
+            self.frameCount += 1
+
+    def addAngles(self, angles, duration):
+        valid = ~np.isnan(angles)
+        self.angleSums[valid] += angles[valid] * duration
+        self.angleDurations[valid] += duration
+
+    def addForce(self, row):
+        """
+        Adds a row of force data: the time in ms and the force on each hold, as recorded to forceData.csv.
+        """
+        with self.lock:
+            if self.finished:
+                return
+            row = np.asarray(row, dtype=np.float64)
+            forces = row[1:]
+            if self.forceColumns is None:
+                self.forceColumns = ["Time"] + [f"hold{i}" for i in range(len(forces))]
+                self.forceTotals = np.zeros(len(forces))
+                self.forceOverThreshold = np.zeros(len(forces), dtype=bool)
+                self.lastNonZero = np.zeros(len(forces))
+                self.lastNonZeroIndex = np.full(len(forces), -1)
+            self.timeOverThreshold |= row[0] > FORCE_HOLD_THRESHOLD
+            self.forceRows += 1
+            self.addDespikedForce(self.spikeFilter.push(forces))
+
+    def addDespikedForce(self, forces):
+        if forces is None:
+            return
+        # pathfinding, see Progress.hold_number_force
+        self.forceOverThreshold |= forces > FORCE_HOLD_THRESHOLD
+
+        # adjustments, from one non-zero reading to the next, see Pressure.largest_adjustment
+        nonZero = forces != 0 # NaN counts as non-zero
+        lengths = self.despikedCount - self.lastNonZeroIndex + 1
+        segments = nonZero & (self.lastNonZeroIndex >= 0) & (lengths > 2)
+        if segments.any():
+            std = segment_std(self.lastNonZero[segments], forces[segments], lengths[segments])
+            self.largestStd = max(self.largestStd, std.max())
+        self.lastNonZero[nonZero] = forces[nonZero]
+        self.lastNonZeroIndex[nonZero] = self.despikedCount
+        self.despikedCount += 1
+
+        # efficiency, see Pressure.calculate_ratio
+        self.addRatioForce(self.ratioSpikeFilter.push(forces))
+
+    def addRatioForce(self, forces):
+        if forces is None:
+            return
+        forces = forces.copy()
+        if "hold7" in self.forceColumns:
+            index = self.forceColumns.index("hold7") - 1
+            forces[index] = forces[index]*2.0/3.0
+        self.forceTotals += np.nan_to_num(forces, nan=0)
+
+    def finish(self):
+        """
+        Flushes the readings still held back by the spike filters. Rows added afterwards are ignored.
+        """
+        with self.lock:
+            if self.finished:
+                return
+            self.finished = True
+            if self.forceColumns is not None:
+                self.addDespikedForce(self.spikeFilter.finish())
+                self.addRatioForce(self.ratioSpikeFilter.finish())
+            if self.previousAngles is not None and self.frameCount > 1:
+                # the last frame lasts for the typical frame interval
+                self.addAngles(self.previousAngles, max(np.median(self.frameIntervals), 0))
+
+    def hasData(self) -> bool:
+        return self.frameCount > 0 and self.forceRows > 0
+
+    def getFeatures(self, climbSuccessful=None):
+        """
+        Finishes the live analysis, and returns the climb's features, with every feature the scores and visualisations read
+        already computed. Returns None if no keypoints or no force data were recorded, the climb then has to be analysed from
+        its files.
+
+        Args:
+            climbSuccessful: True if the climber reached the top hold. Defaults to the value given to the constructor.
+        """
+        self.finish()
+        with self.lock:
+            if not self.hasData():
+                return None
+            if climbSuccessful is not None:
+                self.climbSuccessful = climbSuccessful
+            if self.features is not None and self.features.climbSuccessful == self.climbSuccessful:
+                return self.features
+
+            features = ClimbFeatures(holdsCoordinates=self.holdsCoordinates, climbSuccessful=self.climbSuccessful)
+            features.cache["frame_count"] = self.frameCount
+
+            # positioning
+            if self.timestampsIncreasing:
+                meanStd = [rolling.mean() for rolling in self.cogByTime]
+            else:
+                meanStd = [rolling.mean() for rolling in self.cogBySamples]
+            features.cache["smoothness_score"] = score_smoothness(meanStd[0], meanStd[1])
+            features.cache["arm_angle_score"] = score_arm_angle(np.mean(self.getMeanAngles()))
+
+            # progress
+            holdIds = self.holdsCoordinates["holdNumber"].to_numpy()
+            resultLeft, resultRight = legacy_hold_frames(holdIds, self.contactTimestampSums, self.firstContact, self.lastContact)
+            touched = ~np.isnan(self.firstContact)
+            features.cache["hold_times"] = (resultLeft, resultRight,
+                                            holdIds[touched[:, 0]].max(initial=0), holdIds[touched[:, 1]].max(initial=0))
+            features.cache["hold_score"] = self.getHoldScore()
+            features.cache["climbing_duration"] = self.lastTimestamp - self.firstTimestamp
+            features.cache["force_hold_count"] = int(self.timeOverThreshold) + int(self.forceOverThreshold.sum())
+
+            # pressure
+            features.cache["adjustment_sd"] = adjustment_from_std(self.largestStd)
+            features.cache["efficiency_ratio"] = ratio_of_totals(pd.Series(self.forceTotals, index=self.forceColumns[1:]))
+
+            self.features = features
+            return features
+
+    def getMeanAngles(self) -> np.ndarray:
+        # time weighted mean of the left and right arm angles, the plain mean if the frames have no duration
+        meanAngles = np.full(2, np.nan)
+        for side in range(2):
+            if self.frameCount > 1 and self.angleDurations[side] > 0:
+                meanAngles[side] = self.angleSums[side] / self.angleDurations[side]
+            elif self.angleValueCounts[side] > 0:
+                meanAngles[side] = self.angleValueSums[side] / self.angleValueCounts[side]
+        return meanAngles
+
+    def getHoldScore(self):
+        if self.climbSuccessful:
+            return 100
+        if not self.wristSeen:
+            return 0
+        # min() of a column gives NaN if its first value is missing
+        highestReach = [np.nan if np.isnan(self.firstWristX[side]) else self.lowestWristX[side] for side in range(2)]
+        return score_reach(min(highestReach[0], highestReach[1]))
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    argParser = argparse.ArgumentParser(description="Replay a recorded climb through the live analysis, and compare its features "
+                                                    "with the ones computed from the files.")
+    argParser.add_argument('-d', '--data', type=str, default="data", help="Directory with output.csv, forceData.csv and holdCoordinates.csv (default: data)")
+    argParser.add_argument('-s', '--successful', action='store_true', help="Treat the climb as successful")
+    args = argParser.parse_args()
+
+    climbData = pd.read_csv(f"{args.data}/output.csv")
+    forceData = pd.read_csv(f"{args.data}/forceData.csv")
+    holdsCoordinates = pd.read_csv(f"{args.data}/holdCoordinates.csv")
+
+    liveMetrics = LiveClimbMetrics(holdsCoordinates, args.successful)
+    startTime = time.perf_counter()
+    for row in climbData.to_dict('records'):
+        liveMetrics.addKeypoints(row)
+    for row in forceData.to_numpy():
+        liveMetrics.addForce(row)
+    feedTime = time.perf_counter() - startTime
+    startTime = time.perf_counter()
+    liveFeatures = liveMetrics.getFeatures()
+    finishTime = time.perf_counter() - startTime
+    print(f"Fed {len(climbData)} frames and {len(forceData)} force readings in {feedTime * 1000:.1f} ms, "
+          f"features ready {finishTime * 1000:.2f} ms after the climb")
+
+    features = ClimbFeatures(climbData, holdsCoordinates, forceData, args.successful)
+    for name in ["frame_count", "smoothness_score", "arm_angle_score", "hold_score", "climbing_duration", "hesitation_score",
+                 "force_hold_count", "adjustment_sd", "efficiency_ratio"]:
+        print(f"{name:20} live {liveFeatures[name]!s:24} files {features[name]!s:24}")
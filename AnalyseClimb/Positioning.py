@@ -1,15 +1,41 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sb
-from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from AnalyseClimb.ClimbFeatures import ClimbFeatures, feature
+from AnalyseClimb.HoldContact import legacy_time_on_holds
+
+# Length of the rolling window used to measure how smoothly the centre of gravity moves: the time the original window of 5
+# samples spanned when pose estimation ran on every 4th frame of a 30 fps camera, which the smoothness score was tuned with
+COG_WINDOW_MS = 660
+# Samples a window needs to count towards the score, as many as the original window had, so scores stay comparable with the
+# leaderboard
+COG_MIN_SAMPLES = 5
 
 
 # Preprocess data, forward fill
 def preprocess_data(df):
-    df.fillna(method='ffill', inplace=True)  # Fill NaN values in the DataFrame with last valid observation
+    df.ffill(inplace=True)  # Fill NaN values in the DataFrame with last valid observation
     return df
 
+# Mean of a column weighted by how long each sample lasted, so that stalls in the pose stream do not skew the average
+def time_weighted_mean(values, timestamps):
+    values = np.asarray(values, dtype=float)
+    timestamps = np.asarray(timestamps, dtype=float)
+
+    if len(values) < 2:
+        return np.nanmean(values) if len(values) > 0 else np.nan
+
+    # each sample lasts until the next one, the last sample lasts for the typical sample interval
+    intervals = np.diff(timestamps)
+    durations = np.append(intervals, np.median(intervals))
+    durations = np.clip(durations, 0, None)
+
+    valid = ~np.isnan(values)
+    totalDuration = durations[valid].sum()
+    if totalDuration <= 0:
+        return np.nanmean(values) if valid.any() else np.nan
+    return (values[valid] * durations[valid]).sum() / totalDuration
+
 # Function to measure average arm angle throughout the climb
 def measure_arm_angle(data):
     #low_angle_threshold = 30  # Define a threshold for a 'low' arm angle
@@ -45,8 +71,11 @@ def measure_arm_angle(data):
     #low_angle_proportion = num_low_angles / num_samples if num_samples > 0 else 0
 
     # Assign score based on the proportion of low arm angles
-    score = (np.mean(data["Left Arm Angle"]) + np.mean(data["Right Arm Angle"]))/2
+    score = (time_weighted_mean(data["Left Arm Angle"], data["Timestamp(ms)"]) + time_weighted_mean(data["Right Arm Angle"], data["Timestamp(ms)"]))/2
+    return score_arm_angle(score)
 
+# Arm bend score from the mean of the time weighted mean arm angles
+def score_arm_angle(score):
     if score >= 180:
         score = 100
     elif 180 > score:
@@ -57,112 +86,41 @@ def measure_arm_angle(data):
 
 # Function definition with separate results for right and left hands
 def calculate_time_on_holds(climb_data, holdsCoordinates, threshold_distance=2):
-    result_df_left = pd.DataFrame(columns=['Hold_Id', 'Total_Time_Left(ms)', 'Start_Timestamp_Left(ms)', 'End_Timestamp_Left(ms)'])
-    result_df_right = pd.DataFrame(columns=['Hold_Id', 'Total_Time_Right(ms)', 'Start_Timestamp_Right(ms)', 'End_Timestamp_Right(ms)'])
     holdsCoordinates = pd.DataFrame(holdsCoordinates)
-    climb_data = pd.DataFrame(climb_data)
-    holds_data = pd.DataFrame({
-    'Hold_Id': holdsCoordinates["right"],
-    'Hold_X': holdsCoordinates["left"],
-    'Hold_Y': holdsCoordinates["top"],
-})
-    
-    for hold_index, hold_row in holds_data.iterrows():
-        hold_id, hold_x, hold_y = hold_row
-
-        # Filter the climb_data based on the hold coordinates and threshold for left hand
-        left_wrist_hold = climb_data[
-            ((climb_data['left_wrist_X'] - hold_x)**2 + (climb_data['left_wrist_Y'] - hold_y)**2) <= threshold_distance**2
-        ]
-
-        if not left_wrist_hold.empty:
-            # Calculate the total time spent on the hold by the left hand
-            total_time_on_hold_left = left_wrist_hold['Timestamp(ms)'].sum()
-
-            # Determine the start and end timestamps for the left hand
-            start_timestamp_left = left_wrist_hold['Timestamp(ms)'].min()
-            end_timestamp_left = left_wrist_hold['Timestamp(ms)'].max()
-
-            # Append the result to the left hand DataFrame
-            result_df_left = pd.concat([
-                result_df_left,
-                pd.DataFrame({
-                    'Hold_Id': hold_id,
-                    'Total_Time_Left(ms)': total_time_on_hold_left,
-                    'Start_Timestamp_Left(ms)': start_timestamp_left,
-                    'End_Timestamp_Left(ms)': end_timestamp_left
-                }, index=[0])
-            ], ignore_index=True)
-
-        else:
-            # If hold was not held at all by the left hand, set values to 0
-            result_df_left = pd.concat([
-                result_df_left,
-                pd.DataFrame({
-                    'Hold_Id': hold_id,
-                    'Total_Time_Left(ms)': 0,
-                    'Start_Timestamp_Left(ms)': 0,
-                    'End_Timestamp_Left(ms)': 0
-                }, index=[0])
-            ], ignore_index=True)
-
-
-        # Filter the climb_data based on the hold coordinates and threshold for right hand
-        right_wrist_hold = climb_data[
-            ((climb_data['right_wrist_X'] - hold_x)**2 + (climb_data['right_wrist_Y'] - hold_y)**2) <= threshold_distance**2
-        ]
-
-        if not right_wrist_hold.empty:
-            # Calculate the total time spent on the hold by the right hand
-            total_time_on_hold_right = right_wrist_hold['Timestamp(ms)'].sum()
-
-            # Determine the start and end timestamps for the right hand
-            start_timestamp_right = right_wrist_hold['Timestamp(ms)'].min()
-            end_timestamp_right = right_wrist_hold['Timestamp(ms)'].max()
-
-            # Append the result to the right hand DataFrame
-            result_df_right = pd.concat([
-                result_df_right,
-                pd.DataFrame({
-                    'Hold_Id': hold_id,
-                    'Total_Time_Right(ms)': total_time_on_hold_right,
-                    'Start_Timestamp_Right(ms)': start_timestamp_right,
-                    'End_Timestamp_Right(ms)': end_timestamp_right
-                }, index=[0])
-            ], ignore_index=True)
-
-        else:
-            # If hold was not held at all by the right hand, set values to 0
-            result_df_right = pd.concat([
-                result_df_right,
-                pd.DataFrame({
-                    'Hold_Id': hold_id,
-                    'Total_Time_Right(ms)': 0,
-                    'Start_Timestamp_Right(ms)': 0,
-                    'End_Timestamp_Right(ms)': 0
-                }, index=[0])
-            ], ignore_index=True)
-
-
+    hold_positions = np.column_stack([holdsCoordinates["left"], holdsCoordinates["top"]])
+    # holds have always been identified by their right edge here, see Progress.calculate_time_on_holds for the hold numbers
+    result_df_left, result_df_right, _ = legacy_time_on_holds(pd.DataFrame(climb_data), holdsCoordinates["right"], hold_positions, threshold_distance)
     return result_df_left, result_df_right
 
 def centre_of_gravity(climb_data):
-    window_size = 5
+    window_size = COG_MIN_SAMPLES
     CoG_X = climb_data["Center of Gravity X"]
     CoG_Y = climb_data["Center of Gravity Y"]
 
     CoG_X_mean_difference = CoG_X.diff()
     CoG_Y_mean_difference = CoG_Y.diff()
 
-    rolling_std_CoG_X = CoG_X.rolling(window=window_size).std()
-    rolling_std_CoG_Y = CoG_Y.rolling(window=window_size).std()
+    timestamps = climb_data["Timestamp(ms)"]
+    if timestamps.is_monotonic_increasing:
+        # roll over a fixed length of time rather than a fixed number of samples, using the capture timestamps,
+        # so that frames dropped while inference stalls do not stretch the window
+        timeIndex = pd.to_timedelta(timestamps.to_numpy(), unit='ms')
+        rolling_std_CoG_X = pd.Series(CoG_X.to_numpy(), index=timeIndex).rolling(f"{COG_WINDOW_MS}ms", min_periods=COG_MIN_SAMPLES).std()
+        rolling_std_CoG_Y = pd.Series(CoG_Y.to_numpy(), index=timeIndex).rolling(f"{COG_WINDOW_MS}ms", min_periods=COG_MIN_SAMPLES).std()
+    else:
+        rolling_std_CoG_X = CoG_X.rolling(window=window_size).std()
+        rolling_std_CoG_Y = CoG_Y.rolling(window=window_size).std()
 
     std_CoG_X = np.std(CoG_X)
     std_CoG_Y = np.std(CoG_Y)
 
     #smoothness = max(std_CoG_X, std_CoG_Y)*100
 
-    smoothness = 100 - (np.mean(rolling_std_CoG_X)*2 + np.mean(rolling_std_CoG_Y))*1000
+    return score_smoothness(np.mean(rolling_std_CoG_X), np.mean(rolling_std_CoG_Y))
+
+# Smoothness score from the mean rolling standard deviations of the centre of gravity
+def score_smoothness(mean_std_CoG_X, mean_std_CoG_Y):
+    smoothness = 100 - (mean_std_CoG_X*2 + mean_std_CoG_Y)*1000
     smoothness = 100 * 1/(1+2.73**(-(smoothness/10) +5))
     if smoothness < 0:
         smoothness = 0
@@ -223,19 +181,29 @@ def calculate_smoothness_old(climb_data, left_hand_df, right_hand_df):
     return cog_score
 
 
+# Features shared by calculatePosition and visualisePosition, see AnalyseClimb/ClimbFeatures.py
+@feature
+def smoothness_score(features):
+    return centre_of_gravity(features["climb_data"])
+
+@feature
+def arm_angle_score(features):
+    return measure_arm_angle(features["climb_data"])
+
+
     # Sample usage of the functions
-def calculatePosition(climbData, holdsCoordinates):
-    climbing_data = preprocess_data(climbData)  # Just do columns we need, not whole thing TO DO
-    threshold_distance = 10 #THIS VALUE TO CHANGE WHEN WE START TESTING
+def calculatePosition(climbData, holdsCoordinates, features=None):
+    features = ClimbFeatures(climbData, holdsCoordinates) if features is None else features
 
-    if len(climbing_data) < 2:
+    if features["frame_count"] < 2:
         return (0,0,0,0)
     
     else: 
-        result_dataframe_left, result_dataframe_right = calculate_time_on_holds(climbData, holdsCoordinates, threshold_distance)
-        #smoothness_score = calculate_smoothness_old(climbing_data, result_dataframe_left, result_dataframe_right)
-        smoothness_score = centre_of_gravity(climbing_data)
-        arm_angle_score = measure_arm_angle(climbing_data)
+        # the time on holds is only needed by calculate_smoothness_old
+        #result_dataframe_left, result_dataframe_right = calculate_time_on_holds(features["climb_data"], holdsCoordinates, threshold_distance=10)
+        #smoothness_score = calculate_smoothness_old(features["climb_data"], result_dataframe_left, result_dataframe_right)
+        smoothness_score = features["smoothness_score"]
+        arm_angle_score = features["arm_angle_score"]
 
         combined_score = (smoothness_score + arm_angle_score) / 2  # Calculate average of the two scores
         # if any of the scores are NaN, replace with -1
@@ -249,15 +217,14 @@ def calculatePosition(climbData, holdsCoordinates):
         return [round(combined_score), round(smoothness_score, 2), round(arm_angle_score, 2)]
 
 
-def visualisePosition(climbData):
-
-    climbing_data = preprocess_data(climbData)
+def visualisePosition(climbData, features=None):
+    features = ClimbFeatures(climbData) if features is None else features
 
-    if len(climbing_data) < 2:
+    if features["frame_count"] < 2:
         img = f"UI/UIAssets/position/noclimb_position.png"
 
     else:
-        arm_score = measure_arm_angle(climbing_data)
+        arm_score = features["arm_angle_score"]
             
         if 0<= arm_score < 20:
             img = f"UI/UIAssets/position/Position_0_30.png"
@@ -1,8 +1,10 @@
 import numpy as np
-import seaborn as sns
+import pandas as pd
+
+from AnalyseClimb.ClimbFeatures import ClimbFeatures, feature
 
 def preprocess_data(df):
-    df.fillna(method='ffill', inplace=True)  # Fill NaN values in the DataFrame with last valid observation
+    df.ffill(inplace=True)  # Fill NaN values in the DataFrame with last valid observation
     return df
 
 def calculate_ratio(df):
@@ -15,42 +17,99 @@ def calculate_ratio(df):
         df[i] = detect_spikes(df[i])
 
     df["hold7"] = df["hold7"]*2.0/3.0
+    return ratio_of_totals(df.sum())
+
+def ratio_of_totals(totals):
+    # Ratio of the force on the first three holds to the force on all holds, from the total force on each hold
     # Take the sum of the first three columns
-    sum_first_three = df.iloc[:, :3].sum().sum()
+    sum_first_three = totals.iloc[:3].sum()
 
     # Take the sum of the entire DataFrame
-    total_sum = df.sum().sum()
+    total_sum = totals.sum()
 
     # Calculate the ratio
     ratio = sum_first_three / total_sum
 
     return ratio
 
+SPIKE_THRESHOLD = 8000 # a reading this far from both of its neighbours is noise from the load cell, not a change in force
+
 def detect_spikes(column):
-    for i in range(1, len(column) - 1):
-        value = column[i]
-        if isinstance(value, (int, float)) and abs(value - column[i-1]) > 8000 and abs(value - column[i+1]) > 8000:
-            column[i] = column[i+1]
-    return column
+    # Readings that differ from both neighbours by more than SPIKE_THRESHOLD take the value of the next reading.
+    # Only float columns can have spikes, readings used to be checked with isinstance(value, float)
+    values = np.asarray(column)
+    if values.dtype.kind != 'f' or len(values) < 3:
+        return column
+
+    middle = values[1:-1]
+    candidates = (np.abs(middle - values[:-2]) > SPIKE_THRESHOLD) & (np.abs(middle - values[2:]) > SPIKE_THRESHOLD)
+    # once a spike has been replaced by the next reading, that reading is no longer far from its previous neighbour,
+    # so in a run of candidates only the 1st, 3rd, 5th... are spikes
+    positions = np.arange(len(candidates))
+    run_starts = np.maximum.accumulate(np.where(candidates & ~np.r_[False, candidates[:-1]], positions, -1))
+    spikes = candidates & ((positions - run_starts) % 2 == 0)
+
+    despiked = values.copy()
+    despiked[1:-1][spikes] = values[2:][spikes]
+    if isinstance(column, pd.Series):
+        return pd.Series(despiked, index=column.index, name=column.name)
+    return despiked
+
+def remove_spikes(df):
+    for column in df.columns[1:]:  # Skip the first column which is assumed to be time
+        df[column] = detect_spikes(df[column])
+    return df
 
 def calculate_adjustments(df):
+    return largest_adjustment(remove_spikes(df))
+
+def largest_adjustment(df):
+    # Largest standard deviation of the readings from one non-zero reading to the next, over the segments with zero readings
+    # between them (a hold being let go of and pressed again)
     largest_std_dev = 0
     for column in df.columns[1:]:  # Skip the first column which is assumed to be time
-        df[column] = detect_spikes(df[column])
-        non_zero_indices = df[column][df[column] != 0].index
-        for i in range(len(non_zero_indices) - 1):
-            start_index = non_zero_indices[i]
-            end_index = non_zero_indices[i + 1] + 1
-            non_zero_values = df[column][start_index:end_index]
-            if len(non_zero_values) > 2:  # Calculate standard deviation only if there are more than one non-zero value
-                std_dev = np.std(non_zero_values)
-                if std_dev > largest_std_dev:
-                    largest_std_dev = std_dev
+        values = np.asarray(df[column], dtype=np.float64)
+        non_zero_indices = np.flatnonzero(values != 0) # NaN counts as non-zero
+        # length of each segment, from one non-zero reading to the next inclusive: the zero run between them plus its two ends
+        lengths = np.diff(non_zero_indices) + 1
+        segments = lengths > 2
+        if not segments.any():
+            continue
+        first = values[non_zero_indices[:-1][segments]]
+        last = values[non_zero_indices[1:][segments]]
+        largest_std_dev = max(largest_std_dev, segment_std(first, last, lengths[segments]).max())
+    return adjustment_from_std(largest_std_dev)
+
+def segment_std(first, last, lengths):
+    # Standard deviation of segments of readings that are zero everywhere but at their ends: everything between the ends of a
+    # segment is zero, so its standard deviation only depends on the ends. Missing readings are skipped, like np.std of a Series does
+    first_valid, last_valid = ~np.isnan(first), ~np.isnan(last)
+    first, last = np.where(first_valid, first, 0), np.where(last_valid, last, 0)
+    count = lengths - 2 + first_valid + last_valid
+    mean = (first + last) / count
+    variance = (first_valid * (first - mean)**2 + last_valid * (last - mean)**2 + (lengths - 2) * mean**2) / count
+    return np.sqrt(variance)
+
+def adjustment_from_std(largest_std_dev):
     return largest_std_dev/1000*6
 
-def calculatePressure(climbData):
+# Features shared by calculatePressure and visualisePressure, see AnalyseClimb/ClimbFeatures.py
+@feature
+def despiked_force(features):
+    return remove_spikes(features.forceData.copy())
+
+@feature
+def adjustment_sd(features):
+    return largest_adjustment(features["despiked_force"])
+
+@feature
+def efficiency_ratio(features):
+    return calculate_ratio(features["despiked_force"])
+
+def calculatePressure(climbData, features=None):
+    features = ClimbFeatures(forceData=climbData) if features is None else features
 
-    sd = calculate_adjustments(climbData)
+    sd = features["adjustment_sd"]
     adjustment_score = 100 * 1/(1+2.73**(-(sd/10) + 5))
     adjustment_score = 100-sd
     if adjustment_score < 0:
@@ -58,7 +117,7 @@ def calculatePressure(climbData):
     elif adjustment_score > 100:
         adjustment_score = 98
 
-    efficiency = calculate_ratio(climbData)
+    efficiency = features["efficiency_ratio"]
     efficiency_score = efficiency*100
 
     combined = adjustment_score*0.5+efficiency_score*0.5
@@ -68,12 +127,13 @@ def calculatePressure(climbData):
     
     return [round(combined), round(efficiency_score), round(adjustment_score)]
 
-def visualisePressure(climbData, progressSubmetrics):
+def visualisePressure(climbData, progressSubmetrics, features=None):
+    features = ClimbFeatures(forceData=climbData) if features is None else features
 
-    sd = calculate_adjustments(climbData)
+    sd = features["adjustment_sd"]
     adjustment_score = 100-sd
 
-    efficiency = calculate_ratio(climbData)
+    efficiency = features["efficiency_ratio"]
     efficiency_score = efficiency*100
 
     combined = adjustment_score*0.5+efficiency_score*0.5
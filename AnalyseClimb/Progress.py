@@ -1,8 +1,9 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sb
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+from AnalyseClimb.ClimbFeatures import ClimbFeatures, feature
+from AnalyseClimb.HoldContact import legacy_time_on_holds
+from AnalyseClimb import Pressure # registers the despiked_force feature
 
 
 
@@ -10,101 +11,18 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 # Preprocess data, forward fill
 def preprocess_data(df):
-    df.fillna(method='ffill', inplace=True)  # Fill NaN values in the DataFrame with last valid observation
+    df.ffill(inplace=True)  # Fill NaN values in the DataFrame with last valid observation
     return df
 
 def calculate_time_on_holds(climb_data, holdsCoordinates, threshold_distance):
-    result_df_left = pd.DataFrame(columns=['Hold_Id', 'Total_Time_Left(ms)', 'Start_Timestamp_Left(ms)', 'End_Timestamp_Left(ms)'])
-    result_df_right = pd.DataFrame(columns=['Hold_Id', 'Total_Time_Right(ms)', 'Start_Timestamp_Right(ms)', 'End_Timestamp_Right(ms)'])
-
-    holds_data = pd.DataFrame({
-        'Hold_Id': holdsCoordinates["holdNumber"],
-        'Hold_X': holdsCoordinates["left"],
-        'Hold_Y': holdsCoordinates["top"],
-    })
-
-    farthest_hold_left = 0
-    farthest_hold_right = 0
-
-    for hold_index, hold_row in holds_data.iterrows():
-        hold_id, hold_x, hold_y = hold_row
-
-        # Filter the climb_data based on the hold coordinates and threshold for left hand
-        left_wrist_hold = climb_data[
-            ((climb_data['left_wrist_X'] - hold_x)**2 + (climb_data['left_wrist_Y'] - hold_y)**2) <= threshold_distance**2
-        ]
-
-        if not left_wrist_hold.empty:
-            farthest_hold_left = max(farthest_hold_left, hold_id)
-
-            # Calculate the total time spent on the hold by the left hand
-            total_time_on_hold_left = left_wrist_hold['Timestamp(ms)'].sum()
-
-            # Determine the start and end timestamps for the left hand
-            start_timestamp_left = left_wrist_hold['Timestamp(ms)'].min()
-            end_timestamp_left = left_wrist_hold['Timestamp(ms)'].max()
-
-            # Append the result to the left hand DataFrame
-            result_df_left = pd.concat([
-                result_df_left,
-                pd.DataFrame({
-                    'Hold_Id': hold_id,
-                    'Total_Time_Left(ms)': total_time_on_hold_left,
-                    'Start_Timestamp_Left(ms)': start_timestamp_left,
-                    'End_Timestamp_Left(ms)': end_timestamp_left
-                }, index=[0])
-            ], ignore_index=True)
-        else:
-            # If hold was not held at all by the left hand, set values to 0
-            result_df_left = pd.concat([
-                result_df_left,
-                pd.DataFrame({
-                    'Hold_Id': hold_id,
-                    'Total_Time_Left(ms)': 0,
-                    'Start_Timestamp_Left(ms)': 0,
-                    'End_Timestamp_Left(ms)': 0
-                }, index=[0])
-            ], ignore_index=True)
-
-
-        # Filter the climb_data based on the hold coordinates and threshold for right hand
-        right_wrist_hold = climb_data[
-            ((climb_data['right_wrist_X'] - hold_x)**2 + (climb_data['right_wrist_Y'] - hold_y)**2) <= threshold_distance**2
-        ]
-
-        if not right_wrist_hold.empty:
-            farthest_hold_right = max(farthest_hold_right, hold_id)
-
-            # Calculate the total time spent on the hold by the right hand
-            total_time_on_hold_right = right_wrist_hold['Timestamp(ms)'].sum()
-
-            # Determine the start and end timestamps for the right hand
-            start_timestamp_right = right_wrist_hold['Timestamp(ms)'].min()
-            end_timestamp_right = right_wrist_hold['Timestamp(ms)'].max()
-
-            # Append the result to the right hand DataFrame
-            result_df_right = pd.concat([
-                result_df_right,
-                pd.DataFrame({
-                    'Hold_Id': hold_id,
-                    'Total_Time_Right(ms)': total_time_on_hold_right,
-                    'Start_Timestamp_Right(ms)': start_timestamp_right,
-                    'End_Timestamp_Right(ms)': end_timestamp_right
-                }, index=[0])
-            ], ignore_index=True)
-
-        else:
-            # If hold was not held at all by the right hand, set values to 0
-            result_df_right = pd.concat([
-                result_df_right,
-                pd.DataFrame({
-                    'Hold_Id': hold_id,
-                    'Total_Time_Right(ms)': 0,
-                    'Start_Timestamp_Right(ms)': 0,
-                    'End_Timestamp_Right(ms)': 0
-                }, index=[0])
-            ], ignore_index=True)
+    hold_ids = np.asarray(holdsCoordinates["holdNumber"])
+    hold_positions = np.column_stack([holdsCoordinates["left"], holdsCoordinates["top"]])
+    result_df_left, result_df_right, contacts = legacy_time_on_holds(climb_data, hold_ids, hold_positions, threshold_distance)
 
+    # the highest numbered hold each hand touched
+    touched = contacts["contact"].any(axis=0)
+    farthest_hold_left = hold_ids[touched[:, 0]].max(initial=0)
+    farthest_hold_right = hold_ids[touched[:, 1]].max(initial=0)
 
     return result_df_left, result_df_right, farthest_hold_left, farthest_hold_right
 
@@ -139,20 +57,22 @@ def calculate_hold_score(climbing_data, holdsCoordinates, climbSuccessful):
         left_highest_reach = min(climbing_data["left_wrist_X"])
         right_highest_reach = min(climbing_data["right_wrist_X"])
 
-        highest_reach = min(left_highest_reach, right_highest_reach)
+        return score_reach(min(left_highest_reach, right_highest_reach))
 
-        if highest_reach < 0:
-            highest_reach = 0
+# Completion score from the highest point a hand reached
+def score_reach(highest_reach):
+    if highest_reach < 0:
+        highest_reach = 0
+
+    reach = 100 - highest_reach*125 #COMPLETION SCALE VALUE
 
-        reach = 100 - highest_reach*125 #COMPLETION SCALE VALUE
-    
     #if farthest_left == farthest_right == total_holds:  # Climber completed the route
         #return 100  # Return the maximum possible score (100)
     #else:
         #missed_holds = total_holds - max(farthest_left, farthest_right)
         #penalty = 20 * missed_holds  # Subtract 20 points for each hold missed
         #score = 100
-        return round(reach, 2)  # Ensure score doesn't go below 0
+    return round(reach, 2)  # Ensure score doesn't go below 0
    
 
 
@@ -204,27 +124,50 @@ def calculate_combined_score(hesitation_score, hold_score):
 
     
 
-def calculateProgress(climbData, holdsCoordinates, climbSuccessful, forceData):
+# Features shared by calculateProgress and visualiseProgress, see AnalyseClimb/ClimbFeatures.py
+@feature
+def hold_times(features):
     threshold_distance = 10 # specify the threshold distance for proximity to the holds
+    return calculate_time_on_holds(features["climb_data"], features.holdsCoordinates, threshold_distance)
 
-    climbing_data = preprocess_data(climbData)  # Preprocess NaN values in the DataFrame
+@feature
+def hesitation_score(features):
+    result_left, result_right, _, _ = features["hold_times"]
+    # calculate_hesitation_score adds columns to the results it is given
+    return calculate_hesitation_score(result_left.copy(), result_right.copy())
 
-    if len(climbing_data) < 2:
+@feature
+def hold_score(features):
+    return calculate_hold_score(features["climb_data"], features.holdsCoordinates, features.climbSuccessful)
+
+@feature
+def climbing_duration(features):
+    return measure_climbing_duration(features["climb_data"])
+
+@feature
+def force_hold_count(features):
+    # spikes are not holds being pressed, see Pressure.detect_spikes
+    return hold_number_force(features["despiked_force"])
+
+
+def calculateProgress(climbData, holdsCoordinates, climbSuccessful, forceData, features=None):
+    features = ClimbFeatures(climbData, holdsCoordinates, forceData, climbSuccessful) if features is None else features
+
+    if features["frame_count"] < 2:
         return (0,0,0,0)
     
     else: 
-        result_left, result_right, farthest_left, farthest_right = calculate_time_on_holds(climbing_data, holdsCoordinates, threshold_distance)
-        timeclimb = measure_climbing_duration(climbing_data)
+        timeclimb = features["climbing_duration"]
 
 
-        force_progress = hold_number_force(forceData)
+        force_progress = features["force_hold_count"]
         pathfinding_score_force = force_progress*10 + 10
         if pathfinding_score_force > 100:
             pathfinding_score_force = 100
 
-        hesitation_score = calculate_hesitation_score(result_left, result_right)
+        hesitation_score = features["hesitation_score"]
         #hold_score = calculate_hold_score(farthest_left, farthest_right, total_holds = 10)
-        hold_score = calculate_hold_score(climbing_data, holdsCoordinates, climbSuccessful)
+        hold_score = features["hold_score"]
         climbing_duration_score = calculate_time_score(timeclimb)*2
 
         #pathfinding_score = max(pathfinding_score_force, hold_score)
@@ -240,15 +183,14 @@ def sum_left_right(result_left, result_right, holdsCoordinates):
     return total_hold_time
 
 
-def visualiseProgress(climbData, holdsCoordinates, climbSuccessful):
-
-    climbing_data = preprocess_data(climbData)
+def visualiseProgress(climbData, holdsCoordinates, climbSuccessful, features=None):
+    features = ClimbFeatures(climbData, holdsCoordinates, climbSuccessful=climbSuccessful) if features is None else features
 
-    if len(climbing_data) < 2:
+    if features["frame_count"] < 2:
         img = f"UI/UIAssets/progress/noclimb.png"
 
     else:
-        hold_score = calculate_hold_score(climbing_data, holdsCoordinates, climbSuccessful)
+        hold_score = features["hold_score"]
 
         if climbSuccessful == True:
             img = f"UI/UIAssets/progress/progress100.png"
@@ -0,0 +1,179 @@
+"""
+Scores archived climbs again, e.g. after ClimbAnalyserThread.metricsWeights or a scaling constant in Progress or Pressure has
+changed, and writes a new leaderboard from the new scores.
+
+The sessions (see DataCapture/Session.py) are scored in parallel, in a pool of processes. Every scored session is appended to a
+checkpoint file as soon as it is done, so a run that is interrupted carries on where it stopped when it is started again with
+the same output and weights. Nothing here imports PyQt, so it can run on a machine without a display.
+
+Run from the repository root:
+    python -m AnalyseClimb.Rescore
+    python -m AnalyseClimb.Rescore data/sessions -j 8 -o data/leaderboard_rescored.csv --weights '{"pressure": 0.2, "positioning": 0.5, "progress": 0.3}'
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from AnalyseClimb import Scoring
+from DataCapture.Session import SESSIONS_DIRECTORY, Session, listSessions, RECORDED, ANALYSED
+
+CHECKPOINT_SUFFIX = ".checkpoint.jsonl"
+
+
+def rescoreSession(directory, metricsWeights, saveScores=False) -> dict:
+    """
+    Scores one session. Runs in a worker process, so every error is caught and returned, one bad climb does not stop the others.
+
+    Args:
+        directory: The session's directory.
+        metricsWeights: Weight of each metric in the overall score.
+        saveScores: True to save the new scores to the session's manifest. Defaults to False.
+
+    Returns:
+        dict: The session's "id", "climberName", "created" time, and its "scores" (see Scoring.getSessionScores), or an "error".
+    """
+    startTime = time.perf_counter()
+    result = {"directory": directory}
+    try:
+        session = Session(directory)
+        result.update(id=session.id, climberName=session.climberName, created=session.manifest["created"])
+        features = Scoring.loadClimbFeatures(session, climbSuccessful=bool(session.manifest["climbSuccessful"]))
+        # the sessions are already scored in parallel, so each one's metrics are calculated one after the other
+        scores = Scoring.scoreClimb(features, metricsWeights, concurrent=False)
+        result["scores"] = Scoring.getSessionScores(scores)
+        if saveScores:
+            session.update(status=ANALYSED, scores=result["scores"])
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["time"] = time.perf_counter() - startTime
+    return result
+
+
+def silenceWorker():
+    # the metrics print their intermediate values, which would bury the progress report
+    sys.stdout = open(os.devnull, 'w')
+
+
+def loadCheckpoint(path, metricsWeights) -> dict:
+    """
+    Returns the results saved to a checkpoint, by session directory. A checkpoint made with different weights is ignored.
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, 'r') as f:
+        lines = f.read().splitlines()
+    if not lines or json.loads(lines[0]).get("metricsWeights") != metricsWeights:
+        print(f"{path} was made with different weights, scoring every session again")
+        return results
+    for line in lines[1:]:
+        try:
+            result = json.loads(line)
+        except json.JSONDecodeError:
+            # the last line of a run that was killed while writing it
+            continue
+        results[result["directory"]] = result
+    return results
+
+
+def writeLeaderboard(path, results, metricsWeights):
+    """
+    Writes the leaderboard of the scored sessions, oldest climb first like data/leaderboard.csv.
+    """
+    scored = sorted((result for result in results if "scores" in result), key=lambda result: result["created"])
+    temporaryPath = path + ".tmp"
+    with open(temporaryPath, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(Scoring.LEADERBOARD_HEADER)
+        for result in scored:
+            # the leaderboard has whole scores, like ClimbAnalyserThread.saveClimbRecord writes them
+            scores = {metric: [round(score) for score in value] if isinstance(value, list) else value
+                      for metric, value in result["scores"].items()}
+            scores["total"] = round(scores["total"])
+            writer.writerow(Scoring.getLeaderboardRecord(result["climberName"], scores, metricsWeights))
+    os.replace(temporaryPath, path)
+
+
+def rescore(sessionsDirectory, outputPath, metricsWeights, jobs=None, checkpointPath=None, restart=False, saveScores=False,
+            verbose=False) -> list:
+    """
+    Scores every recorded session in sessionsDirectory and writes a new leaderboard to outputPath.
+
+    Args:
+        sessionsDirectory: Directory the sessions are stored in.
+        outputPath: Path of the new leaderboard.
+        metricsWeights: Weight of each metric in the overall score.
+        jobs: Number of worker processes. Defaults to None, one per CPU.
+        checkpointPath: Path of the checkpoint. Defaults to the output path with a .checkpoint.jsonl extension.
+        restart: True to ignore the checkpoint and score every session again. Defaults to False.
+        saveScores: True to save the new scores to each session's manifest. Defaults to False.
+        verbose: True to show what the metrics print. Defaults to False.
+
+    Returns:
+        list: The result of every session, see rescoreSession.
+    """
+    checkpointPath = outputPath + CHECKPOINT_SUFFIX if checkpointPath is None else checkpointPath
+    sessions = [session for session in listSessions(sessionsDirectory) if session.status in (RECORDED, ANALYSED)]
+    directories = {session.directory for session in sessions}
+    results = {} if restart else loadCheckpoint(checkpointPath, metricsWeights)
+    # sessions that could not be scored are tried again
+    results = {directory: result for directory, result in results.items() if directory in directories and "scores" in result}
+    remaining = [session.directory for session in sessions if session.directory not in results]
+    print(f"{len(sessions)} sessions in {sessionsDirectory}, {len(results)} already scored, {len(remaining)} to score")
+
+    if remaining:
+        mode = 'a' if results else 'w'
+        with open(checkpointPath, mode) as checkpoint:
+            if mode == 'w':
+                checkpoint.write(json.dumps({"metricsWeights": metricsWeights}) + "\n")
+            startTime = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=jobs, initializer=None if verbose else silenceWorker) as pool:
+                futures = [pool.submit(rescoreSession, directory, metricsWeights, saveScores) for directory in remaining]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    result = future.result()
+                    results[result["directory"]] = result
+                    # saved straight away, so an interrupted run loses at most the sessions being scored
+                    checkpoint.write(json.dumps(result) + "\n")
+                    checkpoint.flush()
+
+                    elapsed = time.perf_counter() - startTime
+                    remainingTime = elapsed / done * (len(remaining) - done)
+                    outcome = f"error: {result['error']}" if "error" in result else f"score {result['scores']['total']:.0f}"
+                    print(f"[{done}/{len(remaining)}] {result.get('id', result['directory'])} {result.get('climberName', '')}: "
+                          f"{outcome} ({result['time']:.2f} s, {remainingTime:.0f} s left)")
+
+    results = list(results.values())
+    writeLeaderboard(outputPath, results, metricsWeights)
+    errors = sum("error" in result for result in results)
+    print(f"Wrote {len(results) - errors} climbs to {outputPath}" + (f", {errors} could not be scored" if errors else ""))
+    return results
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Score archived climbs again, in parallel, and write a new leaderboard.")
+    argParser.add_argument('sessions', type=str, nargs='?', default=SESSIONS_DIRECTORY,
+                           help=f"Directory of the sessions to score (default: {SESSIONS_DIRECTORY})")
+    argParser.add_argument('-o', '--output', type=str, default="data/leaderboard_rescored.csv",
+                           help="Leaderboard to write (default: data/leaderboard_rescored.csv)")
+    argParser.add_argument('-j', '--jobs', type=int, default=None, help="Number of worker processes (default: one per CPU)")
+    argParser.add_argument('-w', '--weights', type=str, default=None,
+                           help="Weights of the metrics as JSON, e.g. '{\"pressure\": 0.3, \"positioning\": 0.4, \"progress\": 0.3}' "
+                                "(default: ClimbAnalyserThread.metricsWeights)")
+    argParser.add_argument('-c', '--checkpoint', type=str, default=None,
+                           help=f"Checkpoint to resume from (default: the output path with a {CHECKPOINT_SUFFIX} extension)")
+    argParser.add_argument('-r', '--restart', action='store_true', help="Ignore the checkpoint and score every session again")
+    argParser.add_argument('-s', '--save-scores', action='store_true', help="Save the new scores to the sessions' manifests")
+    argParser.add_argument('-v', '--verbose', action='store_true', help="Show what the metrics print")
+    args = argParser.parse_args()
+
+    metricsWeights = Scoring.METRICS_WEIGHTS if args.weights is None else json.loads(args.weights)
+    if set(metricsWeights) != set(Scoring.METRICS_WEIGHTS):
+        raise SystemExit(f"--weights needs a weight for each of {', '.join(Scoring.METRICS_WEIGHTS)}")
+
+    # run from the imported module rather than __main__, so the worker processes can find rescoreSession by its module
+    from AnalyseClimb import Rescore
+    Rescore.rescore(args.sessions, args.output, metricsWeights, args.jobs, args.checkpoint, args.restart, args.save_scores, args.verbose)
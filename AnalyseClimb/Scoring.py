@@ -0,0 +1,185 @@
+"""
+Scoring of a climb, without any Qt: reading a climb's data, calculating the metrics, visualisations and overall score, and the
+climb's leaderboard record. Used by ClimbAnalyserThread in the app, and by AnalyseClimb/Rescore.py to score archived climbs again
+in batch, e.g. after the weights or a scaling constant have changed.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from AnalyseClimb import Pressure, Positioning, Progress
+from AnalyseClimb.ClimbFeatures import ClimbFeatures, KEYPOINT_COLUMNS
+from DataCapture.ColumnStore import readSessionTable
+
+METRICS_WEIGHTS = {"pressure": 0.3, "positioning": 0.4, "progress": 0.3}
+
+SUBMETRICS_LABELS = {"pressure": ["Efficiency", "Adjustments"],
+                     "positioning": ["Smoothness", "Arm Bend"],
+                     "progress": ["Completion", "Pathfinding"]
+}
+
+SUBMETRICS_WEIGHTS = {"pressure": [0.5, 0.5],
+                      "positioning": [0.5, 0.5],
+                      "progress": [0.5, 0.5]
+}
+
+METRICS = ["pressure", "positioning", "progress"]
+
+METRICS_TIMEOUT = 10 # seconds the metrics have to finish in, the results screen shows the ones that did
+
+LEADERBOARD_HEADER = ["name", " score", " metric1", " metric2", " metric3"] # as in data/leaderboard.csv
+
+
+def loadClimbFeatures(session=None, dataDirectory="data", climbSuccessful=False) -> ClimbFeatures:
+    """
+    Reads a climb's keypoints, hold coordinates and force data, from the session's column tables, falling back to its CSV files.
+    Only the keypoint columns the features read are loaded, see KEYPOINT_COLUMNS.
+
+    Args:
+        session: The climb's session (see DataCapture/Session.py). Defaults to None, which reads the legacy files in dataDirectory.
+        dataDirectory: Directory of the legacy output.csv, holdCoordinates.csv and forceData.csv. Defaults to "data".
+        climbSuccessful: True if the climber reached the top hold.
+
+    Returns:
+        ClimbFeatures: The climb's features, see AnalyseClimb/ClimbFeatures.py.
+    """
+    climbData = readSessionTable(session, "keypoints", os.path.join(dataDirectory, "output.csv"), columns=KEYPOINT_COLUMNS)
+    holdsCoordinates = readSessionTable(session, "holdCoordinates", os.path.join(dataDirectory, "holdCoordinates.csv"))
+    forceData = readSessionTable(session, "force", os.path.join(dataDirectory, "forceData.csv"))
+
+    if any([len(climbData) == 0, len(holdsCoordinates) == 0, len(forceData) == 0]):
+        raise FileNotFoundError("Could not find data files")
+
+    return ClimbFeatures(climbData, holdsCoordinates, forceData, climbSuccessful)
+
+
+def calculateMetric(metric, features) -> tuple:
+    """
+    Calculates one metric of a climb and its visualisation.
+
+    Args:
+        metric: "pressure", "positioning" or "progress".
+        features: The climb's ClimbFeatures.
+
+    Returns:
+        tuple: (scores, visualisation), the scores being the metric's score followed by its submetrics' scores.
+    """
+    climbData, holdsCoordinates, forceData = features.climbData, features.holdsCoordinates, features.forceData
+    climbSuccessful = features.climbSuccessful
+
+    if metric == "pressure":
+        submetrics = Pressure.calculatePressure(forceData, features)
+        return submetrics, Pressure.visualisePressure(forceData, submetrics, features)
+    elif metric == "positioning":
+        return (Positioning.calculatePosition(climbData, holdsCoordinates, features),
+                Positioning.visualisePosition(climbData, features))
+    elif metric == "progress":
+        return (Progress.calculateProgress(climbData, holdsCoordinates, climbSuccessful, forceData, features),
+                Progress.visualiseProgress(climbData, holdsCoordinates, climbSuccessful, features))
+    else:
+        raise ValueError("Invalid metric name")
+
+
+def scoreClimb(features, metricsWeights=METRICS_WEIGHTS, submetricsWeights=SUBMETRICS_WEIGHTS, timeout=None,
+               concurrent=True) -> dict:
+    """
+    Calculates the metrics and visualisations of a climb, its overall score, and the submetric it should improve.
+
+    The metrics don't depend on each other, so they are calculated at the same time on a small pool of threads, sharing the
+    features they have in common. A metric that fails, or does not finish within the timeout, is left out: its scores and
+    visualisation are None, and the overall score is calculated from the other metrics.
+
+    Args:
+        features: The climb's ClimbFeatures.
+        metricsWeights: Weight of each metric in the overall score. Defaults to METRICS_WEIGHTS.
+        submetricsWeights: Weight of each submetric in its metric. Defaults to SUBMETRICS_WEIGHTS.
+        timeout: Seconds to wait for the metrics. Defaults to None, which waits until they have all finished.
+        concurrent: False to calculate the metrics one after the other in this thread, e.g. in a process that is already one
+            of a pool. Errors are then raised, and timeout is ignored. Defaults to True.
+
+    Returns:
+        dict: With the scores of each metric ("pressure", "positioning", "progress", each the metric's score followed by its
+            submetrics' scores, or None), their "visualisations", the overall score as "total", the "lowestWeightedSubmetric",
+            and the "missing" metrics.
+    """
+    if concurrent:
+        pool = ThreadPoolExecutor(max_workers=len(METRICS), thread_name_prefix="metric")
+        futures = {metric: pool.submit(calculateMetric, metric, features) for metric in METRICS}
+        done, _ = wait(futures.values(), timeout=timeout)
+        # a metric that overran keeps its thread until it finishes, but nothing waits for it
+        pool.shutdown(wait=False, cancel_futures=True)
+        results = {}
+        for metric, future in futures.items():
+            if future not in done:
+                print(f"The {metric} metric did not finish within {timeout} s")
+                results[metric] = (None, None)
+            elif future.exception() is not None:
+                print(f"Could not calculate the {metric} metric: {future.exception()!r}")
+                results[metric] = (None, None)
+            else:
+                results[metric] = future.result()
+    else:
+        results = {metric: calculateMetric(metric, features) for metric in METRICS}
+
+    scores = {metric: results[metric][0] for metric in METRICS}
+    scores["visualisations"] = {metric: results[metric][1] for metric in METRICS}
+    scores["missing"] = [metric for metric in METRICS if results[metric][0] is None]
+    scores["total"] = getClimbingScore(scores, metricsWeights)
+    scores["lowestWeightedSubmetric"] = findLowestWeightedSubmetric(scores, metricsWeights, submetricsWeights)
+    return scores
+
+
+def getClimbingScore(scores, metricsWeights=METRICS_WEIGHTS) -> int:
+    """
+    Calculates the overall score of a climb from the scores of its metrics, weighted by metricsWeights. If some metrics are
+    missing, the weights of the others are scaled up to make up for them.
+    """
+    available = [metric for metric in metricsWeights.keys() if scores.get(metric) is not None]
+    if not available:
+        return 0
+    overallScore = sum(metricsWeights[metric] * scores[metric][0] for metric in available)
+    if len(available) < len(metricsWeights):
+        overallScore *= sum(metricsWeights.values()) / sum(metricsWeights[metric] for metric in available)
+
+    return round(overallScore)
+
+
+def findLowestWeightedSubmetric(scores, metricsWeights=METRICS_WEIGHTS, submetricsWeights=SUBMETRICS_WEIGHTS) -> str:
+    """
+    Returns the submetric with the lowest weighted score, "" if every weighted score is 100 or more.
+    """
+    minSubmetric = ""
+    minScore = 100
+
+    for metric in metricsWeights.keys():
+        if metric not in scores:
+            raise ValueError("Invalid metric name")
+        if scores[metric] is None:
+            continue
+        for index, submetric in enumerate(SUBMETRICS_LABELS[metric]):
+            weightedSubmetricScore = submetricsWeights[metric][index] * scores[metric][index + 1] * metricsWeights[metric]
+            if weightedSubmetricScore < minScore:
+                minScore = weightedSubmetricScore
+                minSubmetric = submetric
+    return minSubmetric
+
+
+def getLeaderboardRecord(climberName, scores, metricsWeights=METRICS_WEIGHTS) -> list:
+    """
+    Returns a climb's row of the leaderboard: the climber's name, the overall score, and the score of each metric, empty for
+    the metrics that are missing.
+    """
+    record = [climberName, scores["total"]]
+    for metric in METRICS:
+        if metric in metricsWeights.keys():
+            record.append("" if scores[metric] is None else scores[metric][0])
+    return record
+
+
+def getSessionScores(scores) -> dict:
+    """
+    Returns a climb's scores in the format they are saved to its session's manifest, see DataCapture/Session.py.
+    """
+    sessionScores = {"total": float(scores["total"])}
+    for metric in METRICS:
+        sessionScores[metric] = None if scores[metric] is None else [float(score) for score in scores[metric]]
+    return sessionScores
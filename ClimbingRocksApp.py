@@ -3,7 +3,7 @@
 Main application file for the Climbing Rocks application. This file is responsible for creating the main window and managing the flow of the application.
 """
 # Standard library imports
-import sys, os, time, cv2
+import sys, os, time, cv2, argparse
 from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow
 from PyQt5.QtCore import QTimer, pyqtSignal, pyqtSlot, QThread, QRect
 from PyQt5.QtGui import QFontDatabase, QFont, QPixmap, QImage, QIcon
@@ -13,15 +13,27 @@ from UI.SplashScreen import SplashScreen
 from UI.LobbyScreen import LobbyScreen
 from UI.HoldFindingScreen import HoldFindingScreen
 from UI.ClimbingScreen import ClimbingScreen
-from UI.ResultsScreen import ResultsScreen
+from UI.AssetCache import preloadAssets
 from DataCapture.CameraSender import CameraSender
+from DataCapture.FrameSources import createFrameSource
 from DataCapture.CircularHoldFinder import HoldFindingThread # Change to DataCapture.HoldFinder for normal climbing holds
 from DataCapture.PoseEstimator import PoseEstimatorThread
 from DataCapture.ForceReceiver import ForceReceivingThread
+from DataCapture.Session import Session
+from StartupOrchestrator import StartupOrchestrator
 from error import *
 
 class MainWindow(QMainWindow):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, frameSourceArgs=None, poseWorkerProcess=False, poseEstimationModel=None):
+        """
+        Args:
+            parent: The parent widget.
+            frameSourceArgs: Keyword arguments for createFrameSource, to use a video file or synthetic scene instead of the camera.
+                Defaults to None (camera).
+            poseWorkerProcess: If True, pose estimation runs in a separate process that reads frames from shared memory. Defaults to False.
+            poseEstimationModel: The MoveNet model to use, "lightning" or "thunder". Defaults to None, which uses the model and
+                interpreter settings chosen by the startup probe (cached in data/interpreterConfig.json).
+        """
         super().__init__()
         self.setWindowTitle("Climbing Rocks")
         self.setWindowIcon(QIcon("UI/UIAssets/logo_dark.png"))
@@ -33,9 +45,13 @@ class MainWindow(QMainWindow):
 
         # Variables
         self.currentClimber = ""
+        self.currentSession = None # the current climb's data directory, see DataCapture/Session.py
         self.numHolds = 9
         self.numForceSensors = 9
-        self.poseEstimationModel = "thunder"
+        self.poseEstimationModel = poseEstimationModel # None lets the pose estimator pick the fastest model for this hardware
+        self.poseWorkerProcess = poseWorkerProcess
+        self.frameSourceArgs = frameSourceArgs
+        self.frameSource = None # opened by the "frame source" startup task
 
         # flags
         self.firstFrameReceived = False
@@ -47,55 +63,79 @@ class MainWindow(QMainWindow):
         # declare screens
         self.holdFindingScreen = None
 
-        try:    
+        # Load the models, camera, fonts and UI assets at the same time, and go to the lobby once they are all ready
+        self.startup = StartupOrchestrator(self)
+        self.startup.progressChanged.connect(self.splashScreen.setProgress)
+        self.startup.taskFinished.connect(self.onStartupTaskFinished)
+        self.startup.taskFailed.connect(self.onStartupFailed)
+        self.startup.finished.connect(self.goToLobbyScreenFirstTime)
 
-            # Load fonts
-            if (QFontDatabase.addApplicationFont("UI/UIAssets/DMSans.ttf") == -1):
-                raise FontError("Could not load font: DMSans")
-            else:
-                self.setFont(QFont("DM Sans"))
-            if (QFontDatabase.addApplicationFont("UI/UIAssets/Bungee.ttf") == -1):
-                raise FontError("Could not load font: Bungee")
-            self.splashScreen.setProgress(10)
+        # Create hold finding thread, before the pose estimator, which makes the hold finding screen that uses it
+        self.holdFindingThread = HoldFindingThread(self)
+        self.holdFindingThread.holdFindingModelLoaded.connect(self.onHoldFindingModelLoaded)
 
-            # Create camera sender thread
-            self.cameraSender = CameraSender(self)
-            self.cameraSender.frameSignal.connect(self.updateFrame)
-            self.cameraSender.cameraConnectSignal.connect(self.handleCameraConnection)
-            self.splashScreen.setProgress(20)
-            self.cameraSender.start()
+        self.startup.addTask("hold finding model", 20, self.holdFindingThread.start)
+        # opening the camera can take seconds, so it is opened on a background thread, and the camera sender is started once it is
+        self.startup.addBackgroundTask("frame source", 5, self.openFrameSource)
+        self.startup.addTask("camera", 10) # started by startCamera, finished by the first frame
+        self.startup.addTask("pose estimation model", 40) # started by startCamera, it needs the camera sender
+        self.startup.addBackgroundTask("UI assets", 15, preloadAssets)
+        self.startup.addTask("fonts", 10, self.loadFonts)
+        # start once the splash screen is on screen, so nothing delays its first frame
+        self.splashScreen.firstPainted.connect(self.startup.start)
 
-            # Create hold finding thread
-            self.holdFindingThread = HoldFindingThread(self)
-            self.holdFindingThread.holdFindingModelLoaded.connect(self.onHoldFindingModelLoaded)
-            self.splashScreen.setProgress(40)
-            self.holdFindingThread.start()
+    def loadFonts(self):
+        if (QFontDatabase.addApplicationFont("UI/UIAssets/DMSans.ttf") == -1):
+            raise FontError("Could not load font: DMSans")
+        else:
+            self.setFont(QFont("DM Sans"))
+        if (QFontDatabase.addApplicationFont("UI/UIAssets/Bungee.ttf") == -1):
+            raise FontError("Could not load font: Bungee")
+        self.startup.finishTask("fonts")
 
+    def openFrameSource(self, progress):
+        # runs on a startup task thread, cv2.VideoCapture blocks until the camera or video file has opened
+        frameSource = createFrameSource(**(self.frameSourceArgs or {}))
+        if not frameSource.isOpened():
+            frameSource.release()
+            raise CameraNotFoundError("Failed to connect to camera")
+        self.frameSource = frameSource
 
+    @pyqtSlot(str)
+    def onStartupTaskFinished(self, task):
+        if task == "frame source":
+            try:
+                self.startCamera()
+            except Exception as e:
+                self.startup.failTask("camera", str(e))
 
-        except CameraNotFoundError as e:
-            self.splashScreen.setError(str(e))
-            timer = QTimer()
-            timer.singleShot(10000, sys.exit)
-            pass
+    def startCamera(self):
+        # Create camera sender thread, on the frame source opened by the "frame source" startup task
+        self.cameraSender = CameraSender(self, source=self.frameSource, sharedFrames=self.poseWorkerProcess)
+        self.cameraSender.frameSignal.connect(self.updateFrame)
+        self.cameraSender.cameraConnectSignal.connect(self.handleCameraConnection)
+        self.cameraSender.start()
 
-        except FontError as e:
-            self.splashScreen.setError(str(e))
-            timer = QTimer()
-            timer.singleShot(10000, sys.exit)
-            pass
+        # Create pose estimator thread, which loads its model while the camera connects
+        self.poseEstimatorThread = PoseEstimatorThread(self.poseEstimationModel, self, useWorkerProcess=self.poseWorkerProcess)
+        self.poseEstimatorThread.modelLoaded.connect(self.onPoseEstimatorModelLoaded)
+        self.poseEstimatorThread.modelLoadFailed.connect(self.onPoseEstimatorModelLoadFailed)
+        self.poseEstimatorThread.start()
 
-        except HoldModelError as e:
-            self.splashScreen.setError(str(e))
-            timer = QTimer()
-            timer.singleShot(10000, sys.exit)
-            pass
+        try:
+            # Create force receiving thread - uncomment when force sensor is connected
+            # 
+            self.forceReceivingThread = ForceReceivingThread(self.numForceSensors, self)
+            # self.forceReceivingThread.connectedToArduino.connect()
+            self.forceReceivingThread.start()
+        except Exception as e:
+            print("Force sensor not connected, skipping force sensor setup")
 
-        except Error as e:
-            self.splashScreen.setError(str(e))
-            timer = QTimer()
-            timer.singleShot(10000, sys.exit)
-            pass
+    @pyqtSlot(str, str)
+    def onStartupFailed(self, task, message):
+        self.splashScreen.setError(message)
+        timer = QTimer()
+        timer.singleShot(10000, self.exitApp)
 
     def goToHoldFindingScreen(self):
         if self.holdFindingScreen is None:
@@ -104,6 +144,7 @@ class MainWindow(QMainWindow):
             self.holdFindingScreen.setParent(self)
             self.holdFindingScreen.setObjectParent(self)
         self.currentClimber = self.lobbyScreen.getClimberName()
+        self.currentSession = Session.create(self.currentClimber)
         self.holdFindingScreen.connectCameraSenderframeSignal()
         self.lobbyScreen.reset()
         self.lobbyScreen.setParent(None)
@@ -123,23 +164,25 @@ class MainWindow(QMainWindow):
     @pyqtSlot()
     def onHoldFindingModelLoaded(self):
         self.holdFindingModelLoaded = True
-        self.poseEstimatorThread = PoseEstimatorThread(self.poseEstimationModel, self)
-
-        self.poseEstimatorThread.modelLoaded.connect(self.onPoseEstimatorModelLoaded)
-        self.poseEstimatorThread.start()
-
-        try:
-            # Create force receiving thread - uncomment when force sensor is connected
-            # 
-            self.forceReceivingThread = ForceReceivingThread(self.numForceSensors, self)
-            # self.forceReceivingThread.connectedToArduino.connect()
-            self.forceReceivingThread.start()
-        except Exception as e:
-            print("Force sensor not connected, skipping force sensor setup")
+        self.startup.finishTask("hold finding model")
 
     @pyqtSlot()
     def onPoseEstimatorModelLoaded(self):
         self.poseEstimatorModelLoaded = True
+        self.startup.finishTask("pose estimation model")
+
+    @pyqtSlot(str)
+    def onPoseEstimatorModelLoadFailed(self, message):
+        if not self.startup.isFinished("pose estimation model"):
+            self.startup.failTask("pose estimation model", message)
+            return
+        # pose estimation stopped for good after the app had started, e.g. the worker process kept crashing. Nothing can be
+        # recorded any more, so show the error in place of the current screen and exit like a failed startup
+        self.centralWidget().setParent(None)
+        self.setCentralWidget(self.splashScreen)
+        self.splashScreen.setError("Pose estimation stopped: " + message)
+        timer = QTimer()
+        timer.singleShot(10000, self.exitApp)
 
 
     @pyqtSlot()
@@ -152,22 +195,44 @@ class MainWindow(QMainWindow):
         if not self.cameraConnected:
             self.splashScreen.setError("Failed to connect to camera. Please check your camera connection and try again.")
             timer = QTimer()
-            timer.singleShot(10000, sys.exit)
+            timer.singleShot(10000, self.exitApp)
         else:
             if not self.firstFrameReceived:
-                for i in range(self.splashScreen.getProgress(), 95):
-                    self.splashScreen.setProgress(i)
-                    time.sleep(0.015)
                 self.firstFrameReceived = True
-                self.lobbyScreen = LobbyScreen(self)
-                self.splashScreen.setParent(None)
-                self.setCentralWidget(self.lobbyScreen)
+                self.startup.finishTask("camera")
         pass
 
+    @pyqtSlot()
+    def shutdown(self):
+        # stop everything reading the camera's frame ring before it is freed, a ring in shared memory is otherwise left behind
+        poseEstimatorThread = getattr(self, "poseEstimatorThread", None)
+        if poseEstimatorThread is not None:
+            poseEstimatorThread.stop()
+            poseEstimatorThread.wait(3000)
+        cameraSender = getattr(self, "cameraSender", None)
+        if cameraSender is not None:
+            cameraSender.close()
+        elif self.frameSource is not None:
+            # the startup failed after the frame source was opened, before the camera sender took it over
+            self.frameSource.release()
+
+    def exitApp(self):
+        self.shutdown()
+        sys.exit()
+
+    @pyqtSlot()
+    def goToLobbyScreenFirstTime(self):
+        self.lobbyScreen = LobbyScreen(self)
+        self.splashScreen.setParent(None)
+        self.setCentralWidget(self.lobbyScreen)
+
     @pyqtSlot(bool)
     def onClimbFinished(self, climbSuccessful):
         self.climbFinished = True
-        self.resultsScreen = ResultsScreen(self.currentClimber, climbSuccessful, self)
+        # imported here rather than at startup, the analysis modules it needs are already loaded by the pose estimator thread
+        from UI.ResultsScreen import ResultsScreen
+        self.resultsScreen = ResultsScreen(self.currentClimber, climbSuccessful, self, session=self.currentSession,
+                                           liveMetrics=self.poseEstimatorThread.liveMetrics)
         self.resultsScreen.timeoutSignal.connect(self.goToLobbyScreen)
         self.climbingScreen.reset()        
         self.climbingScreen.setParent(None)
@@ -190,10 +255,27 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == '__main__':
-    
-    app = QApplication(sys.argv)
+    argParser = argparse.ArgumentParser(description="Climbing Rocks kiosk app.")
+    argParser.add_argument('-s', '--source', type=str, choices=['camera', 'video', 'synthetic'], default='camera',
+                           help="Where frames come from (default: camera)")
+    argParser.add_argument('-v', '--video', type=str, default=None,
+                           help="Path to the video file to play when the source is 'video'")
+    argParser.add_argument('-c', '--camera', type=int, default=0,
+                           help="Index of the camera to use when the source is 'camera' (default: 0)")
+    argParser.add_argument('--fast', action='store_true',
+                           help="Deliver video and synthetic frames as fast as possible instead of in real time")
+    argParser.add_argument('--pose-process', action='store_true',
+                           help="Run pose estimation in a separate process instead of a thread")
+    argParser.add_argument('-m', '--model', type=str, choices=['lightning', 'thunder'], default=None,
+                           help="MoveNet model to use (default: the fastest model for this machine, chosen at first boot)")
+    # unknown arguments are passed on to Qt
+    args, qtArgs = argParser.parse_known_args()
+    frameSourceArgs = {"sourceType": args.source, "path": args.video, "cameraIndex": args.camera, "realTime": not args.fast}
+
+    app = QApplication(sys.argv[:1] + qtArgs)
     # app.setWindowIcon(app.style().standardIcon(getattr(QStyle, 'SP_DesktopIcon')))
-    mainWindow = MainWindow()
+    mainWindow = MainWindow(frameSourceArgs=frameSourceArgs, poseWorkerProcess=args.pose_process, poseEstimationModel=args.model)
+    app.aboutToQuit.connect(mainWindow.shutdown)
     mainWindow.showFullScreen()
     # mainWindow.show()
     
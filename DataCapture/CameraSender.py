@@ -4,45 +4,58 @@ import logging
 import argparse
 import cv2, sys
 import time
-import threading
 
 from error import CameraNotFoundError
+from DataCapture.FrameRingBuffer import FrameRingBuffer
+from DataCapture.FrameSources import CameraSource
+
+FRAME_RING_SIZE = 8
 
 
 class CameraSender(QThread):
     frameSignal = pyqtSignal()
     cameraConnectSignal = pyqtSignal(bool)
 
-    def __init__(self , parent=None):
+    def __init__(self , parent=None, ringSize=FRAME_RING_SIZE, source=None, sharedFrames=False):
+        """
+        Args:
+            parent: The parent of the thread.
+            ringSize: Number of frames kept in the frame ring. Defaults to FRAME_RING_SIZE.
+            source: The FrameSource to capture frames from, e.g. a video file or a synthetic scene. Defaults to the camera at index 0.
+            sharedFrames: If True, the frame ring is allocated in shared memory so that the pose worker process can read frames. Defaults to False.
+        """
         super().__init__(parent=None)
-        self.frame = None
         # self.publisher = client
         #try:
             #self.cap = cv2.VideoCapture(1)
         #except:
-        self.cap = cv2.VideoCapture(0)
-        self.resolution = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
-        self.cameraConnected = self.cap.isOpened()
-        self.frame = None
-        self.frameSemaphore = threading.Semaphore(1)
+        self.source = source if source is not None else CameraSource(0)
+        self.resolution = self.source.resolution
+        self.cameraConnected = self.source.isOpened()
+        self.sharedFrames = sharedFrames
+        self.running = False
 
         if not self.cameraConnected:
             errMsg = "Failed to connect to camera"
             logging.info(errMsg)
-            self.cap.release()
+            self.source.release()
             self.cameraConnectSignal.emit(self.cameraConnected)
             raise CameraNotFoundError(errMsg)
         else:
             logging.info("Camera connected.")
             self.cameraConnectSignal.emit(self.cameraConnected)
 
+        # Frames are captured straight into a ring of preallocated buffers, consumers read them by sequence number. It is only
+        # allocated once the source has opened, so a ring in shared memory is not left behind when there is no camera
+        self.frameRing = FrameRingBuffer(self.resolution, ringSize, shared=sharedFrames)
+
     def run(self):
         time.sleep(0.3)
 
         if not self.cameraConnected:
             errMsg = "Failed to connect to camera"
             logging.info(errMsg)
-            self.cap.release()
+            self.source.release()
             self.cameraConnectSignal.emit(self.cameraConnected)
             raise CameraNotFoundError(errMsg)
         else:
@@ -51,30 +64,46 @@ class CameraSender(QThread):
 
         
 
-        while True:
-            ret, frame = self.cap.read()
+        self.running = True
+        while self.running:
+            writeBuffer = self.frameRing.getWriteBuffer()
+            ret, frame = self.source.read(writeBuffer)
+            if not ret and self.source.finished:
+                # A video file that does not loop has ended. The ring stays readable, consumers may still be reading the last
+                # frames, it is freed by close() once they have stopped
+                logging.info("Frame source finished.")
+                self.cameraConnected = False
+                self.cameraConnectSignal.emit(self.cameraConnected)
+                break
             if not ret:
                 # Camera disconnected, emit signal
                 self.cameraConnected = False
                 self.cameraConnectSignal.emit(self.cameraConnected)
                 logging.info("Camera disconnected. Attempting to reconnect...")
-                while not self.cameraConnected:
-                    self.cap.release()
-                    time.sleep(0.5)
-                    self.cap.open(0)  # Reconnect the camera
-                    self.cameraConnected = self.cap.isOpened()
+                while not self.cameraConnected and self.running:
+                    self.cameraConnected = self.source.reconnect()  # Reconnect the camera
+                if not self.running:
+                    break
                 logging.info("Camera reconnected.")
-                ret, frame = self.cap.read()
+                ret, frame = self.source.read(writeBuffer)
                 self.cameraConnectSignal.emit(self.cameraConnected)
-
-            # Convert the frame to a JPEG image
-            _, buffer = cv2.imencode('.jpg', frame)
-
-            # Store the latest frame
-            self.frameSemaphore.acquire()
-            # self.frame = buffer.tobytes()
-            self.frame = frame
-            self.frameSemaphore.release()
+                if not ret:
+                    continue
+            captureTime = time.monotonic()
+
+            if frame is not writeBuffer and self.sharedFrames:
+                # Other processes are attached to the ring, so it can't be reallocated. Scale the frame to the ring's resolution instead.
+                cv2.resize(frame, self.resolution, dst=writeBuffer)
+            elif frame is not writeBuffer:
+                # The camera delivered a different resolution than it reported, so the frame could not be captured in place.
+                # Resize the ring once to match the camera, in place, so consumers waiting on it get the next frame.
+                self.resolution = (frame.shape[1], frame.shape[0])
+                logging.info(f"Camera resolution changed to {self.resolution}, reallocating frame buffers")
+                self.frameRing.resize(self.resolution)
+                self.frameRing.getWriteBuffer()[:] = frame
+
+            # Store the latest frame, this also wakes up any consumer thread waiting for a new frame
+            self.frameRing.publish(captureTime)
 
             # Emit the frame captured signal to notify the GUI thread
             self.frameSignal.emit()
@@ -82,13 +111,65 @@ class CameraSender(QThread):
             # Publish the frame to the MQTT topic
             # self.publisher.client.publish(MQTT_FEED, self.frame)
 
-            time.sleep(0.033)
+            # Wait until the source's next frame is due
+            self.source.pace()
 
-        self.cap.release()
+        self.source.release()
         # self.publisher.disconnect()
 
+    def stop(self):
+        """
+        Stops capturing frames, and waits for the thread to finish.
+        """
+        self.running = False
+        self.wait()
+
+    def close(self):
+        """
+        Frees the frame ring. Call once the thread and every consumer of the ring, e.g. the pose estimator, have stopped.
+        """
+        self.stop()
+        self.frameRing.close()
+
     def getFrame(self):
-        self.frameSemaphore.acquire()
-        frame = self.frame
-        self.frameSemaphore.release()
-        return frame
\ No newline at end of file
+        """
+        Returns the newest frame, or None if no frame has been captured yet.
+        The frame is a view into the frame ring and is overwritten after a few frames, copy it before drawing on it or keeping it.
+        """
+        newest = self.frameRing.getNewest()
+        if newest is None:
+            return None
+        return newest[2]
+
+    def getNewestFrame(self):
+        """
+        Returns the newest frame as a (sequence, timestamp, frame) tuple, or None if no frame has been captured yet.
+        """
+        return self.frameRing.getNewest()
+
+    def getFrameAfter(self, sequence):
+        """
+        Returns the newest frame as a (sequence, timestamp, frame) tuple if it is newer than the given sequence number, otherwise None.
+        The difference between the sequence numbers is the number of frames the consumer skipped, plus one.
+        """
+        return self.frameRing.getNewestAfter(sequence)
+
+    def getLastFrames(self, count):
+        """
+        Returns up to count of the most recent frames as (sequence, timestamp, frame) tuples, oldest first.
+        """
+        return self.frameRing.getLast(count)
+
+    def waitForFrame(self, afterSequence, timeout=None):
+        """
+        Blocks the calling thread until a frame newer than afterSequence has been captured, then returns the newest frame.
+        Intermediate frames are not queued, the most recent frame always wins.
+
+        Args:
+            afterSequence: The sequence number of the last frame the consumer has seen.
+            timeout: Maximum time to wait in seconds. Defaults to None (wait forever).
+
+        Returns:
+            tuple: (sequence, timestamp, frame) of the newest frame, or None if the timeout expired.
+        """
+        return self.frameRing.waitForNewestAfter(afterSequence, timeout)
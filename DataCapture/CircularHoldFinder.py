@@ -3,9 +3,7 @@ import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal, pyqtSlot, Qt, QTimer
 from PyQt5.QtGui import QImage, QPixmap
 from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
-# import tensorflow as tf
-from PIL import Image
-from object_detection.utils import label_map_util, visualization_utils as viz_utils
+# PIL and object_detection are only needed by the test window below, and are imported there so the app starts without them
 
 class HoldFindingThread(QThread):
     holdFindingModelLoaded = pyqtSignal()
@@ -97,6 +95,7 @@ class HoldFindingThread(QThread):
         """
         heper function to load an image into a numpy array 
         """
+        from PIL import Image
         return np.array(Image.open(path))
 
     def run(self):
@@ -186,6 +185,7 @@ class MainWindow(QWidget):
             print("Model not loaded yet. Please wait.")
 
     def showImage(self, imagePath, detections, threshold=0.3):
+        from object_detection.utils import label_map_util, visualization_utils as viz_utils
         imageNpWithDetections = cv2.imread(imagePath)
         viz_utils.visualize_boxes_and_labels_on_image_array(
             imageNpWithDetections,
@@ -221,6 +221,7 @@ class MainWindow(QWidget):
         self.loadNextImage()
 
     def loadImageIntoNumpyArray(self, path):
+        from PIL import Image
         return np.array(Image.open(path))
 
 
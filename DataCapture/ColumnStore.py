@@ -0,0 +1,226 @@
+import json
+import os
+import time
+import numpy as np
+
+COLUMNS_SCHEMA_VERSION = 1
+SCHEMA_NAME = "schema.json"
+DATA_NAME = "columns.bin"
+COLUMN_ALIGNMENT = 64 # bytes, so every column starts on a cache line
+COLUMNS_SUFFIX = ".columns"
+
+# timestamps keep their precision, every other float column is stored as float32
+TIME_COLUMNS = ("Timestamp(ms)", "Time")
+
+# legacy CSV files of a session, and the session roles of the CSV and of its columnar copy, see DataCapture/Session.py
+LEGACY_CSV_ROLES = {
+    "output.csv": ("keypoints", "keypointsColumns"),
+    "forceData.csv": ("force", "forceColumns"),
+    "holdCoordinates.csv": ("holdCoordinates", "holdCoordinatesColumns"),
+}
+
+
+class ColumnTable:
+    """
+    Table stored column by column in one binary file, with a schema.json describing the type and position of each column.
+
+    The file is memory-mapped, and each column is a view of its part of the file, so reading a table only touches the columns
+    that are used, and nothing has to be parsed. table["Left Arm Angle"] returns a read-only array of the column.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Directory written by saveColumns.
+        """
+        self.directory = directory
+        with open(os.path.join(directory, SCHEMA_NAME), 'r') as f:
+            self.schema = json.load(f)
+        if self.schema["version"] > COLUMNS_SCHEMA_VERSION:
+            raise ValueError(f"{directory} has schema version {self.schema['version']}, "
+                             f"only versions up to {COLUMNS_SCHEMA_VERSION} can be read")
+        self.columns = [column["name"] for column in self.schema["columns"]]
+        self.layout = {column["name"]: (column["offset"], np.dtype(column["dtype"])) for column in self.schema["columns"]}
+        self.length = self.schema["rows"]
+        self.buffer = None
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, column):
+        return column in self.layout
+
+    def __getitem__(self, column) -> np.ndarray:
+        offset, dtype = self.layout[column]
+        if self.length == 0:
+            # empty files can't be memory-mapped
+            return np.zeros(0, dtype=dtype)
+        if self.buffer is None:
+            self.buffer = np.memmap(os.path.join(self.directory, DATA_NAME), dtype=np.uint8, mode='r')
+        return self.buffer[offset:offset + self.length * dtype.itemsize].view(dtype)
+
+    @property
+    def metadata(self) -> dict:
+        return self.schema["metadata"]
+
+    def toDataFrame(self, columns=None):
+        """
+        Returns the table, or only the given columns, as a pandas DataFrame in the same format pd.read_csv gives for the legacy CSV.
+        The columns are copied, so the DataFrame can be modified. Float columns are widened to float64 like pd.read_csv gives them,
+        the metrics check for Python floats.
+        """
+        import pandas as pd # only needed for analysis, not while recording
+
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame({column: self[column].astype(np.float64 if self.layout[column][1].kind == 'f' else self.layout[column][1])
+                             for column in columns})
+
+
+def saveColumns(data, directory, metadata=None):
+    """
+    Saves a table column by column, in a format that can be memory-mapped with loadColumns.
+
+    Args:
+        data: A structured NumPy array, a pandas DataFrame or a dict of column arrays. Structured arrays keep their dtypes,
+            otherwise float columns are stored as float32 except for the timestamps (see TIME_COLUMNS).
+        directory: Directory to save the table to, created if needed.
+        metadata: JSON serialisable dict stored in the schema. Defaults to None.
+    """
+    if isinstance(data, np.ndarray):
+        columns = {name: data[name] for name in data.dtype.names}
+    else:
+        columns = {name: np.asarray(data[name]) for name in data.keys()}
+        columns = {name: toStorageType(name, values) for name, values in columns.items()}
+
+    os.makedirs(directory, exist_ok=True)
+    schemaPath = os.path.join(directory, SCHEMA_NAME)
+    if os.path.exists(schemaPath):
+        # the old schema would not match the new columns while they are being written
+        os.remove(schemaPath)
+    schemaColumns = []
+    rows = len(next(iter(columns.values()))) if columns else 0
+    offset = 0
+    with open(os.path.join(directory, DATA_NAME), 'wb') as f:
+        for name, values in columns.items():
+            padding = -offset % COLUMN_ALIGNMENT
+            f.write(b"\0" * padding)
+            offset += padding
+            # stored little endian, whatever the byte order of the machine that recorded the climb
+            values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+            f.write(values.tobytes())
+            schemaColumns.append({"name": name, "offset": offset, "dtype": values.dtype.str})
+            offset += values.nbytes
+
+    schema = {"version": COLUMNS_SCHEMA_VERSION,
+              "rows": rows,
+              "created": time.time(),
+              "columns": schemaColumns,
+              "metadata": metadata or {}}
+    # the schema is written last, and atomically, so a table without one was not saved completely
+    with open(schemaPath + ".tmp", 'w') as f:
+        json.dump(schema, f, indent=4)
+    os.replace(schemaPath + ".tmp", schemaPath)
+
+
+def toStorageType(name, values) -> np.ndarray:
+    if values.dtype.kind == 'f' and name not in TIME_COLUMNS:
+        return values.astype(np.float32)
+    if values.dtype.kind == 'f' or values.dtype.kind in 'iub':
+        return values
+    # e.g. a column of empty values that pandas read as objects
+    return values.astype(np.float32)
+
+
+def loadColumns(directory) -> ColumnTable:
+    return ColumnTable(directory)
+
+
+def hasColumns(directory) -> bool:
+    return os.path.exists(os.path.join(directory, SCHEMA_NAME))
+
+
+def getColumnsPath(csvPath) -> str:
+    """
+    Returns the directory the columnar copy of a CSV file is saved to, e.g. data/output.columns for data/output.csv.
+    """
+    return os.path.splitext(csvPath)[0] + COLUMNS_SUFFIX
+
+
+def convertCsv(csvPath, directory=None) -> str:
+    """
+    Converts a CSV file, e.g. a legacy output.csv or forceData.csv, to a column table. Returns the table's directory.
+
+    Args:
+        csvPath: Path of the CSV file.
+        directory: Directory to save the table to. Defaults to the CSV's path with a .columns extension.
+    """
+    import pandas as pd
+
+    directory = getColumnsPath(csvPath) if directory is None else directory
+    saveColumns(pd.read_csv(csvPath), directory, metadata={"source": os.path.basename(csvPath)})
+    return directory
+
+
+def convertSession(session) -> list:
+    """
+    Saves a columnar copy of each CSV file of a session that does not have one yet. Returns the roles that were converted.
+    """
+    converted = []
+    for csvRole, columnsRole in LEGACY_CSV_ROLES.values():
+        if session.hasFile(csvRole) and not hasColumns(session.getPath(columnsRole)):
+            convertCsv(session.getPath(csvRole), session.getPath(columnsRole))
+            session.addFile(columnsRole)
+            converted.append(columnsRole)
+    return converted
+
+
+def readSessionTable(session, role, csvPath=None, columns=None):
+    """
+    Reads one of a session's tables as a DataFrame, from its columnar copy if it has one, otherwise from the CSV.
+
+    Args:
+        session: The session, or None to read csvPath.
+        role: Session role of the CSV, "keypoints", "force" or "holdCoordinates".
+        csvPath: CSV to read if there is no session. Defaults to None.
+        columns: Only read these columns, the ones the table has, in the table's order. From a column table, the other columns
+            are not even read from disk. Defaults to None, every column.
+    """
+    import pandas as pd
+
+    if session is not None:
+        columnsPath = session.getPath(role + "Columns")
+        if hasColumns(columnsPath):
+            table = loadColumns(columnsPath)
+            if columns is not None:
+                columns = [column for column in table.columns if column in columns]
+            return table.toDataFrame(columns)
+        csvPath = session.getPath(role)
+    return pd.read_csv(csvPath, usecols=None if columns is None else lambda column: column in columns)
+
+
+if __name__ == '__main__':
+    import argparse
+    from DataCapture.Session import Session, MANIFEST_NAME, listSessions
+
+    argParser = argparse.ArgumentParser(description="Convert legacy climb CSV files (output.csv, forceData.csv, holdCoordinates.csv) "
+                                                    "to memory-mappable column tables.")
+    argParser.add_argument('paths', type=str, nargs='*', default=["data"],
+                           help="CSV files, session directories, or directories with legacy CSV files (default: data)")
+    argParser.add_argument('-a', '--all-sessions', action='store_true', help="Convert every session in data/sessions")
+    args = argParser.parse_args()
+
+    paths = list(args.paths)
+    if args.all_sessions:
+        paths += [session.directory for session in listSessions()]
+
+    for path in paths:
+        if os.path.isfile(path):
+            print(f"{path} -> {convertCsv(path)}")
+        elif os.path.exists(os.path.join(path, MANIFEST_NAME)):
+            converted = convertSession(Session(path))
+            print(f"{path}: converted {', '.join(converted) if converted else 'nothing'}")
+        else:
+            for csvName in LEGACY_CSV_ROLES:
+                csvPath = os.path.join(path, csvName)
+                if os.path.exists(csvPath):
+                    print(f"{csvPath} -> {convertCsv(csvPath)}")
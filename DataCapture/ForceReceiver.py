@@ -1,18 +1,56 @@
 import serial, time, csv
 import time
+import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal, pyqtSlot, Qt, QTimer
 from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
 
+from DataCapture.SessionWriter import SessionWriter
+from DataCapture.ColumnStore import saveColumns
+
+
+def getForceDtype(numHolds):
+    """
+    Returns the dtype of a row of force data: the time since the start of the climb in ms, and the force on each hold. Forces are
+    float64 like the values parsed from the Arduino, so the recording and forceData.csv keep them exactly.
+    """
+    return np.dtype([("Time", np.float64)] + [(f"hold{i}", np.float64) for i in range(numHolds)])
+
+
+def saveForceRows(rows, path):
+    """
+    Saves force rows in the data/forceData.csv format.
+    """
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(rows.dtype.names)
+        # floats are written with repr, which reads back as the same value
+        writer.writerows(rows.tolist())
+
+
+def exportForce(rows, session):
+    """
+    Saves the rows of a sealed force recording to the session's forceData.csv and column table.
+    """
+    saveForceRows(rows, session.getPath("force"))
+    saveColumns(rows, session.getPath("forceColumns"))
+    session.addFile("force")
+    session.addFile("forceColumns")
+
+
 class ForceReceivingThread(QThread):
     connectedToArduino = pyqtSignal(bool)
 
     def __init__(self, numHolds, parent=None):
         super(ForceReceivingThread, self).__init__(parent)
         self.connected = False
-        self.forceList = [] # List to store all the force values received from the Arduino over time
-        self.numHolds = numHolds # Number of holds on the wall, determines the number of force sensors and the size of the forceList
+        self.numHolds = numHolds # Number of holds on the wall, determines the number of force sensors
+        self.recordedRows = 0 # force readings streamed to the climb's recording
         self.parent = parent
         self.recording = False
+        self.forceWriter = None # streams the force data of a climb to disk while it is recorded
+        self.session = None # session of the climb being recorded, shared with the pose estimator
+        self.liveMetrics = None # live analysis of the climb being recorded, shared with the pose estimator
+        self.forceDtype = getForceDtype(numHolds)
 
         self.connectToArduino()
 
@@ -54,21 +92,38 @@ class ForceReceivingThread(QThread):
         """
         Changes state variables to start recording if climbStarted is true or to discard the recorded values if climbStarted is False
         """
-        self.recording = climbStarted
         if not climbStarted:
-            # Clear the force list if climb has not started
-            self.forceList.clear()
+            self.recording = False
+            # Discard the force data if climb has not started
+            self.recordedRows = 0
+            self.liveMetrics = None
+            if self.forceWriter is not None:
+                self.forceWriter.discard()
+                # wait for the file to be deleted, the next attempt at the climb records to the same path
+                self.forceWriter.waitUntilSealed(timeout=1.0)
+                self.forceWriter = None
+                self.session.removeFile("forceRecording")
             print("Cleared force data")
         else:
-            self.startTime = time.time() * 1000
+            # use the same time base as the pose data: the capture time of the frame the climb began on, on the time.monotonic() clock
+            self.startTime = self.parent.poseEstimatorThread.startTime
+            # record into the same session as the keypoints
+            self.session = self.parent.poseEstimatorThread.session
+            self.forceWriter = SessionWriter(self.session.getPath("forceRecording"), self.forceDtype,
+                                             metadata={"stream": "force", "session": self.session.id})
+            self.session.addFile("forceRecording")
+            self.recordedRows = 0
+            self.liveMetrics = self.parent.poseEstimatorThread.liveMetrics
+            self.recording = True
             print("Started recording force data")
                 
     @pyqtSlot(bool)
     def stopRecording(self, climbSuccessfull):
         """
-        Stops receiving force data from the Arduino. Saves the force list to a file.
+        Stops receiving force data from the Arduino. Seals the climb's force recording.
         """
         self.recording = False
+        self.liveMetrics = None
 
         print("Force data recording ended")
 
@@ -76,26 +131,27 @@ class ForceReceivingThread(QThread):
             # self.ser.close()
             # self.connected = False
             pass  # Placeholder for closing serial connection
-        # Save the force list to a file with timestamps
-        with open("data/forceData.csv", "w") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Time"] + [f"hold{i}" for i in range(0, self.numHolds)])
-            writer.writerows(self.forceList)
-        self.forceList.clear()
+        # Seal the recording, the writer thread then saves the force data to the session's forceData.csv with timestamps
+        if self.forceWriter is not None:
+            session = self.session
+            self.forceWriter.seal({"rows": self.recordedRows, "climbSuccessful": bool(climbSuccessfull)},
+                                  lambda rows: exportForce(rows, session))
+            self.forceWriter = None
 
     
     def recordForce(self):
         """
         Receives force data from the Arduino.
         Starts recording force data when the climb begins and stops when the climb ends. 
-        Clears the force list if the climbBegunSignal is received with a False argument.
-        When the climbFinishedSignal is received, saves the force list to a file and clears the force list.
+        Discards the recording if the climbBegunSignal is received with a False argument.
+        When the climbFinishedSignal is received, seals the recording, which saves the force data to the session.
 
         """
         while True:
             if self.recording and self.connected:
-                # Read force data from Arduino
+                # Read force data from Arduino, and timestamp it as soon as the line has arrived
                 forceData = self.ser.readline().decode('utf-8')
+                receiveTime = time.monotonic() * 1000
                 # Split force data into individual force values for each hold
                 forces = forceData.split(',')
                 try:
@@ -104,8 +160,20 @@ class ForceReceivingThread(QThread):
                     pass
 
                 if len(forces) == self.numHolds:
-                    # Append force values to the force list
-                    self.forceList.append([(time.time() * 1000) - self.startTime] + forces)
+                    # Stream the force values to the climb's recording
+                    row = [receiveTime - self.startTime] + forces
+                    forceWriter = self.forceWriter
+                    liveMetrics = self.liveMetrics
+                    try:
+                        values = tuple(float(value) for value in row)
+                    except ValueError:
+                        print("Could not parse force data: ", forceData)
+                    else:
+                        if forceWriter is not None:
+                            forceWriter.append(values)
+                            self.recordedRows += 1
+                        if liveMetrics is not None:
+                            liveMetrics.addForce(values)
                     # time.sleep(0.1)
             
             time.sleep(0.1) # Sleep for 100ms if not recording or not connected to the Arduino to avoid busy waiting
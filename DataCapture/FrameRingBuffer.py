@@ -0,0 +1,212 @@
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+
+
+class FrameRingBuffer:
+    """
+    Fixed-size ring of preallocated frame buffers shared between the camera thread (single writer) and any number of consumers.
+
+    Every published frame gets a monotonically increasing sequence number and a capture timestamp. The writer fills the slot
+    after the newest frame in place, then publishes it, so capturing a frame does not allocate. Readers get views into the
+    ring without taking a lock, and can compare sequence numbers to find out how many frames they skipped.
+
+    A frame view stays valid until the writer wraps around to its slot again, i.e. for size - 1 frames. Consumers that hold on
+    to a frame for longer should copy it or check isValid(sequence) after using it.
+
+    The ring can live in shared memory, so that another process (e.g. the pose worker process) can attach to it by name and read
+    frames without them being pickled. Waiting with waitForNewestAfter only works in the process that publishes the frames,
+    other processes have to poll latestSequence.
+    """
+
+    def __init__(self, resolution, size=8, channels=3, shared=False, sharedMemoryName=None):
+        """
+        Args:
+            resolution: (width, height) of the frames.
+            size: Number of frame buffers in the ring. Defaults to 8.
+            channels: Number of colour channels per pixel. Defaults to 3 (BGR).
+            shared: If True, the ring is allocated in shared memory that other processes can attach to. Defaults to False.
+            sharedMemoryName: Name of a shared ring created by another process to attach to. Resolution, size and channels must match.
+        """
+        if size < 2:
+            raise ValueError("Frame ring buffer needs at least 2 slots")
+
+        width, height = resolution
+        self.size = size
+        self.resolution = (width, height)
+
+        # shared memory layout: latest sequence number, sequence number of each slot, timestamp of each slot, frames
+        headerBytes = 8 * (1 + 2 * size)
+        frameBytes = size * height * width * channels
+        self.sharedMemory = None
+        self.ownsSharedMemory = False
+        if sharedMemoryName is not None:
+            self.sharedMemory = shared_memory.SharedMemory(name=sharedMemoryName)
+        elif shared:
+            self.sharedMemory = shared_memory.SharedMemory(create=True, size=headerBytes + frameBytes)
+            self.ownsSharedMemory = True
+
+        if self.sharedMemory is not None:
+            buffer = self.sharedMemory.buf
+            self.header = np.ndarray((1,), dtype=np.int64, buffer=buffer, offset=0)
+            self.sequences = np.ndarray((size,), dtype=np.int64, buffer=buffer, offset=8)
+            self.timestamps = np.ndarray((size,), dtype=np.float64, buffer=buffer, offset=8 * (1 + size))
+            self.frames = np.ndarray((size, height, width, channels), dtype=np.uint8, buffer=buffer, offset=headerBytes)
+        else:
+            self.header = np.empty(1, dtype=np.int64)
+            self.sequences = np.empty(size, dtype=np.int64)
+            self.timestamps = np.empty(size, dtype=np.float64)
+            self.frames = np.zeros((size, height, width, channels), dtype=np.uint8)
+
+        if sharedMemoryName is None:
+            self.header[0] = -1 # sequence number of the newest frame
+            self.sequences[:] = -1 # sequence number of the frame in each slot, -1 while the slot is being written
+            self.timestamps[:] = 0 # capture time of the frame in each slot
+        self.frameViews = [self.frames[i] for i in range(size)] # views are created once so reads do not allocate
+        self.newFrameCondition = threading.Condition()
+
+    @property
+    def latestSequence(self) -> int:
+        return int(self.header[0])
+
+    @latestSequence.setter
+    def latestSequence(self, sequence):
+        self.header[0] = sequence
+
+    @property
+    def sharedMemoryName(self):
+        """
+        Name other processes can attach to the ring with, or None if the ring is not in shared memory.
+        """
+        return self.sharedMemory.name if self.sharedMemory is not None else None
+
+    def close(self):
+        """
+        Releases the shared memory of the ring. The process that created the ring also frees it.
+        """
+        if self.sharedMemory is None:
+            return
+        # numpy views have to be released before the shared memory can be closed
+        self.header = self.sequences = self.timestamps = self.frames = None
+        self.frameViews = []
+        self.sharedMemory.close()
+        if self.ownsSharedMemory:
+            self.sharedMemory.unlink()
+        self.sharedMemory = None
+
+    def resize(self, resolution):
+        """
+        Reallocates the frame buffers for a new resolution, e.g. when the camera delivers a different one than it reported.
+        Sequence numbers keep increasing, and consumers waiting for a frame keep waiting on the same ring, so they get the next
+        frame at the new resolution. Frames already in the ring are dropped. Only the camera thread should call this.
+        """
+        if self.sharedMemory is not None:
+            # other processes have mapped the frames at the old resolution
+            raise ValueError("A frame ring in shared memory can't be resized")
+        width, height = resolution
+        channels = self.frames.shape[3]
+        with self.newFrameCondition:
+            self.sequences[:] = -1
+            self.frames = np.zeros((self.size, height, width, channels), dtype=np.uint8)
+            self.frameViews = [self.frames[i] for i in range(self.size)]
+            self.resolution = (width, height)
+
+    def getWriteBuffer(self) -> np.ndarray:
+        """
+        Returns the buffer the next frame should be written into. The slot is marked invalid until publish() is called.
+        Only the camera thread should call this.
+        """
+        index = (self.latestSequence + 1) % self.size
+        self.sequences[index] = -1
+        return self.frameViews[index]
+
+    def publish(self, timestamp) -> int:
+        """
+        Publishes the frame written into the write buffer and wakes up any waiting consumers.
+
+        Args:
+            timestamp: The capture time of the frame.
+
+        Returns:
+            int: The sequence number of the published frame.
+        """
+        sequence = self.latestSequence + 1
+        index = sequence % self.size
+        self.timestamps[index] = timestamp
+        self.sequences[index] = sequence
+        with self.newFrameCondition:
+            self.header[0] = sequence
+            self.newFrameCondition.notify_all()
+        return sequence
+
+    def isValid(self, sequence) -> bool:
+        """
+        Returns True if the frame with the given sequence number has not been overwritten yet.
+        """
+        return sequence >= 0 and self.sequences[sequence % self.size] == sequence
+
+    def getFrame(self, sequence):
+        """
+        Returns the frame with the given sequence number.
+
+        Returns:
+            tuple: (sequence, timestamp, frame), or None if the frame is not in the ring anymore.
+        """
+        if not self.isValid(sequence):
+            return None
+        index = sequence % self.size
+        return sequence, float(self.timestamps[index]), self.frameViews[index]
+
+    def getNewest(self):
+        """
+        Returns the newest frame.
+
+        Returns:
+            tuple: (sequence, timestamp, frame), or None if no frame has been published yet.
+        """
+        return self.getFrame(self.latestSequence)
+
+    def getNewestAfter(self, sequence):
+        """
+        Returns the newest frame if it is newer than the given sequence number.
+
+        Returns:
+            tuple: (sequence, timestamp, frame), or None if there is no newer frame.
+        """
+        if self.latestSequence <= sequence:
+            return None
+        return self.getNewest()
+
+    def getLast(self, count) -> list:
+        """
+        Returns up to count of the most recent frames, oldest first. At most size - 1 frames are returned,
+        since the slot after the newest frame may be being written.
+
+        Returns:
+            list: (sequence, timestamp, frame) tuples.
+        """
+        latestSequence = self.latestSequence
+        count = min(count, self.size - 1, latestSequence + 1)
+        frames = []
+        for sequence in range(latestSequence - count + 1, latestSequence + 1):
+            frame = self.getFrame(sequence)
+            if frame is not None:
+                frames.append(frame)
+        return frames
+
+    def waitForNewestAfter(self, sequence, timeout=None):
+        """
+        Blocks until a frame newer than the given sequence number has been published, then returns the newest frame.
+        Intermediate frames are not queued, the most recent frame always wins.
+
+        Args:
+            sequence: The sequence number of the last frame the consumer has seen.
+            timeout: Maximum time to wait in seconds. Defaults to None (wait forever).
+
+        Returns:
+            tuple: (sequence, timestamp, frame), or None if the timeout expired.
+        """
+        with self.newFrameCondition:
+            if not self.newFrameCondition.wait_for(lambda: self.latestSequence > sequence, timeout):
+                return None
+        return self.getNewest()
@@ -0,0 +1,116 @@
+import math
+
+
+IDLE_POSE_RATE = 5.0 # pose estimations per second while nobody is climbing
+CLIMBING_POSE_RATE = None # pose estimations per second during a climb, None runs as fast as inference allows
+
+
+class FrameSkipController:
+    """
+    Chooses how many camera frames to skip between two pose estimations, so that pose estimation runs at a target rate
+    instead of on a fixed number of frames.
+
+    While nobody is climbing, a low idle rate is enough to notice the climber getting on the wall. Once the climb has begun,
+    the rate is raised to the highest rate inference can sustain, measured from the time invoke() takes.
+    Both the camera's frame interval and the inference time are tracked as exponential moving averages.
+    """
+
+    def __init__(self, idleRate=IDLE_POSE_RATE, climbingRate=CLIMBING_POSE_RATE, smoothing=0.2, maxSkip=30):
+        """
+        Args:
+            idleRate: Target pose estimations per second while nobody is climbing. Defaults to IDLE_POSE_RATE.
+            climbingRate: Target pose estimations per second during a climb. Defaults to CLIMBING_POSE_RATE (as fast as possible).
+            smoothing: Weight of the newest measurement in the moving averages. Defaults to 0.2.
+            maxSkip: Largest frame skip the controller will choose. Defaults to 30.
+        """
+        self.idleRate = idleRate
+        self.climbingRate = climbingRate
+        self.smoothing = smoothing
+        self.maxSkip = maxSkip
+
+        self.climbing = False
+        self.frameInterval = None # seconds between camera frames
+        self.inferenceTime = None # seconds per inference
+        self.lastCaptureTime = None
+        self.lastCaptureSequence = None
+        self.frameSkip = 1
+
+    def setClimbing(self, climbing):
+        """
+        Switches between the idle rate and the climbing rate.
+        """
+        self.climbing = climbing
+        self.update()
+
+    def recordFrame(self, sequence, captureTime):
+        """
+        Measures the camera's frame interval from the sequence numbers and capture times (in seconds) of the frames inference is run on.
+        """
+        if self.lastCaptureSequence is not None and sequence > self.lastCaptureSequence:
+            interval = (captureTime - self.lastCaptureTime) / (sequence - self.lastCaptureSequence)
+            self.frameInterval = self.average(self.frameInterval, interval)
+        self.lastCaptureSequence = sequence
+        self.lastCaptureTime = captureTime
+        self.update()
+
+    def recordInference(self, inferenceTime):
+        """
+        Measures how long inference takes, in seconds.
+        """
+        self.inferenceTime = self.average(self.inferenceTime, inferenceTime)
+        self.update()
+
+    def average(self, average, value):
+        if average is None:
+            return value
+        return average + self.smoothing * (value - average)
+
+    def getTargetRate(self) -> float:
+        """
+        Returns the number of pose estimations per second the controller is aiming for.
+        """
+        if not self.climbing:
+            rate = self.idleRate
+        elif self.climbingRate is not None:
+            rate = self.climbingRate
+        else:
+            rate = math.inf
+        # inference can't run faster than one frame per inference time
+        if self.inferenceTime is not None and self.inferenceTime > 0:
+            rate = min(rate, 1.0 / self.inferenceTime)
+        return rate
+
+    def update(self):
+        if self.frameInterval is None or self.frameInterval <= 0:
+            # no frame rate measured yet, run on every frame until it is
+            self.frameSkip = 1
+            return
+        targetRate = self.getTargetRate()
+        if math.isinf(targetRate):
+            self.frameSkip = 1
+            return
+        skip = math.ceil(1.0 / (targetRate * self.frameInterval) - 1e-6)
+        self.frameSkip = min(max(skip, 1), self.maxSkip)
+
+    def getFrameSkip(self) -> int:
+        """
+        Returns the number of frames between two pose estimations, 1 meaning every frame.
+        """
+        return self.frameSkip
+
+    def getStats(self) -> dict:
+        return {"frameSkip": self.frameSkip,
+                "targetRate": self.getTargetRate(),
+                "frameInterval": self.frameInterval,
+                "inferenceTime": self.inferenceTime}
+
+
+if __name__ == '__main__':
+    # Simulate a 30 fps camera and 45 ms inference
+    controller = FrameSkipController()
+    for sequence in range(0, 60, 2):
+        controller.recordFrame(sequence, sequence / 30)
+        controller.recordInference(0.045)
+    print("Idle: ", controller.getStats())
+    controller.setClimbing(True)
+    print("Climbing: ", controller.getStats())
@@ -0,0 +1,256 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+
+from error import CameraNotFoundError
+
+
+class FrameSource(ABC):
+    """
+    Base class for the sources CameraSender can capture frames from.
+
+    A source reads frames into a buffer provided by the caller, so that CameraSender can capture straight into its frame ring,
+    and paces itself so that frames are delivered at the rate the source would produce them.
+    """
+
+    def __init__(self, frameInterval=0.0):
+        """
+        Args:
+            frameInterval: Time between frames in seconds. 0 delivers frames as fast as they can be read.
+        """
+        self.frameInterval = frameInterval
+        self.resolution = (0, 0)
+        self.finished = False # True once a source that does not loop has run out of frames
+        self.nextFrameTime = None
+
+    @abstractmethod
+    def isOpened(self) -> bool:
+        pass
+
+    @abstractmethod
+    def read(self, buffer):
+        """
+        Reads the next frame into buffer.
+
+        Args:
+            buffer: numpy array of shape (height, width, 3) to read the frame into.
+
+        Returns:
+            tuple: (ret, frame) like cv2.VideoCapture.read. frame is buffer if the frame could be read in place.
+        """
+
+    def reconnect(self) -> bool:
+        """
+        Tries to reopen the source after a failed read. Returns True if the source is open again.
+        """
+        return self.isOpened()
+
+    def release(self):
+        pass
+
+    def pace(self):
+        """
+        Sleeps until the next frame is due. Called by CameraSender after every frame.
+        """
+        if self.frameInterval <= 0:
+            return
+        now = time.monotonic()
+        if self.nextFrameTime is None or now - self.nextFrameTime > self.frameInterval:
+            # first frame, or we have fallen more than a frame behind - don't try to catch up
+            self.nextFrameTime = now
+        self.nextFrameTime += self.frameInterval
+        sleepTime = self.nextFrameTime - now
+        if sleepTime > 0:
+            time.sleep(sleepTime)
+
+
+class CameraSource(FrameSource):
+    """
+    Live camera attached to the kiosk.
+    """
+
+    def __init__(self, cameraIndex=0):
+        super().__init__()
+        self.cameraIndex = cameraIndex
+        self.cap = cv2.VideoCapture(cameraIndex)
+        self.resolution = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self, buffer):
+        return self.cap.read(buffer)
+
+    def reconnect(self) -> bool:
+        self.cap.release()
+        time.sleep(0.5)
+        self.cap.open(self.cameraIndex)
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def pace(self):
+        # the camera blocks in read() until a frame is ready, this only keeps the capture loop from hogging the CPU
+        time.sleep(0.033)
+
+
+class VideoFileSource(FrameSource):
+    """
+    Recorded video file, played back at its recorded frame rate or as fast as frames can be decoded.
+    """
+
+    def __init__(self, path, realTime=True, loop=True):
+        """
+        Args:
+            path: Path to the video file.
+            realTime: If True, frames are delivered at the frame rate of the video. If False, as fast as possible. Defaults to True.
+            loop: If True, playback restarts from the beginning at the end of the file. Defaults to True.
+        """
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        super().__init__(1.0 / fps if realTime and fps > 0 else 0.0)
+        self.resolution = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self, buffer):
+        ret, frame = self.cap.read(buffer)
+        if not ret and self.loop:
+            # end of the file, start again
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(buffer)
+            if not ret:
+                # not even the first frame can be read, e.g. the file is empty or can't be decoded, so it would never play.
+                # Finish rather than have the camera sender rewind and reconnect in a loop
+                self.finished = True
+        elif not ret:
+            self.finished = True
+        return ret, frame
+
+    def reconnect(self) -> bool:
+        if self.finished:
+            return False
+        self.cap.release()
+        # back off like the camera, e.g. while the file is being copied to a network share
+        time.sleep(0.5)
+        self.cap.open(self.path)
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated scene of a wall with round holds and a stick figure climbing it. Needs no camera or video file,
+    and the holds are drawn so that the circular hold finder can detect them.
+    """
+
+    def __init__(self, resolution=(1280, 720), fps=30, numHolds=9, climbDuration=20.0, realTime=True, seed=0):
+        """
+        Args:
+            resolution: (width, height) of the generated frames. Defaults to (1280, 720).
+            fps: Frame rate of the generated scene. Defaults to 30.
+            numHolds: Number of holds on the wall. Defaults to 9.
+            climbDuration: Time in seconds the climber takes to get from the bottom to the top of the wall. Defaults to 20.
+            realTime: If True, frames are delivered at fps. If False, as fast as they can be drawn. Defaults to True.
+            seed: Seed for the hold layout. Defaults to 0.
+        """
+        super().__init__(1.0 / fps if realTime else 0.0)
+        self.resolution = resolution
+        self.fps = fps
+        self.climbDuration = climbDuration
+        self.frameNumber = 0
+
+        width, height = resolution
+        rng = np.random.default_rng(seed)
+
+        # holds are spread from the bottom to the top of the centre half of the wall, like the real wall
+        holdYs = np.linspace(0.9, 0.2, numHolds) * height
+        holdXs = rng.uniform(0.3, 0.7, numHolds) * width
+        self.holds = [(int(x), int(y)) for x, y in zip(holdXs, holdYs)]
+
+        self.background = np.empty((height, width, 3), dtype=np.uint8)
+        self.background[:] = (150, 160, 170)
+        for x, y in self.holds:
+            cv2.circle(self.background, (x, y), 16, (40, 40, 200), -1)
+
+    def isOpened(self) -> bool:
+        return True
+
+    def read(self, buffer):
+        width, height = self.resolution
+        if buffer is None or buffer.shape != (height, width, 3):
+            buffer = np.empty((height, width, 3), dtype=np.uint8)
+
+        np.copyto(buffer, self.background)
+        self.drawClimber(buffer, self.frameNumber / self.fps)
+        self.frameNumber += 1
+        return True, buffer
+
+    def drawClimber(self, frame, t):
+        """
+        Draws the stick figure climber at time t seconds into the climb. The climber stands below the wall, climbs to the top
+        over climbDuration seconds and then starts again.
+        """
+        width, height = self.resolution
+        progress = (t % (self.climbDuration + 4.0)) / self.climbDuration
+        progress = min(max(progress, 0.0), 1.0)
+        scale = height / 5
+
+        hipY = height * (0.95 - 0.7 * progress)
+        hipX = width * 0.5 + 0.1 * scale * np.sin(t * 2.0)
+        shoulderY = hipY - 1.2 * scale
+        reach = 0.4 * scale * np.sin(t * 3.0) # alternate arms and legs as the climber moves
+
+        def point(x, y):
+            return (int(x), int(y))
+
+        colour = (30, 30, 30)
+        head = point(hipX, shoulderY - 0.4 * scale)
+        leftShoulder, rightShoulder = point(hipX - 0.3 * scale, shoulderY), point(hipX + 0.3 * scale, shoulderY)
+        leftHip, rightHip = point(hipX - 0.2 * scale, hipY), point(hipX + 0.2 * scale, hipY)
+        leftWrist = point(hipX - 0.6 * scale, shoulderY - 0.8 * scale - reach)
+        rightWrist = point(hipX + 0.6 * scale, shoulderY - 0.8 * scale + reach)
+        leftAnkle = point(hipX - 0.4 * scale, hipY + 1.1 * scale + reach)
+        rightAnkle = point(hipX + 0.4 * scale, hipY + 1.1 * scale - reach)
+
+        cv2.circle(frame, head, int(0.25 * scale), colour, -1)
+        for start, end in [(leftShoulder, rightShoulder), (leftShoulder, leftHip), (rightShoulder, rightHip), (leftHip, rightHip),
+                           (leftShoulder, leftWrist), (rightShoulder, rightWrist), (leftHip, leftAnkle), (rightHip, rightAnkle)]:
+            cv2.line(frame, start, end, colour, max(2, int(0.08 * scale)))
+
+
+def createFrameSource(sourceType="camera", path=None, cameraIndex=0, realTime=True) -> FrameSource:
+    """
+    Creates a frame source from a source type, e.g. from command line arguments.
+
+    Args:
+        sourceType: "camera", "video" or "synthetic". Defaults to "camera".
+        path: Path to the video file, required for "video".
+        cameraIndex: Index of the camera to open for "camera". Defaults to 0.
+        realTime: If False, "video" and "synthetic" sources deliver frames as fast as possible. Defaults to True.
+
+    Returns:
+        FrameSource: The frame source.
+    """
+    if sourceType == "camera":
+        return CameraSource(cameraIndex)
+    elif sourceType == "video":
+        if path is None:
+            raise ValueError("A video file path is needed for a video frame source")
+        source = VideoFileSource(path, realTime=realTime)
+        if not source.isOpened():
+            raise CameraNotFoundError(f"Failed to open video file {path}")
+        logging.info(f"Playing frames from {path}")
+        return source
+    elif sourceType == "synthetic":
+        return SyntheticSource(realTime=realTime)
+    else:
+        raise ValueError(f"Unknown frame source: {sourceType}")
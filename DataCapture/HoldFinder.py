@@ -3,10 +3,9 @@ import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal, pyqtSlot, Qt, QTimer
 from PyQt5.QtGui import QImage, QPixmap
 from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
-import tensorflow as tf
-from PIL import Image
-from object_detection.utils import label_map_util, visualization_utils as viz_utils
 import csv
+# tensorflow, PIL and object_detection take seconds to import, so they are imported by the methods that use them, on the hold
+# finding thread, rather than before the splash screen is shown
 
 class HoldFindingThread(QThread):
     holdFindingModelLoaded = pyqtSignal()
@@ -21,6 +20,7 @@ class HoldFindingThread(QThread):
         """
         Loads the model from the model path.
         """
+        import tensorflow as tf
         self.detectFn = tf.saved_model.load(self.modelPath)
         print('Hold finding model loaded')
         self.holdFindingModelLoaded.emit()
@@ -30,6 +30,7 @@ class HoldFindingThread(QThread):
         Runs inference on the given frame.
         """
         if self.detectFn is not None:
+            import tensorflow as tf
             print('Running HoldFinder... ', end='')
             imageNp = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             inputTensor = tf.convert_to_tensor(imageNp)
@@ -49,6 +50,7 @@ class HoldFindingThread(QThread):
         """
         heper function to load an image into a numpy array 
         """
+        from PIL import Image
         return np.array(Image.open(path))
 
     def run(self):
@@ -76,6 +78,7 @@ class HoldFindingThread(QThread):
         Returns:
             frame: The frame with the detected holds and volumes drawn on it
         """
+        from object_detection.utils import label_map_util, visualization_utils as viz_utils
         viz_utils.visualize_boxes_and_labels_on_image_array(
             frame,
             detections['detection_boxes'],
@@ -275,6 +278,7 @@ class MainWindow(QWidget):
             print("Model not loaded yet. Please wait.")
 
     def showImage(self, imagePath, detections, threshold=0.3):
+        from object_detection.utils import label_map_util, visualization_utils as viz_utils
         imageNpWithDetections = cv2.imread(imagePath)
         viz_utils.visualize_boxes_and_labels_on_image_array(
             imageNpWithDetections,
@@ -310,6 +314,7 @@ class MainWindow(QWidget):
         self.loadNextImage()
 
     def loadImageIntoNumpyArray(self, path):
+        from PIL import Image
         return np.array(Image.open(path))
 
 
@@ -0,0 +1,171 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import re
+import time
+import numpy as np
+
+from error import ModelError
+
+INTERPRETER_CONFIG_PATH = "data/interpreterConfig.json"
+MODEL_PATTERN = "models/movenet_*_f16.tflite"
+TARGET_LATENCY_MS = 50 # an inference must take at most this long for pose estimation to keep up with the climber
+MODEL_PREFERENCE = ["thunder", "lightning"] # most accurate first
+
+
+def getModelName(modelPath) -> str:
+    """
+    Returns the MoveNet variant of a model file, e.g. "thunder" for models/movenet_thunder_f16.tflite.
+    """
+    match = re.match(r"movenet_(.+)_f16\.tflite", os.path.basename(modelPath))
+    return match.group(1) if match else os.path.basename(modelPath)
+
+
+def getModelPath(modelName) -> str:
+    return MODEL_PATTERN.replace("*", modelName)
+
+
+def createInterpreter(modelPath, numThreads=None, useXnnpack=True):
+    """
+    Creates a TFLite interpreter with the given thread count and delegate setting, and allocates its tensors.
+
+    Args:
+        modelPath: Path to the .tflite model.
+        numThreads: Number of threads the interpreter may use. Defaults to None (TFLite's default).
+        useXnnpack: If False, the XNNPACK delegate TFLite applies by default is disabled. Defaults to True.
+    """
+    from tensorflow.lite.python import interpreter as interpreterWrapper
+
+    kwargs = {"model_path": modelPath, "num_threads": numThreads}
+    if not useXnnpack:
+        kwargs["experimental_op_resolver_type"] = interpreterWrapper.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+    interpreter = interpreterWrapper.Interpreter(**kwargs)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def timeInterpreter(interpreter, warmupRuns=2, timedRuns=5) -> float:
+    """
+    Returns the median time in ms one inference takes on a blank frame.
+    """
+    inputDetails = interpreter.get_input_details()[0]
+    interpreter.set_tensor(int(inputDetails['index']), np.zeros(inputDetails['shape'], dtype=inputDetails['dtype']))
+    for _ in range(warmupRuns):
+        interpreter.invoke()
+    times = []
+    for _ in range(timedRuns):
+        startTime = time.perf_counter()
+        interpreter.invoke()
+        times.append((time.perf_counter() - startTime) * 1000)
+    return float(np.median(times))
+
+
+def getThreadCounts() -> list:
+    cpuCount = os.cpu_count() or 1
+    return sorted({1, 2, 4, cpuCount} & set(range(1, cpuCount + 1)))
+
+
+def probeInterpreterConfigs(modelPaths=None, threadCounts=None, warmupRuns=2, timedRuns=5) -> list:
+    """
+    Times every combination of model, thread count and XNNPACK on/off.
+
+    Args:
+        modelPaths: Models to probe. Defaults to every model matching MODEL_PATTERN.
+        threadCounts: Thread counts to try. Defaults to 1, 2, 4 and the number of CPUs, up to the number of CPUs.
+        warmupRuns: Untimed inferences before timing, the first invocations are slower. Defaults to 2.
+        timedRuns: Timed inferences per configuration. Defaults to 5.
+
+    Returns:
+        list: One dict per configuration that could be loaded, with model, modelPath, numThreads, useXnnpack and latencyMs.
+    """
+    modelPaths = modelPaths if modelPaths is not None else sorted(glob.glob(MODEL_PATTERN))
+    threadCounts = threadCounts if threadCounts is not None else getThreadCounts()
+
+    results = []
+    for modelPath in modelPaths:
+        for useXnnpack in (True, False):
+            for numThreads in threadCounts:
+                try:
+                    interpreter = createInterpreter(modelPath, numThreads, useXnnpack)
+                    latency = timeInterpreter(interpreter, warmupRuns, timedRuns)
+                except Exception as e:
+                    logging.info(f"Could not probe {modelPath} with {numThreads} threads, XNNPACK {useXnnpack}: {e}")
+                    continue
+                results.append({"model": getModelName(modelPath), "modelPath": modelPath, "numThreads": numThreads,
+                                "useXnnpack": useXnnpack, "latencyMs": latency})
+                print(f"{getModelName(modelPath)}: {numThreads} threads, XNNPACK {'on' if useXnnpack else 'off'}: {latency:.1f} ms")
+    return results
+
+
+def chooseInterpreterConfig(results, targetLatency=TARGET_LATENCY_MS) -> dict:
+    """
+    Chooses the most accurate model that meets the target latency, with its fastest configuration.
+    If no configuration meets the target, the fastest configuration overall is chosen.
+    """
+    if not results:
+        raise ModelError("No pose estimation model could be loaded")
+
+    def preference(result):
+        model = result["model"]
+        return MODEL_PREFERENCE.index(model) if model in MODEL_PREFERENCE else len(MODEL_PREFERENCE)
+
+    fastEnough = [result for result in results if result["latencyMs"] <= targetLatency]
+    if fastEnough:
+        return min(fastEnough, key=lambda result: (preference(result), result["latencyMs"]))
+    return min(results, key=lambda result: result["latencyMs"])
+
+
+def getMachineKey(modelPaths) -> dict:
+    """
+    Identifies the hardware and model files a cached choice was made for, so that it is probed again if either changes.
+    """
+    return {"machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpuCount": os.cpu_count(),
+            "models": {getModelName(path): os.path.getsize(path) for path in modelPaths}}
+
+
+def loadInterpreterConfig(configPath=INTERPRETER_CONFIG_PATH, targetLatency=TARGET_LATENCY_MS, refresh=False) -> dict:
+    """
+    Returns the interpreter configuration to use for pose estimation. The choice is cached in configPath, and the models
+    are only probed on the first boot, or when the hardware, the models or the target latency change.
+
+    Args:
+        configPath: Path of the cache file. Defaults to INTERPRETER_CONFIG_PATH.
+        targetLatency: Target inference time in ms. Defaults to TARGET_LATENCY_MS.
+        refresh: If True, the models are probed even if a cached choice exists. Defaults to False.
+
+    Returns:
+        dict: The chosen configuration, with model, modelPath, numThreads, useXnnpack and latencyMs.
+    """
+    modelPaths = sorted(glob.glob(MODEL_PATTERN))
+    machineKey = getMachineKey(modelPaths)
+
+    if not refresh and os.path.exists(configPath):
+        try:
+            with open(configPath, 'r') as f:
+                cached = json.load(f)
+            if cached["machineKey"] == machineKey and cached["targetLatencyMs"] == targetLatency:
+                return cached["config"]
+        except (ValueError, KeyError) as e:
+            logging.info(f"Ignoring invalid interpreter config cache {configPath}: {e}")
+
+    print("Probing pose estimation models, this only happens on the first boot...")
+    config = chooseInterpreterConfig(probeInterpreterConfigs(modelPaths), targetLatency)
+    print(f"Using {config['model']} with {config['numThreads']} threads, XNNPACK {'on' if config['useXnnpack'] else 'off'}")
+    with open(configPath, 'w') as f:
+        json.dump({"machineKey": machineKey, "targetLatencyMs": targetLatency, "config": config}, f, indent=4)
+    return config
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Probe the MoveNet models and cache the fastest interpreter configuration.")
+    argParser.add_argument('-t', '--target', type=float, default=TARGET_LATENCY_MS,
+                           help=f"Target inference time in ms (default: {TARGET_LATENCY_MS})")
+    argParser.add_argument('-r', '--refresh', action='store_true', help="Probe again even if a cached choice exists")
+    args = argParser.parse_args()
+
+    print(loadInterpreterConfig(targetLatency=args.target, refresh=args.refresh))
@@ -0,0 +1,144 @@
+import io
+import os
+import numpy as np
+
+# MoveNet keypoints that are recorded, in the column order of the output CSV
+RECORDED_KEYPOINTS = {
+    'left_shoulder': 5,
+    'right_shoulder': 6,
+    'left_elbow': 7,
+    'right_elbow': 8,
+    'left_wrist': 9,
+    'right_wrist': 10,
+    'left_hip': 11,
+    'right_hip': 12,
+    'left_knee': 13,
+    'right_knee': 14,
+    'left_ankle': 15,
+    'right_ankle': 16
+}
+RECORDING_INDICES = np.array(list(RECORDED_KEYPOINTS.values()))
+
+TIMESTAMP_COLUMN = 'Timestamp(ms)'
+FEATURE_COLUMNS = ['Center of Gravity X', 'Center of Gravity Y', 'Left Arm Angle', 'Right Arm Angle']
+KEYPOINT_COLUMNS = [f'{keypoint}_{axis}' for keypoint in RECORDED_KEYPOINTS for axis in ('X', 'Y')]
+KEYPOINT_DTYPE = np.dtype([(TIMESTAMP_COLUMN, np.int64)] + [(column, np.float32) for column in FEATURE_COLUMNS + KEYPOINT_COLUMNS])
+
+CLIMB_TIMEOUT_S = 120 # climbs are stopped after 2 minutes, see PoseEstimatorThread.recordClimb
+MAX_POSE_RATE = 30 # pose estimations per second, at most the camera's frame rate
+
+
+class KeypointBuffer:
+    """
+    Growable structured array of the keypoints recorded during a climb, one row per pose estimation, with the same columns
+    as data/output.csv. Missing values are NaN.
+
+    Rows are written straight into preallocated storage through a float32 view of the row, so appending a frame does not
+    create Python objects per value. The buffer starts out big enough for a whole climb and doubles if it runs out of rows.
+    """
+
+    def __init__(self, capacity=CLIMB_TIMEOUT_S * MAX_POSE_RATE):
+        """
+        Args:
+            capacity: Number of rows to preallocate. Defaults to enough for a climb at the maximum pose rate until the timeout.
+        """
+        self.length = 0
+        self.allocate(max(1, capacity))
+
+    def allocate(self, capacity):
+        data = np.zeros(capacity, dtype=KEYPOINT_DTYPE)
+        if self.length > 0:
+            data[:self.length] = self.data[:self.length]
+        self.data = data
+        # every column but the timestamp is float32, so each row's values can be written as one float32 array
+        self.values = data.view(np.uint8).reshape(capacity, KEYPOINT_DTYPE.itemsize)[:, 8:].view(np.float32)
+        self.timestamps = data[TIMESTAMP_COLUMN]
+
+    def __len__(self):
+        return self.length
+
+    def append(self, timestamp, centerOfGravity, armAngles, keypoints):
+        """
+        Records a frame.
+
+        Args:
+            timestamp (int): Time since the start of the climb, in ms.
+            centerOfGravity (tuple): (x, y) of the centre of gravity, None if not visible.
+            armAngles (tuple): (left, right) elbow angles, None if not visible.
+            keypoints (numpy.ndarray): (17, 3) array of [y, x, score] rows from MoveNet.
+        """
+        if self.length == len(self.data):
+            self.allocate(2 * len(self.data))
+
+        row = self.values[self.length]
+        row[0] = np.nan if centerOfGravity[0] is None else centerOfGravity[0]
+        row[1] = np.nan if centerOfGravity[1] is None else centerOfGravity[1]
+        row[2] = np.nan if armAngles[0] is None else armAngles[0]
+        row[3] = np.nan if armAngles[1] is None else armAngles[1]
+        # keypoints are stored as x, y pairs, MoveNet gives y, x
+        keypointValues = row[4:].reshape(-1, 2)
+        keypointValues[:, 0] = keypoints[RECORDING_INDICES, 1]
+        keypointValues[:, 1] = keypoints[RECORDING_INDICES, 0]
+        self.timestamps[self.length] = timestamp
+        self.length += 1
+
+    def getData(self) -> np.ndarray:
+        """
+        Returns the recorded rows, as a view of the buffer.
+        """
+        return self.data[:self.length]
+
+    def clear(self):
+        self.length = 0
+
+    def save(self, path):
+        """
+        Saves the recorded rows to a binary .npy file, which can be loaded with KeypointBuffer.load or np.load.
+        """
+        np.save(path, self.getData())
+
+    @staticmethod
+    def load(path) -> np.ndarray:
+        return np.load(path)
+
+    def saveCsv(self, path):
+        """
+        Saves the recorded rows in the data/output.csv format. Missing values are left empty.
+        """
+        with open(path, 'w', newline='') as f:
+            f.write(toCsv(self.getData()))
+
+
+def saveKeypointRows(data, csvPath):
+    """
+    Saves keypoint rows to csvPath in the data/output.csv format, and next to it as a binary .npy file.
+    """
+    np.save(os.path.splitext(csvPath)[0] + ".npy", data)
+    with open(csvPath, 'w', newline='') as f:
+        f.write(toCsv(data))
+
+
+def toCsv(data) -> str:
+    """
+    Formats keypoint rows as CSV text with a header row, in the data/output.csv format. Missing values are left empty.
+    """
+    text = io.StringIO()
+    formats = ['%d'] + ['%.5f', '%.5f', '%.2f', '%.2f'] + ['%.5f'] * len(KEYPOINT_COLUMNS)
+    values = np.column_stack([data[TIMESTAMP_COLUMN].astype(np.float64)] +
+                             [data[column].astype(np.float64) for column in FEATURE_COLUMNS + KEYPOINT_COLUMNS])
+    np.savetxt(text, values, fmt=formats, delimiter=',', header=','.join(KEYPOINT_DTYPE.names), comments='')
+    return text.getvalue().replace('nan', '')
+
+
+if __name__ == '__main__':
+    import time
+
+    rng = np.random.default_rng(0)
+    buffer = KeypointBuffer(capacity=100)
+    keypoints = rng.uniform(0, 1, (17, 3)).astype(np.float32)
+    startTime = time.perf_counter()
+    for i in range(3600):
+        buffer.append(i * 33, (0.5, 0.4), (None, 45.0), keypoints)
+    appendTime = (time.perf_counter() - startTime) / 3600 * 1e6
+    print(f"{len(buffer)} rows, {appendTime:.1f} us per append, {buffer.getData().nbytes / 1024:.0f} KiB")
+    print(toCsv(buffer.getData()[:2]))
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al., 2012) over the 17 MoveNet keypoints, vectorised over all keypoints at once.
+
+    Each coordinate is low-pass filtered with a cutoff frequency that rises with its speed, so a still climber is smoothed a lot
+    and a moving one is followed with little lag. Timestamps are the capture times of the frames, so the filter adapts to
+    whatever rate pose estimation runs at. Scores are passed through unfiltered.
+
+    All filter state lives in preallocated arrays, filtering a frame does not allocate.
+    """
+
+    def __init__(self, numKeypoints=17, minCutoff=1.0, beta=5.0, derivativeCutoff=1.0, scoreThreshold=0.3, maxGap=1.0):
+        """
+        Args:
+            numKeypoints: Number of keypoints per frame. Defaults to 17 (MoveNet).
+            minCutoff: Cutoff frequency in Hz while a keypoint is still. Lower smooths more. Defaults to 1.0.
+            beta: How fast the cutoff rises with speed (in frame heights per second). Higher lags less. Defaults to 5.0.
+            derivativeCutoff: Cutoff frequency in Hz of the speed estimate. Defaults to 1.0.
+            scoreThreshold: Keypoints that were below this score in the previous frame restart from their new position,
+                instead of being smoothed from a position the model was guessing. Defaults to 0.3.
+            maxGap: Gap between frames in seconds after which the filter restarts. Defaults to 1.0.
+        """
+        self.minCutoff = minCutoff
+        self.beta = beta
+        self.derivativeCutoff = derivativeCutoff
+        self.scoreThreshold = scoreThreshold
+        self.maxGap = maxGap
+
+        self.position = np.zeros((numKeypoints, 2)) # filtered (y, x) of each keypoint
+        self.speed = np.zeros((numKeypoints, 2)) # filtered speed of each coordinate
+        self.previousScores = np.zeros(numKeypoints)
+        self.previousTime = None
+
+        # scratch arrays, so filtering does not allocate
+        self.rawSpeed = np.zeros((numKeypoints, 2))
+        self.alpha = np.zeros((numKeypoints, 2))
+        self.restart = np.zeros(numKeypoints, dtype=bool)
+
+    def reset(self):
+        self.previousTime = None
+
+    def smoothingFactor(self, dt, cutoff, out=None):
+        # alpha = r / (r + 1), with r = 2 pi cutoff dt
+        r = np.multiply(cutoff, 2 * np.pi * dt, out=out)
+        return np.divide(r, r + 1, out=r) if out is not None else r / (r + 1)
+
+    def filter(self, keypoints, timestamp) -> np.ndarray:
+        """
+        Filters the coordinates of a frame of keypoints in place.
+
+        Args:
+            keypoints (numpy.ndarray): (17, 3) array of [y, x, score] rows from MoveNet.
+            timestamp (float): Capture time of the frame, in seconds.
+
+        Returns:
+            numpy.ndarray: keypoints, with the filtered coordinates.
+        """
+        coordinates = keypoints[:, :2]
+
+        if self.previousTime is None or not 0 < timestamp - self.previousTime <= self.maxGap:
+            # first frame, or the stream was paused - start again from this frame
+            self.position[:] = coordinates
+            self.speed[:] = 0
+            self.previousScores[:] = keypoints[:, 2]
+            self.previousTime = timestamp
+            return keypoints
+        dt = timestamp - self.previousTime
+        self.previousTime = timestamp
+
+        # speed of each coordinate, smoothed with a fixed cutoff
+        np.subtract(coordinates, self.position, out=self.rawSpeed)
+        self.rawSpeed /= dt
+        self.rawSpeed -= self.speed
+        self.rawSpeed *= self.smoothingFactor(dt, self.derivativeCutoff)
+        self.speed += self.rawSpeed
+
+        # the cutoff rises with the speed, so fast movements are followed with little lag
+        np.abs(self.speed, out=self.alpha)
+        self.alpha *= self.beta
+        self.alpha += self.minCutoff
+        self.smoothingFactor(dt, self.alpha, out=self.alpha)
+
+        np.subtract(coordinates, self.position, out=self.rawSpeed)
+        self.rawSpeed *= self.alpha
+        self.position += self.rawSpeed
+
+        # keypoints that were not visible in the previous frame jump straight to their new position
+        np.less(self.previousScores, self.scoreThreshold, out=self.restart)
+        np.copyto(self.position, coordinates, where=self.restart[:, np.newaxis])
+        np.copyto(self.speed, 0, where=self.restart[:, np.newaxis])
+        self.previousScores[:] = keypoints[:, 2]
+
+        coordinates[:] = self.position
+        return keypoints
+
+
+if __name__ == '__main__':
+    # A still keypoint with noise, then moving up the frame
+    rng = np.random.default_rng(0)
+    keypointFilter = OneEuroFilter()
+    rawError, filteredError = [], []
+    for i in range(120):
+        t = i / 15
+        truth = 0.8 - max(0, t - 4) * 0.1
+        keypoints = np.zeros((17, 3), dtype=np.float32)
+        keypoints[:, 0] = truth + rng.normal(0, 0.01, 17)
+        keypoints[:, 1] = 0.5 + rng.normal(0, 0.01, 17)
+        keypoints[:, 2] = 0.9
+        rawError.append(np.abs(keypoints[:, 0] - truth).mean())
+        keypointFilter.filter(keypoints, t)
+        filteredError.append(np.abs(keypoints[:, 0] - truth).mean())
+    print(f"Mean error: raw {np.mean(rawError):.4f}, filtered {np.mean(filteredError):.4f}")
@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+
+from DataCapture.InterpreterTuner import createInterpreter
+
+
+class MoveNetModel:
+    """
+    MoveNet single-pose TFLite model. Used by the PoseEstimatorThread, either in the app process or in the pose worker process.
+    Has no Qt dependencies so that it can be loaded in a separate process.
+    """
+
+    def __init__(self, modelPath, numThreads=None, useXnnpack=True):
+        """
+        Args:
+            modelPath: Path to the MoveNet .tflite model, e.g. "models/movenet_thunder_f16.tflite".
+            numThreads: Number of threads the interpreter may use. Defaults to None (TFLite's default).
+            useXnnpack: If False, the XNNPACK delegate is disabled. Defaults to True.
+        """
+        self.modelPath = modelPath
+        self.numThreads = numThreads
+        self.useXnnpack = useXnnpack
+        self.interpreter = None
+        self.inputDetails = None
+        self.outputDetails = None
+        self.inputTensor = None # function returning a view of the interpreter's input tensor
+        self.inputSize = None # (width, height) of the model input
+        self.pendingInputFrame = None # preprocessed frame for models whose input tensor can't be written in place
+
+    def load(self):
+        """
+        Loads the model and allocates its tensors.
+        """
+        self.interpreter = createInterpreter(self.modelPath, self.numThreads, self.useXnnpack)
+        self.inputDetails = self.interpreter.get_input_details()
+        self.outputDetails = self.interpreter.get_output_details()
+
+        _, height, width, _ = self.inputDetails[0]['shape']
+        self.inputSize = (int(width), int(height))
+        if self.inputDetails[0]['dtype'] == np.uint8:
+            # frames can be written straight into the input tensor, see setInputFrame
+            self.inputTensor = self.interpreter.tensor(int(self.inputDetails[0]['index']))
+
+    def preprocessFrame(self, frame) -> np.ndarray:
+        """
+        Converts a BGR camera frame to the model's input format.
+
+        Args:
+            frame (numpy.ndarray): The BGR frame.
+
+        Returns:
+            numpy.ndarray: The RGB frame resized to the model's input size, with a batch dimension.
+        """
+        inputFrame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        inputFrame = cv2.resize(inputFrame, self.inputDetails[0]['shape'][1:3])
+        inputFrame = np.expand_dims(inputFrame, axis=0)
+        inputFrame = inputFrame.astype(np.uint8)
+        return inputFrame
+
+    def setInputFrame(self, frame):
+        """
+        Converts a BGR camera frame to the model's input format, writing it straight into the interpreter's input tensor,
+        so that no buffers are allocated per frame. Call runInference() without a frame afterwards.
+
+        Args:
+            frame (numpy.ndarray): The BGR frame.
+        """
+        if self.inputTensor is None:
+            # the model does not take uint8 input, so it can't be written in place
+            self.pendingInputFrame = self.preprocessFrame(frame)
+            return
+        # the view must not outlive this call, the interpreter refuses to invoke while references to its buffers exist
+        inputView = self.inputTensor()[0]
+        writeResizedRGB(frame, inputView)
+        del inputView
+        self.pendingInputFrame = None
+
+    def runInference(self, inputFrame=None) -> np.ndarray:
+        """
+        Runs the model on a preprocessed frame.
+
+        Args:
+            inputFrame (numpy.ndarray): The output of preprocessFrame. Defaults to None, to run on the frame given to setInputFrame.
+
+        Returns:
+            numpy.ndarray: The 17 keypoints detected by the model, as [y, x, score] rows.
+        """
+        if inputFrame is None:
+            inputFrame = self.pendingInputFrame
+        if inputFrame is not None:
+            self.interpreter.set_tensor(int(self.inputDetails[0]['index']), inputFrame)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(int(self.outputDetails[0]['index']))[0][0]
+
+
+def writeResizedRGB(frame, dst) -> np.ndarray:
+    """
+    Resizes a BGR frame to the size of dst and converts it to RGB, in place in dst. Resizing first means the colour conversion
+    only runs on the small image.
+
+    Args:
+        frame (numpy.ndarray): The BGR frame.
+        dst (numpy.ndarray): uint8 buffer of shape (height, width, 3), e.g. a view of the model's input tensor.
+
+    Returns:
+        numpy.ndarray: dst.
+    """
+    cv2.resize(frame, (dst.shape[1], dst.shape[0]), dst=dst)
+    cv2.cvtColor(dst, cv2.COLOR_BGR2RGB, dst=dst)
+    return dst
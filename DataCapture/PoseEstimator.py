@@ -1,16 +1,42 @@
 import cv2, sys, os, logging, ast, csv
 import numpy as np
-from tensorflow.lite.python import interpreter as interpreterWrapper
 from PyQt5.QtCore import QThread, pyqtSignal, Qt, pyqtSlot, QRect, QTimer
 from PyQt5.QtGui import QImage, QPixmap
 from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget, QStackedLayout
 import math
 import time
+import threading
+
+from DataCapture.MoveNet import MoveNetModel
+from DataCapture.PoseWorker import PoseWorkerProcess
+from DataCapture.FrameSkipController import FrameSkipController
+from DataCapture.InterpreterTuner import loadInterpreterConfig, getModelPath
+from DataCapture.KeypointFilter import OneEuroFilter
+from DataCapture.PoseFeatures import calculatePoseFeatures, getPoseTuples
+from DataCapture.KeypointBuffer import KeypointBuffer, KEYPOINT_DTYPE, saveKeypointRows
+from DataCapture.SessionWriter import SessionWriter
+from DataCapture.Session import Session, RECORDING, RECORDED
+from DataCapture.ColumnStore import saveColumns
+
+MAX_WORKER_RESTARTS = 3 # times a pose worker that dies after loading the model is restarted before pose estimation gives up
+
+def exportKeypoints(rows, session, climbSuccessful):
+    """
+    Saves the rows of a sealed keypoint recording to the session's output.csv, output.npy and column table, and marks the
+    session as recorded.
+    """
+    if len(rows) > 0:
+        saveKeypointRows(rows, session.getPath("keypoints"))
+        saveColumns(rows, session.getPath("keypointsColumns"))
+        session.addFile("keypoints")
+        session.addFile("keypointsBinary")
+        session.addFile("keypointsColumns")
+    session.update(status=RECORDED, climbSuccessful=climbSuccessful)
 
-FRAME_SKIP = 4
 
 class PoseEstimatorThread(QThread):
     modelLoaded = pyqtSignal()
+    modelLoadFailed = pyqtSignal(str) # error message
     inferenceSignal = pyqtSignal(np.ndarray, tuple, tuple)
     climbBegunSignal = pyqtSignal(bool)
     climbInProgressSignal = pyqtSignal(bool)
@@ -30,14 +56,33 @@ class PoseEstimatorThread(QThread):
     'right_ankle': 16
     }   
 
-    def __init__(self, model = "lightning", parent = None):
+    def __init__(self, model = "lightning", parent = None, useWorkerProcess = False):
+        """
+        Args:
+            model: The MoveNet model to use, "lightning" or "thunder". Defaults to "lightning". If None, the model and interpreter
+                settings are chosen by probing the hardware when the thread starts, see DataCapture/InterpreterTuner.py.
+            parent: The main window. Must have a cameraSender.
+            useWorkerProcess: If True, the model runs in a separate process that reads frames from the camera's shared memory frame ring,
+                so that inference does not compete with the UI for the GIL. The camera sender must have been created with sharedFrames=True.
+        """
         super(PoseEstimatorThread, self).__init__(parent)
-        self.modelPath = f"models/movenet_{model}_f16.tflite"
-        self.holdCoordinatePath = "data/holdCoordinates.csv"
+        self.holdCoordinatePath = "data/holdCoordinates.csv" # used if the hold coordinates were not saved to the session
+        self.useWorkerProcess = useWorkerProcess
+        self.modelPath = None
+        self.model = None
+        if model is not None:
+            self.modelPath = getModelPath(model)
+            self.model = MoveNetModel(self.modelPath)
+        self.poseWorker = None
+        self.workerRestarts = 0
         self.interpreter = None
+        self.keypointsCaptureTime = None
         self.inputDetails = None
         self.outputDetails = None
-        self.keypointsData = []
+        self.keypointsData = KeypointBuffer() # preallocated for a whole climb
+        self.keypointWriter = None # streams the recorded keypoints to disk during the climb
+        self.session = None # the climb's session directory, see DataCapture/Session.py
+        self.liveMetrics = None # analyses the climb while it is recorded, see AnalyseClimb/LiveMetrics.py
         self.parent = parent
         self.climbInProgress = False # True if the climber has been in a valid position for at least 1 second
         self.climbBegun = False #True if the climber is in a valid position, but has not been in a valid position for at least 1 second
@@ -48,7 +93,6 @@ class PoseEstimatorThread(QThread):
         # Instantiate CameraSender
         self.cameraSender = parent.cameraSender
         self.cameraSender.cameraConnectSignal.connect(self.oncameraConnectSignal)
-        self.cameraSender.frameSignal.connect(self.onFrameSignal)
         try:
             self.parent.holdFindingScreen.holdsFoundSignal.connect(self.getHoldsCoordinates)
         except:
@@ -60,40 +104,242 @@ class PoseEstimatorThread(QThread):
 
         self.frameCounter = 0
 
+        # Inference loop state. The loop runs in this thread, and the climb state is shared with slots running in the GUI thread
+        self.running = False
+        self.stateLock = threading.Lock()
+        self.lastFrameSequence = -1 # sequence number of the last frame that inference was run on
+        self.inferenceCount = 0 # number of frames inference was run on
+        self.droppedFrames = 0 # number of frames skipped because inference could not keep up
+        self.validateClimbTime = None # time at which validateClimb should be called after the climb has begun
+        # frames to skip between inferences, chosen from the measured inference time and whether a climb is in progress
+        self.frameSkipController = FrameSkipController()
+        self.inferenceTime = None # seconds the last invoke() took
+        # smooths out keypoint jitter, so that single noisy frames don't start or finish a climb
+        self.keypointFilter = OneEuroFilter()
+
     def run(self):
-        # Load MoveNet model
-        self.loadModel()
+        self.running = True
+        try:
+            if self.model is None:
+                # pick the model and interpreter settings for this hardware, probing them on the first boot
+                self.configureModel()
+            if not self.useWorkerProcess:
+                # Load MoveNet model
+                self.loadModel()
+        except Exception as e:
+            # otherwise the thread ends without modelLoaded, and the app waits for it on the splash screen forever
+            print("Could not load the pose estimation model: ", e)
+            self.modelLoadFailed.emit(str(e))
+            return
+
+        if self.useWorkerProcess:
+            # Load MoveNet in the worker process, and handle its results until the thread is stopped
+            self.importClimbAnalysis()
+            self.workerProcessLoop()
+            return
+
+        self.importClimbAnalysis()
+
+        # Run inference on the latest frame until the thread is stopped
+        self.inferenceLoop()
+
+    def importClimbAnalysis(self):
+        # the live analysis pulls in pandas and the metric modules, which are imported on this thread once the model is loading,
+        # rather than before the splash screen is shown or when the first climb starts
+        from AnalyseClimb import LiveMetrics
+
+    def configureModel(self):
+        """
+        Creates the model with the cached interpreter configuration, probing the available models if there is none.
+        """
+        config = loadInterpreterConfig()
+        self.modelPath = config["modelPath"]
+        self.model = MoveNetModel(self.modelPath, config["numThreads"], config["useXnnpack"])
+
+    def stop(self):
+        """
+        Stops the inference loop. The loop exits after the current inference finishes.
+        """
+        self.running = False
 
-    def runInference(self, frame) -> list:
+    def inferenceLoop(self):
+        """
+        Pulls the latest frame from the camera sender and runs inference on it, so that the GUI thread never waits on the model.
+        Frames that arrive while inference is running are dropped - only the most recent frame is used.
+        Results are sent to the UI with the inferenceSignal.
+        """
+        while self.running:
+            # wait until frameSkip new frames have been captured since the last inference
+            frameSkip = self.frameSkipController.getFrameSkip()
+            newestFrame = self.cameraSender.waitForFrame(self.lastFrameSequence + frameSkip - 1, timeout=0.5)
+            if newestFrame is None:
+                continue
+            frameSequence, captureTime, frame = newestFrame
+
+            # if hold coordinates have not been loaded, do not record the climb
+            if not self.holdCoordinatesLoaded:
+                self.lastFrameSequence = frameSequence
+                continue
+
+            self.countInference(frameSequence, captureTime, frameSkip)
+
+            # the frame is written straight into the model's input tensor
+            self.model.setInputFrame(frame)
+            self.runInference(None, captureTime)
+            self.frameSkipController.recordInference(self.inferenceTime)
+            self.processKeypoints()
+
+    def workerProcessLoop(self):
+        """
+        Starts MoveNet in the pose worker process and handles the keypoints it sends back. The worker reads frames straight from the
+        camera's shared memory frame ring, so this thread only runs the climb state machine.
+        """
+        if not self.startPoseWorker():
+            return
+
+        while self.running:
+            # only run inference while a climb can be recorded
+            self.poseWorker.setActive(self.holdCoordinatesLoaded)
+
+            message = self.poseWorker.receive(timeout=0.5)
+            if message is None:
+                continue
+
+            if message[0] == "loaded":
+                self.modelLoaded.emit()
+                self.poseEstimatorModelLoaded = True
+            elif message[0] == "error":
+                print("Pose worker process failed: ", message[1])
+                if self.poseEstimatorModelLoaded and self.workerRestarts < MAX_WORKER_RESTARTS:
+                    # the worker died after the model had loaded, e.g. the interpreter crashed, so a fresh one will most likely
+                    # work. Frames captured meanwhile are skipped, the climb state machine carries on with the next keypoints
+                    self.workerRestarts += 1
+                    print(f"Restarting the pose worker process ({self.workerRestarts}/{MAX_WORKER_RESTARTS})")
+                    self.poseWorker.stop()
+                    if not self.startPoseWorker():
+                        return
+                    continue
+                # the worker could not load the model, or keeps dying. It is stopped below, its view of the frame ring is closed
+                # when it exits, and the camera's ring is freed by the exit path the failure leads to
+                self.modelLoadFailed.emit(message[1])
+                break
+            elif message[0] == "keypoints":
+                _, frameSequence, captureTime, keypoints, inferenceTime = message
+                if not self.holdCoordinatesLoaded:
+                    continue
+                self.countInference(frameSequence, captureTime, self.poseWorker.minSequenceGap.value)
+                self.keypoints = keypoints
+                self.keypointsCaptureTime = captureTime * 1000
+                self.inferenceTime = inferenceTime
+                self.frameSkipController.recordInference(inferenceTime)
+                self.processKeypoints()
+                self.poseWorker.setMinSequenceGap(self.frameSkipController.getFrameSkip())
+
+        self.poseWorker.stop()
+        self.poseWorker = None
+
+    def startPoseWorker(self) -> bool:
+        """
+        Starts a pose worker process on the camera's frame ring. Emits modelLoadFailed if it could not be started.
+
+        Returns:
+            bool: True if the worker was started.
+        """
+        try:
+            self.poseWorker = PoseWorkerProcess(self.modelPath, self.cameraSender.frameRing,
+                                                minSequenceGap=self.frameSkipController.getFrameSkip(),
+                                                numThreads=self.model.numThreads, useXnnpack=self.model.useXnnpack)
+            self.poseWorker.start()
+        except Exception as e:
+            print("Could not start the pose worker process: ", e)
+            self.poseWorker = None
+            self.modelLoadFailed.emit(str(e))
+            return False
+        return True
+
+    def countInference(self, frameSequence, captureTime, frameSkip):
+        """
+        Counts an inference on the frame with the given sequence number, and the frames dropped since the last inference.
+
+        Args:
+            frameSequence: Sequence number of the frame inference is run on.
+            captureTime: Capture time of the frame, in seconds.
+            frameSkip: The frame skip that was asked for, frames skipped beyond it were dropped.
+        """
+        if self.inferenceCount > 0:
+            self.droppedFrames += max(0, frameSequence - self.lastFrameSequence - frameSkip)
+        self.lastFrameSequence = frameSequence
+        self.inferenceCount += 1
+        self.frameSkipController.recordFrame(frameSequence, captureTime)
+
+    def processKeypoints(self):
+        """
+        Sends the latest keypoints to the UI and updates the climb state with them.
+        """
+        with self.stateLock:
+            if not self.holdCoordinatesLoaded:
+                return
+            self.keypointFilter.filter(self.keypoints, self.keypointsCaptureTime / 1000)
+            self.centerOfGravity, self.armAngles = self.calculatePoseFeatures()
+            self.inferenceSignal.emit(self.keypoints, self.centerOfGravity, self.armAngles)
+            self.recordClimb()
+            # run pose estimation as fast as possible while someone is climbing
+            self.frameSkipController.setClimbing(self.climbBegun or self.climbInProgress)
+
+            # check if the climber is still in a valid position a while after the climb has begun
+            if self.validateClimbTime is not None and self.keypointsCaptureTime >= self.validateClimbTime:
+                self.validateClimbTime = None
+                if self.climbBegun:
+                    self.validateClimb()
+
+    def getFrameStats(self) -> dict:
+        """
+        Returns the number of frames inference was run on and the number of frames dropped because inference could not keep up.
+        """
+        stats = {"inferences": self.inferenceCount, "dropped": self.droppedFrames}
+        stats.update(self.frameSkipController.getStats())
+        return stats
+
+    def runInference(self, frame, captureTime=None) -> list:
         """
         Runs inference on the given frame.
 
         Args:
-        frame (numpy.ndarray): The frame to run inference on.
+        frame (numpy.ndarray): The preprocessed frame to run inference on, or None to use the frame given to model.setInputFrame.
+        captureTime (float): The time.monotonic() time at which the camera captured the frame, in seconds. Defaults to now.
 
         Returns:
         list: The keypoints detected by the model.
         """
-        self.interpreter.set_tensor(int(self.inputDetails[0]['index']), frame)
-        self.interpreter.invoke()
-        self.keypoints = self.interpreter.get_tensor(int(self.outputDetails[0]['index']))[0][0]
+        startTime = time.perf_counter()
+        self.keypoints = self.model.runInference(frame)
+        self.inferenceTime = time.perf_counter() - startTime
+        # keypoints are timestamped with the capture time of the frame (in ms), not the time inference finished
+        self.keypointsCaptureTime = (captureTime if captureTime is not None else time.monotonic()) * 1000
 
         return
     
     @pyqtSlot()
     def getHoldsCoordinates(self):
         """
-        gets the coordinates of the holds from the csv file
+        gets the coordinates of the holds from the csv file of the climber's session
         """
-        with open(self.holdCoordinatePath, 'r') as f:
+        # the main window starts a session when the climber enters their name in the lobby
+        self.session = getattr(self.parent, "currentSession", None)
+        holdCoordinatePath = self.holdCoordinatePath
+        if self.session is not None and self.session.hasFile("holdCoordinates"):
+            holdCoordinatePath = self.session.getPath("holdCoordinates")
+        with open(holdCoordinatePath, 'r') as f:
             holdCoordinatesList = f.read().splitlines()
             holdCoordinates = [ast.literal_eval(item) for item in holdCoordinatesList[1:]]
             print("Hold coordinates from PoseEstimationThread: ", holdCoordinates)
-        self.holdCoordinatesLoaded = True
 
-        # since hold coordinates are sorted by distance from the top of the frame, the lowest hold is the last one in the list
-        self.lowestHoldY = holdCoordinates[0][4]    
-        self.highestHoldY = holdCoordinates[-1][4]
+        with self.stateLock:
+            # since hold coordinates are sorted by distance from the top of the frame, the lowest hold is the last one in the list
+            self.lowestHoldY = holdCoordinates[0][4]    
+            self.highestHoldY = holdCoordinates[-1][4]
+            self.holdCoordinates = holdCoordinates
+            self.holdCoordinatesLoaded = True
 
         print("Lowest hold: ", self.lowestHoldY)
         print("Highest hold: ", self.highestHoldY)
@@ -120,19 +366,16 @@ class PoseEstimatorThread(QThread):
         # save keypoints if the climb has begun or is in progress, regardless of whether all limbs are visible
         if self.climbBegun or self.climbInProgress:
 
-            timestamp = int((time.time() * 1000) - self.startTime)
+            timestamp = int(self.keypointsCaptureTime - self.startTime)
 
             # save data if even one limb is visible
             if any([None not in self.leftHand, None not in self.rightHand, None not in self.leftFoot, None not in self.rightFoot]):
-                centerOfGravity = self.calculateCenterOfGravity()
-                leftArmAngle, rightArmAngle = self.calculateArmAngles()
-
-
-                frameRow = [timestamp, centerOfGravity[0], centerOfGravity[1], leftArmAngle, rightArmAngle]
-                for usefulKeypoint in PoseEstimatorThread.usefulKeypointDict.values():
-                    frameRow.extend([round(self.keypoints[usefulKeypoint][1], 5), 
-                                    round(self.keypoints[usefulKeypoint][0], 5)])
-                self.keypointsData.append(frameRow)
+                self.keypointsData.append(timestamp, self.centerOfGravity, self.armAngles, self.keypoints)
+                if self.keypointWriter is not None:
+                    self.keypointWriter.append(self.keypointsData.getData()[-1])
+                    # only the frames that are recorded, so the live scores are those of the saved climb
+                    if self.liveMetrics is not None:
+                        self.liveMetrics.addKeypoints(self.keypointsData.getData()[-1])
 
             if timestamp>120000:
                 self.completeClimbDueToTimeout()
@@ -146,10 +389,12 @@ class PoseEstimatorThread(QThread):
             if not self.climbBegun and not self.climbInProgress: # Climber was not in a valid position before, and is in a valid position now
                 # Start a timer to check if the climber is still in a valid position after 1 second
                 self.climbBegun = True
+                self.startTime = self.keypointsCaptureTime # capture time of the first frame of the climb, in milliseconds on the time.monotonic() clock
+                # validateClimb is called from the inference loop once this time has passed, as there is no event loop in this thread for a QTimer
+                self.validateClimbTime = self.startTime + 1500
+                # start the recording before the force receiver hears about the climb, it records into the same session
+                self.startKeypointRecording()
                 self.climbBegunSignal.emit(self.climbBegun)
-                self.startTime = time.time() * 1000 # in milliseconds
-                timer = QTimer()
-                timer.singleShot(1500, lambda: self.validateClimb())
                 print ("Climb begun.")
 
             # # Store keypoints and timestamp - moved to below to separate the recording of keypoints from the adjustment of climb status
@@ -218,7 +463,8 @@ class PoseEstimatorThread(QThread):
             self.climbBegunSignal.emit(self.climbBegun)
             # may not be necessary to emit this signal 
             # self.climbInProgressSignal.emit(False)
-            self.keypointsData = []
+            self.keypointsData.clear()
+            self.discardKeypointRecording()
             print("Climb reset.")
 
         # print positions of 4 limbs and lowest hold for debugging
@@ -279,167 +525,126 @@ class PoseEstimatorThread(QThread):
         self.climbFinishedSignal.emit(False)  # Mark the climb as unsuccessful
         print("Climb completed due to timeout, but not successful.")
     
-    def saveKeypointsData(self, filename="output.csv"):
-        """
-        Save keypoints data to a CSV file.
-        """
-        if self.keypointsData:
-            filename = f"data/{filename}"
-            csvHeader = ['Timestamp(ms)', 'Center of Gravity X', 'Center of Gravity Y', 'Left Arm Angle', 'Right Arm Angle']
-            for keypoint in PoseEstimatorThread.usefulKeypointDict.keys():
-                csvHeader.extend([f'{keypoint}_X', f'{keypoint}_Y'])
-            with open(filename, 'w', newline='') as csvfile:
-                csvwriter = csv.writer(csvfile)
-                csvwriter.writerow(csvHeader)
-                csvwriter.writerows(self.keypointsData)
-            print(f"Keypoints data saved to {filename}")
-            self.keypointsData = []
+    def startKeypointRecording(self):
+        """
+        Starts streaming the keypoints of a new climb to a recording in the climb's session directory.
+        """
+        self.discardKeypointRecording()
+        if self.session is None:
+            # e.g. when the pose estimator is run without the lobby
+            self.session = Session.create()
+        self.keypointWriter = SessionWriter(self.session.getPath("keypointsRecording"), KEYPOINT_DTYPE,
+                                            metadata={"stream": "keypoints", "session": self.session.id})
+        self.session.addFile("keypointsRecording")
+        self.session.update(status=RECORDING)
+        # the force receiver feeds the same live analysis once it hears the climb has begun
+        from AnalyseClimb.LiveMetrics import LiveClimbMetrics
+        self.liveMetrics = LiveClimbMetrics(self.holdCoordinates)
+
+    def discardKeypointRecording(self):
+        self.liveMetrics = None
+        if self.keypointWriter is not None:
+            self.keypointWriter.discard()
+            # wait for the file to be deleted, the next attempt at the climb records to the same path
+            self.keypointWriter.waitUntilSealed(timeout=1.0)
+            self.keypointWriter = None
+            self.session.removeFile("keypointsRecording")
+
+    def saveKeypointsData(self):
+        """
+        Seals the climb's keypoint recording. The writer thread then saves the keypoints to the session's output.csv for the
+        climb analyser, and to a binary .npy file, so the pose thread does not wait on the disk.
+        """
+        if self.keypointWriter is not None:
+            session, climbSuccessful = self.session, bool(self.climbSuccessful)
+            metadata = {"rows": len(self.keypointsData), "climbSuccessful": climbSuccessful}
+            self.keypointWriter.seal(metadata, lambda rows: exportKeypoints(rows, session, climbSuccessful))
+            self.keypointWriter = None
+            print(f"Keypoints data will be saved to {session.getPath('keypoints')}")
+        self.keypointsData.clear()
+        print(f"Pose inference ran on {self.inferenceCount} frames, {self.droppedFrames} frames dropped")
         
 
     def loadModel(self):
-        self.interpreter = interpreterWrapper.Interpreter(model_path=self.modelPath)
-        self.interpreter.allocate_tensors()
-        self.inputDetails = self.interpreter.get_input_details()
-        self.outputDetails = self.interpreter.get_output_details()
+        self.model.load()
+        self.interpreter = self.model.interpreter
+        self.inputDetails = self.model.inputDetails
+        self.outputDetails = self.model.outputDetails
 
         self.modelLoaded.emit()
         self.poseEstimatorModelLoaded = True
 
     def preprocessFrame(self, frame):
-        input_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        input_frame = cv2.resize(input_frame, self.inputDetails[0]['shape'][1:3])
-        input_frame = np.expand_dims(input_frame, axis=0)
-        input_frame = input_frame.astype(np.uint8)
-        return input_frame
+        return self.model.preprocessFrame(frame)
 
     @pyqtSlot(bool)
     def oncameraConnectSignal(self, connected):
         if not connected:
             logging.info("Camera disconnected. Attempting to reconnect...")
 
-    @pyqtSlot()
-    def onFrameSignal(self):
-        # if isinstance(self.parent.centralWidget(), ClimbingScreen):
-        #     print(self.parent.centralWidget())
-        #     return
-        # if hold coordinates have not been loaded, do not record the climb
-        if not self.holdCoordinatesLoaded:
-            return
-        
-        self.frameCounter += 1
-        if self.frameCounter % FRAME_SKIP == 0:
-            self.frameCounter = 0
-            frame = self.cameraSender.getFrame()
-            if (frame is not None) and self.poseEstimatorModelLoaded:
-                inputFrame = self.preprocessFrame(frame)
-                self.runInference(inputFrame)
-                centerOfGravity = self.calculateCenterOfGravity()
-                armAngles = self.calculateArmAngles()
-                self.inferenceSignal.emit(self.keypoints, centerOfGravity, armAngles)
-                # print("left wrist: ", self.keypoints[PoseEstimatorThread.usefulKeypointDict['left_wrist']], \
-                #     "\nright wrist: ", self.keypoints[PoseEstimatorThread.usefulKeypointDict['right_wrist']], \
-                #     "\nleft ankle: ", self.keypoints[PoseEstimatorThread.usefulKeypointDict['left_ankle']], \
-                #     "\nright ankle: ", self.keypoints[PoseEstimatorThread.usefulKeypointDict['right_ankle']])
-                self.recordClimb()
+    def calculatePoseFeatures(self, threshold=0.3) -> tuple:
+        """
+        Calculates the center of gravity and the elbow angles of the latest keypoints in one pass, see DataCapture/PoseFeatures.py.
 
+        Args:
+        threshold (float): Minimum confidence score for a keypoint to be considered.
 
+        Returns:
+        tuple: ((cgY, cgX), (leftArmAngle, rightArmAngle)). Values that are not visible are None.
+        """
+        return getPoseTuples(calculatePoseFeatures(self.keypoints, threshold))
 
     def calculateArmAngles(self, threshold=0.3):
         """
         Calculate the elbow angle of each arm. The angle is 0 when the hand is touching the shoulder from above.
 
         Args:
-        # keypoints (list): List of keypoints (e.g., [[x, y, score], ...]), typically from the MoveNet model.
         threshold (float): Minimum confidence score for a keypoint to be considered.
 
         Returns:
         tuple: The angle of each arm (e.g., (leftArmAngle, rightArmAngle)). If a keypoint is not visible, the angle is None.
         """
-        
-        leftShoulder = self.keypoints[PoseEstimatorThread.usefulKeypointDict['left_shoulder']]
-        leftElbow = self.keypoints[PoseEstimatorThread.usefulKeypointDict['left_elbow']]
-        leftWrist = self.keypoints[PoseEstimatorThread.usefulKeypointDict['left_wrist']]
-
-        rightShoulder = self.keypoints[PoseEstimatorThread.usefulKeypointDict['right_shoulder']]
-        rightElbow = self.keypoints[PoseEstimatorThread.usefulKeypointDict['right_elbow']]
-        rightWrist = self.keypoints[PoseEstimatorThread.usefulKeypointDict['right_wrist']]
-
-        # Calculate angles for both arms
-        # leftArmAngle = math.degrees(math.atan2(leftWrist[1] - leftElbow[1], leftWrist[0] - leftElbow[0]) - math.atan2(leftShoulder[1] - leftElbow[1], leftShoulder[0] - leftElbow[0]))
-        # rightArmAngle = math.degrees(math.atan2(rightWrist[1] - rightElbow[1], rightWrist[0] - rightElbow[0]) - math.atan2(rightShoulder[1] - rightElbow[1], rightShoulder[0] - rightElbow[0]))
-
-        # Initialize angles as None
-        leftArmAngle = None
-        rightArmAngle = None
-
-        # Check visibility before calculating angles
-        if all(part[2] > threshold for part in [leftShoulder, leftElbow, leftWrist]):
-            leftArmAngle = math.degrees(math.atan2(leftShoulder[1] - leftElbow[1], leftShoulder[0] - leftElbow[0]) - math.atan2(leftWrist[1] - leftElbow[1], leftWrist[0] - leftElbow[0]))
-            if leftArmAngle>90:
-                leftArmAngle = abs(360-leftArmAngle)
-            leftArmAngle = abs(round(leftArmAngle, 2))
-            
-
-        if all(part[2] > threshold for part in [rightShoulder, rightElbow, rightWrist]):
-            rightArmAngle = math.degrees(math.atan2(rightWrist[1] - rightElbow[1], rightWrist[0] - rightElbow[0]) - math.atan2(rightShoulder[1] - rightElbow[1], rightShoulder[0] - rightElbow[0]))
-            if rightArmAngle>90:
-                rightArmAngle = abs(360-rightArmAngle)
-            rightArmAngle = abs(round(rightArmAngle, 2))
-
-        return leftArmAngle, rightArmAngle
-
+        return self.calculatePoseFeatures(threshold)[1]
 
     def calculateCenterOfGravity(self, threshold=0.3):
         """
         Calculate the center of gravity of the body.
 
         Args:
-        keypoints (list): List of keypoints (e.g., [[x, y, score], ...]), typically from the MoveNet model.
         threshold (float): Minimum confidence score for a keypoint to be considered.
 
         Returns:
         tuple: The position of the center of gravity (e.g., (x, y)). If no keypoints are above the threshold, returns (None, None).
         """
-        totalX, totalY, points = 0, 0, 0
-
-        cgPoints = {"leftShoulder": self.keypoints[PoseEstimatorThread.usefulKeypointDict['left_shoulder']], 
-                    "rightShoulder": self.keypoints[PoseEstimatorThread.usefulKeypointDict['right_shoulder']], 
-                    "leftHip": self.keypoints[PoseEstimatorThread.usefulKeypointDict['left_hip']], 
-                    "rightHip": self.keypoints[PoseEstimatorThread.usefulKeypointDict['right_hip']]}  
-
-        for keypoint in cgPoints.values():
-            x, y, score = keypoint[0], keypoint[1], keypoint[2]
-
-            if score > threshold:
-                totalX += x
-                totalY += y
-                points += 1
-
-        if points > 0:
-            cgX = round (totalX / points, 5)
-            cgY = round (totalY / points, 5)
-            return (cgX, cgY)
-        else:
-            return (None, None)
+        return self.calculatePoseFeatures(threshold)[0]
         
     def reset(self):
-        self.climbInProgress = False
-        self.climbBegun = False
-        self.climbSuccessful = None
-        self.keypointsData = []
-        self.holdCoordinatesLoaded = False
-        self.holdCoordinates = []
-        self.frameCounter = 0
-        self.keypoints = None
-        self.centerOfGravity = None, None
-        self.armAngles = None, None
-        self.leftHand = None, None
-        self.rightHand = None, None
-        self.leftFoot = None, None
-        self.rightFoot = None, None
-        self.lowestHoldY = None
-        self.highestHoldY = None
-        self.startTime = None
+        with self.stateLock:
+            self.climbInProgress = False
+            self.climbBegun = False
+            self.climbSuccessful = None
+            self.keypointsData.clear()
+            self.discardKeypointRecording()
+            self.session = None
+            self.holdCoordinatesLoaded = False
+            self.holdCoordinates = []
+            self.frameCounter = 0
+            self.keypoints = None
+            self.centerOfGravity = None, None
+            self.armAngles = None, None
+            self.leftHand = None, None
+            self.rightHand = None, None
+            self.leftFoot = None, None
+            self.rightFoot = None, None
+            self.lowestHoldY = None
+            self.highestHoldY = None
+            self.startTime = None
+            self.keypointsCaptureTime = None
+            self.validateClimbTime = None
+            self.inferenceCount = 0
+            self.droppedFrames = 0
+            self.frameSkipController.setClimbing(False)
+            self.keypointFilter.reset()
         # self.cameraSender.frameSignal.disconnect(self.onFrameSignal)
         # self.cameraSender.cameraConnectSignal.disconnect(self.oncameraConnectSignal)
         
@@ -485,6 +690,7 @@ class MainWindow(QWidget):
         self.keypoints = None
         self.centerOfGravity = None, None
         self.armAngles = None, None  
+        self.displayFrame = None
         print("Main window created.")
 
     @pyqtSlot()
@@ -495,10 +701,18 @@ class MainWindow(QWidget):
     @pyqtSlot()
     def onFrameSignal(self):
         frame = self.cameraSender.getFrame()
+        if frame is None:
+            return
+        # the frame belongs to the camera's frame ring, which the pose estimator reads, so draw on a copy in a buffer that is
+        # reused across frames
+        if self.displayFrame is None or self.displayFrame.shape != frame.shape:
+            self.displayFrame = np.empty_like(frame)
+        np.copyto(self.displayFrame, frame)
+        frame = self.displayFrame
         if self.poseEstimatorModelLoaded:
             frame = self.drawSkeleton(frame, self.keypoints, self.centerOfGravity)
         # Convert image to QImage and display it in the QLabel
-        frame = QImage(frame, frame.shape[1], frame.shape[0], QImage.Format_BGR888)
+        frame = QImage(frame, frame.shape[1], frame.shape[0], frame.strides[0], QImage.Format_BGR888)
         # Convert the QImage to a QPixmap
         pixmap = QPixmap(frame)
         # pixmap=QPixmap.scaledToWidth(pixmap, round(self.width()*0.9), Qt.SmoothTransformation)
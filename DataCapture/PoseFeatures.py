@@ -0,0 +1,100 @@
+import numpy as np
+
+# MoveNet keypoint indices
+LEFT_SHOULDER, RIGHT_SHOULDER = 5, 6
+LEFT_ELBOW, RIGHT_ELBOW = 7, 8
+LEFT_WRIST, RIGHT_WRIST = 9, 10
+LEFT_HIP, RIGHT_HIP = 11, 12
+
+CENTER_OF_GRAVITY_KEYPOINTS = [LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP]
+ARM_KEYPOINTS = np.array([[LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST],
+                          [RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST]])
+# the left angle is measured from the wrist to the shoulder and the right from the shoulder to the wrist, see calculatePoseFeatures
+ARM_ANGLE_SIGN = np.array([1.0, -1.0])
+
+
+def calculatePoseFeatures(keypoints, threshold=0.3) -> dict:
+    """
+    Calculates the centre of gravity and the elbow angles of one frame of keypoints, or of a whole climb at once.
+
+    The centre of gravity is the mean of the visible shoulders and hips, and is not visible if none of them are.
+    The elbow angle is 0 when the hand is touching the shoulder from above, and is not visible unless the shoulder, elbow and
+    wrist of that arm are all visible. Values that are not visible are NaN.
+
+    Args:
+        keypoints (numpy.ndarray): (17, 3) array of [y, x, score] rows from MoveNet, or a (frames, 17, 3) array.
+        threshold (float): Minimum confidence score for a keypoint to be considered visible. Defaults to 0.3.
+
+    Returns:
+        dict: With, for a (frames, 17, 3) input (the frames dimension is dropped for a single frame):
+            "centerOfGravity": (frames, 2) array, in the same [y, x] order as the keypoints, rounded to 5 decimals.
+            "centerOfGravityVisible": (frames,) bool array.
+            "armAngles": (frames, 2) array of the left and right elbow angles in degrees, rounded to 2 decimals.
+            "armAnglesVisible": (frames, 2) bool array.
+            "keypointsVisible": (frames, 17) bool array.
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float64)
+    singleFrame = keypoints.ndim == 2
+    if singleFrame:
+        keypoints = keypoints[np.newaxis]
+
+    visible = keypoints[..., 2] > threshold
+
+    # centre of gravity - mean of the visible shoulders and hips
+    cogKeypoints = keypoints[:, CENTER_OF_GRAVITY_KEYPOINTS, :2]
+    cogVisible = visible[:, CENTER_OF_GRAVITY_KEYPOINTS]
+    cogCount = cogVisible.sum(axis=1)
+    cogTotal = np.einsum('fk,fkc->fc', cogVisible.astype(np.float64), cogKeypoints)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centerOfGravity = np.round(cogTotal / cogCount[:, np.newaxis], 5)
+    centerOfGravityVisible = cogCount > 0
+    centerOfGravity[~centerOfGravityVisible] = np.nan
+
+    # elbow angles - the angle between the elbow-shoulder and elbow-wrist directions
+    shoulders = keypoints[:, ARM_KEYPOINTS[:, 0], :2]
+    elbows = keypoints[:, ARM_KEYPOINTS[:, 1], :2]
+    wrists = keypoints[:, ARM_KEYPOINTS[:, 2], :2]
+    shoulderDirection = np.arctan2(shoulders[..., 1] - elbows[..., 1], shoulders[..., 0] - elbows[..., 0])
+    wristDirection = np.arctan2(wrists[..., 1] - elbows[..., 1], wrists[..., 0] - elbows[..., 0])
+    armAngles = np.degrees(shoulderDirection - wristDirection) * ARM_ANGLE_SIGN
+    armAngles = np.where(armAngles > 90, np.abs(360 - armAngles), armAngles)
+    armAngles = np.abs(np.round(armAngles, 2))
+    armAnglesVisible = visible[:, ARM_KEYPOINTS].all(axis=2)
+    armAngles[~armAnglesVisible] = np.nan
+
+    features = {"centerOfGravity": centerOfGravity,
+                "centerOfGravityVisible": centerOfGravityVisible,
+                "armAngles": armAngles,
+                "armAnglesVisible": armAnglesVisible,
+                "keypointsVisible": visible}
+    if singleFrame:
+        features = {name: value[0] for name, value in features.items()}
+    return features
+
+
+def getPoseTuples(features) -> tuple:
+    """
+    Converts the features of a single frame to the (centerOfGravity, armAngles) tuples the pose estimator sends to the UI,
+    with None for values that are not visible.
+
+    Returns:
+        tuple: ((cgY, cgX), (leftArmAngle, rightArmAngle)).
+    """
+    if features["centerOfGravityVisible"]:
+        centerOfGravity = (float(features["centerOfGravity"][0]), float(features["centerOfGravity"][1]))
+    else:
+        centerOfGravity = (None, None)
+    armAngles = tuple(float(angle) if armVisible else None
+                      for angle, armVisible in zip(features["armAngles"], features["armAnglesVisible"]))
+    return centerOfGravity, armAngles
+
+
+if __name__ == '__main__':
+    import time
+
+    rng = np.random.default_rng(0)
+    climb = rng.uniform(0, 1, (3000, 17, 3))
+    startTime = time.perf_counter()
+    features = calculatePoseFeatures(climb)
+    print(f"{len(climb)} frames in {(time.perf_counter() - startTime) * 1000:.1f} ms")
+    print(getPoseTuples(calculatePoseFeatures(climb[0])))
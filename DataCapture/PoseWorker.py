@@ -0,0 +1,138 @@
+import logging
+import multiprocessing
+import time
+
+from DataCapture.FrameRingBuffer import FrameRingBuffer
+
+
+def poseWorkerMain(modelPath, ringName, resolution, ringSize, resultConnection, stopEvent, activeEvent, minSequenceGap,
+                   numThreads=None, useXnnpack=True):
+    """
+    Entry point of the pose worker process. Attaches to the camera's shared frame ring, loads MoveNet, and runs inference on the
+    newest frame until stopEvent is set. Frames are read straight from shared memory, only the keypoints are sent back.
+
+    Messages sent over resultConnection:
+        ("loaded",) once the model has been loaded.
+        ("error", message) if the model could not be loaded.
+        ("keypoints", sequence, captureTime, keypoints, inferenceTime) for every frame inference was run on.
+
+    Args:
+        modelPath: Path to the MoveNet model.
+        ringName: Shared memory name of the camera's frame ring.
+        resolution: (width, height) of the frames in the ring.
+        ringSize: Number of frames in the ring.
+        resultConnection: Sending end of a multiprocessing.Pipe.
+        stopEvent: multiprocessing.Event, set to stop the worker.
+        activeEvent: multiprocessing.Event, inference only runs while it is set.
+        minSequenceGap: multiprocessing.Value, minimum number of frames between two inferences.
+        numThreads: Number of threads the interpreter may use. Defaults to None (TFLite's default).
+        useXnnpack: If False, the XNNPACK delegate is disabled. Defaults to True.
+    """
+    frameRing = FrameRingBuffer(resolution, ringSize, sharedMemoryName=ringName)
+    try:
+        # imported here so that the parent process does not need TensorFlow to start the worker
+        from DataCapture.MoveNet import MoveNetModel
+        model = MoveNetModel(modelPath, numThreads, useXnnpack)
+        model.load()
+    except Exception as e:
+        resultConnection.send(("error", str(e)))
+        frameRing.close()
+        return
+    resultConnection.send(("loaded",))
+
+    lastSequence = -1
+    while not stopEvent.is_set():
+        if not activeEvent.wait(0.5):
+            continue
+
+        # the ring's condition variable only works inside the camera's process, so poll for a new frame
+        if frameRing.latestSequence < lastSequence + minSequenceGap.value:
+            time.sleep(0.002)
+            continue
+        newestFrame = frameRing.getNewest()
+        if newestFrame is None:
+            continue
+        sequence, captureTime, frame = newestFrame
+
+        model.setInputFrame(frame)
+        if not frameRing.isValid(sequence):
+            # the camera overwrote the frame while it was being read, try again with a newer one
+            continue
+
+        startTime = time.perf_counter()
+        keypoints = model.runInference()
+        inferenceTime = time.perf_counter() - startTime
+
+        lastSequence = sequence
+        resultConnection.send(("keypoints", sequence, captureTime, keypoints, inferenceTime))
+
+    frameRing.close()
+
+
+class PoseWorkerProcess:
+    """
+    Runs MoveNet in a separate process, so that inference does not compete with capture and the UI for the GIL.
+    Frames are handed over through the camera's shared memory frame ring, and keypoints come back over a pipe.
+    """
+
+    def __init__(self, modelPath, frameRing, minSequenceGap=1, numThreads=None, useXnnpack=True):
+        """
+        Args:
+            modelPath: Path to the MoveNet model.
+            frameRing: The camera's FrameRingBuffer. It must be in shared memory.
+            minSequenceGap: Minimum number of frames between two inferences. Defaults to 1 (every frame).
+            numThreads: Number of threads the interpreter may use. Defaults to None (TFLite's default).
+            useXnnpack: If False, the XNNPACK delegate is disabled. Defaults to True.
+        """
+        if frameRing.sharedMemoryName is None:
+            raise ValueError("The pose worker process needs a frame ring in shared memory")
+
+        # spawn rather than fork, forking a process with Qt and TensorFlow threads running is not safe
+        context = multiprocessing.get_context("spawn")
+        self.resultConnection, workerConnection = context.Pipe(duplex=False)
+        self.stopEvent = context.Event()
+        self.activeEvent = context.Event()
+        self.minSequenceGap = context.Value('i', minSequenceGap)
+        self.process = context.Process(target=poseWorkerMain,
+                                       args=(modelPath, frameRing.sharedMemoryName, frameRing.resolution, frameRing.size,
+                                             workerConnection, self.stopEvent, self.activeEvent, self.minSequenceGap,
+                                             numThreads, useXnnpack),
+                                       daemon=True)
+
+    def start(self):
+        self.process.start()
+
+    def receive(self, timeout=None):
+        """
+        Returns the next message from the worker, or None if there was none within timeout seconds.
+        """
+        if not self.resultConnection.poll(timeout):
+            if not self.process.is_alive():
+                return ("error", "Pose worker process exited")
+            return None
+        return self.resultConnection.recv()
+
+    def setActive(self, active):
+        """
+        Pauses or resumes inference in the worker.
+        """
+        if active and not self.activeEvent.is_set():
+            self.activeEvent.set()
+        elif not active and self.activeEvent.is_set():
+            self.activeEvent.clear()
+
+    def setMinSequenceGap(self, gap):
+        """
+        Sets the minimum number of frames between two inferences.
+        """
+        self.minSequenceGap.value = max(1, int(gap))
+
+    def stop(self, timeout=2.0):
+        """
+        Stops the worker process, terminating it if it does not exit within timeout seconds.
+        """
+        self.stopEvent.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logging.info("Pose worker process did not stop, terminating it")
+            self.process.terminate()
@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+
+SESSIONS_DIRECTORY = "data/sessions"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# files a session can contain, by role
+SESSION_FILES = {
+    "holdCoordinates": "holdCoordinates.csv",
+    "keypoints": "output.csv",
+    "keypointsBinary": "output.npy",
+    "keypointsRecording": "keypoints.rec",
+    "force": "forceData.csv",
+    "forceRecording": "force.rec",
+    # memory-mappable copies of the CSV files, see DataCapture/ColumnStore.py
+    "holdCoordinatesColumns": "holdCoordinates.columns",
+    "keypointsColumns": "output.columns",
+    "forceColumns": "forceData.columns",
+}
+
+# status of a session, in the order they happen
+CREATED, RECORDING, RECORDED, ANALYSED = "created", "recording", "recorded", "analysed"
+
+
+class Session:
+    """
+    One climb, stored in its own directory under data/sessions with everything recorded and calculated for it:
+    the hold coordinates, the keypoint and force recordings, their CSV exports, and a manifest.json describing the climb.
+
+    Sessions replace the shared data/output.csv, data/forceData.csv and data/holdCoordinates.csv, so a climb can't overwrite
+    the data of a climb that is still being analysed, and old climbs can be found and analysed again.
+    Session has no Qt dependencies, the manifest can be updated from any thread.
+    """
+
+    def __init__(self, directory):
+        """
+        Opens an existing session. Use Session.create to start a new one.
+
+        Args:
+            directory: The session's directory.
+        """
+        self.directory = directory
+        self.lock = threading.Lock()
+        with open(os.path.join(directory, MANIFEST_NAME), 'r') as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def create(cls, climberName="", root=SESSIONS_DIRECTORY) -> "Session":
+        """
+        Creates a new session directory with an empty manifest.
+
+        Args:
+            climberName: Name the climber entered in the lobby. Defaults to "".
+            root: Directory the sessions are stored in. Defaults to SESSIONS_DIRECTORY.
+        """
+        os.makedirs(root, exist_ok=True)
+        sessionId = time.strftime("%Y%m%d-%H%M%S")
+        # two sessions can be started in the same second, e.g. when a climber goes straight back to the wall
+        suffix = 1
+        while os.path.exists(os.path.join(root, sessionId)):
+            suffix += 1
+            sessionId = f"{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+        directory = os.path.join(root, sessionId)
+        os.makedirs(directory)
+
+        manifest = {"version": MANIFEST_VERSION,
+                    "id": sessionId,
+                    "climberName": climberName,
+                    "created": time.time(),
+                    "status": CREATED,
+                    "climbSuccessful": None,
+                    "files": {},
+                    "scores": None}
+        writeManifest(directory, manifest)
+        return cls(directory)
+
+    @classmethod
+    def open(cls, sessionId, root=SESSIONS_DIRECTORY) -> "Session":
+        """
+        Opens the session with the given id, or the given session directory.
+        """
+        directory = sessionId if os.path.isdir(sessionId) else os.path.join(root, sessionId)
+        return cls(directory)
+
+    @property
+    def id(self) -> str:
+        return self.manifest["id"]
+
+    @property
+    def climberName(self) -> str:
+        return self.manifest["climberName"]
+
+    @property
+    def status(self) -> str:
+        return self.manifest["status"]
+
+    def getPath(self, role) -> str:
+        """
+        Returns the path of one of the session's files, e.g. getPath("keypoints") for its output.csv.
+        """
+        return os.path.join(self.directory, SESSION_FILES[role])
+
+    def hasFile(self, role) -> bool:
+        return role in self.manifest["files"] and os.path.exists(self.getPath(role))
+
+    def addFile(self, role):
+        """
+        Records in the manifest that the session's file with the given role has been written.
+        """
+        with self.lock:
+            self.manifest["files"][role] = SESSION_FILES[role]
+            writeManifest(self.directory, self.manifest)
+
+    def removeFile(self, role):
+        """
+        Deletes one of the session's files, e.g. the recording of a climb that was abandoned.
+        """
+        with self.lock:
+            self.manifest["files"].pop(role, None)
+            if os.path.exists(self.getPath(role)):
+                os.remove(self.getPath(role))
+            writeManifest(self.directory, self.manifest)
+
+    def update(self, **fields):
+        """
+        Updates fields of the manifest, e.g. update(status=ANALYSED, scores={...}).
+        """
+        with self.lock:
+            self.manifest.update(fields)
+            writeManifest(self.directory, self.manifest)
+
+    def __repr__(self):
+        return f"Session({self.id}, {self.climberName!r}, {self.status})"
+
+
+def writeManifest(directory, manifest):
+    # write to a temporary file first, so that a crash can't leave a half written manifest
+    path = os.path.join(directory, MANIFEST_NAME)
+    temporaryPath = path + ".tmp"
+    with open(temporaryPath, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(temporaryPath, path)
+
+
+def listSessions(root=SESSIONS_DIRECTORY, climberName=None, status=None) -> list:
+    """
+    Returns the sessions in root, newest first.
+
+    Args:
+        root: Directory the sessions are stored in. Defaults to SESSIONS_DIRECTORY.
+        climberName: Only return the sessions of this climber. Defaults to None (all climbers).
+        status: Only return sessions with this status, e.g. RECORDED for climbs that have not been analysed. Defaults to None.
+    """
+    if not os.path.isdir(root):
+        return []
+    sessions = []
+    for name in os.listdir(root):
+        directory = os.path.join(root, name)
+        if not os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+            continue
+        try:
+            session = Session(directory)
+        except (ValueError, OSError):
+            continue
+        if climberName is not None and session.climberName != climberName:
+            continue
+        if status is not None and session.status != status:
+            continue
+        sessions.append(session)
+    return sorted(sessions, key=lambda session: session.manifest["created"], reverse=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    argParser = argparse.ArgumentParser(description="List recorded climbing sessions.")
+    argParser.add_argument('-c', '--climber', type=str, default=None, help="Only list the sessions of this climber")
+    argParser.add_argument('-s', '--status', type=str, choices=[CREATED, RECORDING, RECORDED, ANALYSED], default=None,
+                           help="Only list sessions with this status")
+    args = argParser.parse_args()
+
+    for session in listSessions(climberName=args.climber, status=args.status):
+        scores = session.manifest["scores"]
+        print(f"{session.id}  {session.climberName:20}  {session.status:10}  "
+              f"{'' if scores is None else scores.get('total', '')}")
@@ -0,0 +1,299 @@
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import weakref
+import zlib
+import numpy as np
+
+# file layout: header, any number of chunks, and a footer once the recording has been sealed
+#   header: MAGIC, uint32 length of the JSON header, JSON header with the dtype of the rows
+#   chunk:  CHUNK_MAGIC, uint32 number of rows, uint32 crc32 of the rows, rows
+#   footer: SEAL_MAGIC, uint64 total number of rows, uint32 length of the JSON metadata, JSON metadata
+MAGIC = b"CRREC001"
+CHUNK_MAGIC = b"CHNK"
+SEAL_MAGIC = b"SEAL"
+CHUNK_HEADER = struct.Struct("<4sII")
+SEAL_HEADER = struct.Struct("<4sQI")
+
+activeWriters = weakref.WeakSet() # writers that have not been sealed or discarded yet
+
+
+class SessionWriter:
+    """
+    Streams the rows recorded during a climb to a file on a background thread, so that a crash mid-climb loses at most the
+    last fraction of a second, and the end of the climb does not wait on the disk.
+
+    Rows are collected into chunks of up to chunkRows rows, which are handed to the writer thread over a bounded queue.
+    Chunks are appended to the file as they arrive and fsynced in batches. seal() writes a footer with the total number of
+    rows, after which the recording is complete. Recordings that were never sealed can still be read with readRecording,
+    up to the last complete chunk.
+    """
+
+    def __init__(self, path, dtype, chunkRows=64, flushInterval=0.5, fsyncInterval=1.0, maxQueuedChunks=64, metadata=None,
+                 closeTimeout=5.0):
+        """
+        Args:
+            path: Path of the recording file. Its directory is created if needed.
+            dtype: NumPy dtype of a row, usually a structured dtype.
+            chunkRows: Maximum number of rows per chunk. Defaults to 64.
+            flushInterval: A partial chunk is handed to the writer thread after this many seconds. Defaults to 0.5.
+            fsyncInterval: Time in seconds between fsyncs of the file. Defaults to 1.0.
+            maxQueuedChunks: Number of chunks that can wait for the writer thread before chunks are dropped. Defaults to 64.
+            metadata: JSON serialisable dict stored in the header of the file. Defaults to None.
+            closeTimeout: Seconds seal() and discard() wait for room in the queue before giving up on the recording.
+                Defaults to 5.0.
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.chunkRows = chunkRows
+        self.flushInterval = flushInterval
+        self.fsyncInterval = fsyncInterval
+        self.closeTimeout = closeTimeout
+
+        self.lock = threading.Lock() # rows may be appended and the recording sealed from different threads
+        self.chunk = np.zeros(chunkRows, dtype=self.dtype)
+        self.chunkLength = 0
+        self.chunkStartTime = None
+        self.queue = queue.Queue(maxsize=maxQueuedChunks)
+        self.closed = False
+        self.sealedEvent = threading.Event()
+        self.droppedChunks = 0
+        self.rowsWritten = 0
+        self.writeError = None # set if the recording could not be written, it is then incomplete or missing
+        self.exportError = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "wb")
+        header = json.dumps({"dtype": dtypeToJson(self.dtype), "created": time.time(), "metadata": metadata or {}}).encode("utf-8")
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+        self.thread = threading.Thread(target=self.writeLoop, name=f"SessionWriter-{os.path.basename(path)}", daemon=True)
+        self.thread.start()
+        activeWriters.add(self)
+
+    def append(self, rows):
+        """
+        Appends one row (a structured scalar or a tuple) or an array of rows.
+        """
+        rows = np.asarray(rows, dtype=self.dtype).reshape(-1)
+        with self.lock:
+            if self.closed:
+                return
+            written = 0
+            while written < len(rows):
+                count = min(len(rows) - written, self.chunkRows - self.chunkLength)
+                if self.chunkLength == 0:
+                    self.chunkStartTime = time.monotonic()
+                self.chunk[self.chunkLength:self.chunkLength + count] = rows[written:written + count]
+                self.chunkLength += count
+                written += count
+                if self.chunkLength == self.chunkRows:
+                    self.submitChunk()
+            # hand over partial chunks regularly, so that little is lost if the app crashes
+            if self.chunkLength > 0 and time.monotonic() - self.chunkStartTime > self.flushInterval:
+                self.submitChunk()
+
+    def submitChunk(self):
+        # called with the lock held
+        chunk = self.chunk[:self.chunkLength].copy()
+        self.chunkLength = 0
+        try:
+            self.queue.put(("chunk", chunk), timeout=0.1)
+        except queue.Full:
+            # the disk can't keep up, drop the chunk rather than stall pose estimation or the force readings
+            self.droppedChunks += 1
+            logging.info(f"Session writer queue full, dropped {len(chunk)} rows of {self.path}")
+
+    def seal(self, metadata=None, export=None):
+        """
+        Writes the remaining rows and the footer, and closes the file. Returns immediately, the writer thread finishes the work.
+
+        Args:
+            metadata: JSON serialisable dict stored in the footer. Defaults to None.
+            export: Function called on the writer thread with all the recorded rows once the recording is sealed,
+                e.g. to also save them in the legacy CSV format. Defaults to None.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            if self.chunkLength > 0:
+                self.submitChunk()
+            self.closed = True
+        self.putCloseMessage(("seal", metadata or {}, export))
+
+    def discard(self):
+        """
+        Stops the recording and deletes the file, e.g. when a climb is abandoned before it really began.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.putCloseMessage(("discard",))
+
+    def putCloseMessage(self, message):
+        # the seal or discard message must not be dropped, so wait for room in the queue, but not forever if the writer thread
+        # is stuck on the disk, the climb's end would hang with it
+        try:
+            self.queue.put(message, timeout=self.closeTimeout)
+        except queue.Full:
+            # the file is left to the writer thread, closing it here could block on the write it is stuck in
+            self.fail(TimeoutError(f"Session writer of {self.path} did not take the {message[0]} message within "
+                                   f"{self.closeTimeout}s"))
+            self.finish()
+
+    def waitUntilSealed(self, timeout=None) -> bool:
+        """
+        Blocks until the recording has been sealed (or discarded) and exported. Returns False if the timeout expired.
+        """
+        return self.sealedEvent.wait(timeout)
+
+    def writeLoop(self):
+        lastFsyncTime = time.monotonic()
+        try:
+            while True:
+                message = self.queue.get()
+                if message[0] == "chunk":
+                    chunk = message[1]
+                    payload = chunk.tobytes()
+                    self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(chunk), zlib.crc32(payload)) + payload)
+                    self.rowsWritten += len(chunk)
+                    # fsync in batches, one fsync per chunk would make the disk the bottleneck
+                    if time.monotonic() - lastFsyncTime > self.fsyncInterval:
+                        self.sync()
+                        lastFsyncTime = time.monotonic()
+
+                elif message[0] == "seal":
+                    _, metadata, export = message
+                    footer = json.dumps(metadata).encode("utf-8")
+                    self.file.write(SEAL_HEADER.pack(SEAL_MAGIC, self.rowsWritten, len(footer)) + footer)
+                    self.sync()
+                    self.file.close()
+                    if export is not None:
+                        try:
+                            export(readRecording(self.path)[0])
+                        except Exception as e:
+                            self.exportError = e
+                            logging.info(f"Failed to export {self.path}: {e}")
+                    return
+
+                elif message[0] == "discard":
+                    self.file.close()
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                    return
+        except Exception as e:
+            # e.g. the disk is full, the rows written so far can still be recovered with readRecording
+            self.fail(e)
+            try:
+                self.file.close()
+            except Exception:
+                pass
+        finally:
+            # whatever happened, don't leave waitUntilSealed and waitForSessionWriters waiting on a thread that has stopped
+            self.finish()
+
+    def fail(self, error):
+        """
+        Stops the recording after an error, which is kept in writeError. Rows appended afterwards are ignored.
+        """
+        with self.lock:
+            self.closed = True
+        self.writeError = error
+        logging.info(f"Failed to write {self.path}: {error}")
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def finish(self):
+        activeWriters.discard(self)
+        self.sealedEvent.set()
+
+
+def waitForSessionWriters(timeout=None) -> bool:
+    """
+    Blocks until every recording that is being written has been sealed or discarded. Returns False if the timeout expired.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for writer in list(activeWriters):
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not writer.waitUntilSealed(remaining):
+            return False
+    return True
+
+
+def dtypeToJson(dtype):
+    return dtype.descr if dtype.names else dtype.str
+
+
+def dtypeFromJson(descr):
+    if isinstance(descr, str):
+        return np.dtype(descr)
+    return np.dtype([tuple(field) for field in descr])
+
+
+def readRecording(path):
+    """
+    Reads a recording written by SessionWriter. If the recording was not sealed, e.g. because the app crashed during the climb,
+    every complete chunk is recovered.
+
+    Returns:
+        tuple: (rows, header, footer). rows is a NumPy array, header the JSON header, and footer the JSON metadata passed to
+            seal(), or None if the recording was not sealed.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a session recording")
+    offset = len(MAGIC)
+    (headerLength,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    header = json.loads(data[offset:offset + headerLength].decode("utf-8"))
+    offset += headerLength
+    dtype = dtypeFromJson(header["dtype"])
+
+    chunks = []
+    footer = None
+    while offset + 4 <= len(data):
+        magic = data[offset:offset + 4]
+        if magic == CHUNK_MAGIC and offset + CHUNK_HEADER.size <= len(data):
+            _, rows, crc = CHUNK_HEADER.unpack_from(data, offset)
+            start = offset + CHUNK_HEADER.size
+            end = start + rows * dtype.itemsize
+            if end > len(data) or zlib.crc32(data[start:end]) != crc:
+                # the chunk was being written when the recording stopped
+                logging.info(f"Recovered {sum(len(chunk) for chunk in chunks)} rows from unsealed recording {path}")
+                break
+            chunks.append(np.frombuffer(data, dtype=dtype, count=rows, offset=start))
+            offset = end
+        elif magic == SEAL_MAGIC and offset + SEAL_HEADER.size <= len(data):
+            _, totalRows, footerLength = SEAL_HEADER.unpack_from(data, offset)
+            start = offset + SEAL_HEADER.size
+            footer = json.loads(data[start:start + footerLength].decode("utf-8"))
+            break
+        else:
+            break
+
+    rows = np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+    return rows, header, footer
+
+
+if __name__ == '__main__':
+    import argparse
+
+    argParser = argparse.ArgumentParser(description="Print a summary of a session recording.")
+    argParser.add_argument('path', type=str, help="Path to the .rec file")
+    args = argParser.parse_args()
+
+    rows, header, footer = readRecording(args.path)
+    print(f"{len(rows)} rows, {'sealed' if footer is not None else 'NOT sealed (recovered)'}")
+    print("Columns: ", rows.dtype.names)
+    print("Metadata: ", header["metadata"], footer)
@@ -0,0 +1,138 @@
+"""
+Starts up the app: the hold finding model, the pose estimation model, the camera, the fonts and the UI assets are loaded at the
+same time rather than one after the other, and the splash screen shows the progress of the tasks, weighted by how long each
+one usually takes. Nothing here blocks the event loop: the tasks run on their own threads and report back with signals.
+"""
+import time
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+
+class TaskThread(QThread):
+    """
+    Runs a startup task's function, which is given a callback to report the fraction of the task that is done.
+    """
+    progress = pyqtSignal(float)
+    taskFinished = pyqtSignal()
+    taskFailed = pyqtSignal(str)
+
+    def __init__(self, function, parent=None):
+        super(TaskThread, self).__init__(parent)
+        self.function = function
+
+    def run(self):
+        try:
+            self.function(self.progress.emit)
+        except Exception as e:
+            self.taskFailed.emit(str(e))
+            return
+        self.taskFinished.emit()
+
+
+class StartupTask:
+    def __init__(self, name, weight, start):
+        self.name = name
+        self.weight = weight # share of the progress bar, roughly proportional to how long the task takes
+        self.start = start
+        self.progress = 0.0
+        self.finished = False
+        self.startTime = None
+        self.finishTime = None
+
+
+class StartupOrchestrator(QObject):
+    """
+    Runs the startup tasks concurrently, and reports their combined progress. Tasks are added before start() is called:
+    - addTask for a task started by a function on the GUI thread, e.g. starting a model loading thread, which reports back
+      with finishTask or failTask, e.g. from the thread's signal.
+    - addBackgroundTask for a function run on its own TaskThread, which is finished when the function returns.
+    A task that needs another one's result, e.g. a thread that needs the opened camera, is started from taskFinished.
+    """
+    progressChanged = pyqtSignal(int) # percent, for SplashScreen.setProgress
+    taskFinished = pyqtSignal(str) # task name
+    taskFailed = pyqtSignal(str, str) # task name, error message
+    finished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super(StartupOrchestrator, self).__init__(parent)
+        self.tasks = {}
+        self.threads = []
+        self.progress = 0
+        self.startTime = None
+        self.failed = False
+
+    def addTask(self, name, weight, start=None):
+        """
+        Adds a task.
+
+        Args:
+            name: The task's name, which finishTask and failTask are called with.
+            weight: The task's share of the progress, relative to the other tasks.
+            start: Called on the GUI thread when the startup starts. Must return straight away. Exceptions it raises fail the
+                task.
+                Defaults to None, for a task started by another one.
+        """
+        self.tasks[name] = StartupTask(name, weight, start)
+
+    def addBackgroundTask(self, name, weight, function):
+        """
+        Adds a task run on its own thread. function is called with a callback to report the fraction of the task that is done.
+        """
+        thread = TaskThread(function, self)
+        thread.progress.connect(lambda fraction: self.setTaskProgress(name, fraction))
+        thread.taskFinished.connect(lambda: self.finishTask(name))
+        thread.taskFailed.connect(lambda message: self.failTask(name, message))
+        self.threads.append(thread)
+        self.addTask(name, weight, thread.start)
+
+    def start(self):
+        self.startTime = time.perf_counter()
+        for task in list(self.tasks.values()):
+            task.startTime = time.perf_counter()
+            if task.start is None:
+                continue
+            try:
+                task.start()
+            except Exception as e:
+                # not only the app's errors, e.g. OpenCV or the OS failing to open the camera, would otherwise escape the slot
+                self.failTask(task.name, str(e))
+            if self.failed:
+                return
+
+    def setTaskProgress(self, name, fraction):
+        task = self.tasks[name]
+        if task.finished:
+            return
+        task.progress = min(max(fraction, 0.0), 1.0)
+        self.updateProgress()
+
+    def finishTask(self, name):
+        task = self.tasks[name]
+        if task.finished or self.failed:
+            return
+        task.finished = True
+        task.progress = 1.0
+        task.finishTime = time.perf_counter()
+        print(f"Startup: {name} ready in {task.finishTime - task.startTime:.2f} s")
+        self.updateProgress()
+        self.taskFinished.emit(name)
+
+        if all(other.finished for other in self.tasks.values()):
+            print(f"Startup: finished in {task.finishTime - self.startTime:.2f} s")
+            self.finished.emit()
+
+    def failTask(self, name, message):
+        if self.failed:
+            return
+        self.failed = True
+        print(f"Startup: {name} failed: {message}")
+        self.taskFailed.emit(name, message)
+
+    def isFinished(self, name) -> bool:
+        return self.tasks[name].finished
+
+    def updateProgress(self):
+        totalWeight = sum(task.weight for task in self.tasks.values())
+        progress = int(100 * sum(task.weight * task.progress for task in self.tasks.values()) / totalWeight)
+        if progress != self.progress:
+            self.progress = progress
+            self.progressChanged.emit(progress)
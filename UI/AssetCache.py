@@ -0,0 +1,119 @@
+import os
+import threading
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage, QPixmap
+
+ASSETS_DIRECTORY = "UI/UIAssets"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# process-wide caches, by normalised path. Images can be decoded on any thread, e.g. while the splash screen is shown (see
+# StartupOrchestrator.py), pixmaps are only made on the GUI thread
+images = {}
+pixmaps = {} # (path, width, height) -> pixmap, width and height None for the image's own size
+imagesLock = threading.Lock()
+
+# lookups of getPixmap that found the pixmap already scaled, and that had to decode or scale it
+cacheHits = 0
+cacheMisses = 0
+
+
+def assetKey(path) -> str:
+    return os.path.normpath(path)
+
+
+def listAssets(directory=ASSETS_DIRECTORY) -> list:
+    """
+    Returns the paths of every image under directory.
+    """
+    paths = []
+    for root, _, names in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(paths)
+
+
+def loadImage(path) -> QImage:
+    """
+    Returns an image, reading and decoding it the first time it is asked for. Safe to call from any thread.
+    """
+    key = assetKey(path)
+    with imagesLock:
+        image = images.get(key)
+    if image is None:
+        image = QImage(path)
+        if image.isNull():
+            # a missing file is not cached, it shows up as an empty label like QPixmap(path) does
+            return image
+        with imagesLock:
+            image = images.setdefault(key, image)
+    return image
+
+
+def preloadAssets(progress=None, directory=ASSETS_DIRECTORY):
+    """
+    Decodes every image under directory, e.g. on a background thread while the app starts.
+
+    Args:
+        progress: Called with the fraction of the images decoded so far. Defaults to None.
+        directory: Directory of the images. Defaults to ASSETS_DIRECTORY.
+    """
+    paths = listAssets(directory)
+    for index, path in enumerate(paths, start=1):
+        loadImage(path)
+        if progress is not None:
+            progress(index / len(paths))
+
+
+def scaleImage(image, width=None, height=None) -> QImage:
+    if width is not None and height is not None:
+        return image.scaled(QSize(width, height), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    elif width is not None:
+        return image.scaledToWidth(width, Qt.SmoothTransformation)
+    elif height is not None:
+        return image.scaledToHeight(height, Qt.SmoothTransformation)
+    return image
+
+
+def getPixmap(path, width=None, height=None) -> QPixmap:
+    """
+    Returns a pixmap of an image, smoothly scaled to a width and/or height keeping its aspect ratio. Each image is decoded once,
+    and each size it is asked for is scaled once, so the screens can ask for their images on every frame. GUI thread only.
+
+    Args:
+        path: Path of the image, e.g. "UI/UIAssets/logo.png".
+        width: Width to scale the image to. Defaults to None.
+        height: Height to scale the image to, or with width, the size to fit the image in. Defaults to None, the image's own
+            size if width is None too.
+
+    Returns:
+        QPixmap: The image, or an empty pixmap if it could not be read.
+    """
+    global cacheHits, cacheMisses
+    key = (assetKey(path), width, height)
+    pixmap = pixmaps.get(key)
+    if pixmap is not None:
+        cacheHits += 1
+        return pixmap
+
+    cacheMisses += 1
+    image = loadImage(path)
+    if image.isNull():
+        return QPixmap()
+    pixmap = pixmaps[key] = QPixmap.fromImage(scaleImage(image, width, height))
+    return pixmap
+
+
+def getCacheStats() -> dict:
+    """
+    Returns the number of getPixmap "hits" and "misses", and the number of decoded "images" and of "pixmaps" in the cache.
+    """
+    with imagesLock:
+        decodedImages = len(images)
+    return {"hits": cacheHits, "misses": cacheMisses, "images": decodedImages, "pixmaps": len(pixmaps)}
+
+
+def clearCache():
+    global cacheHits, cacheMisses
+    with imagesLock:
+        images.clear()
+    pixmaps.clear()
+    cacheHits = cacheMisses = 0
@@ -1,6 +1,7 @@
-from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QRect
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot
 from PyQt5.QtWidgets import QStackedLayout, QLabel, QWidget
-from PyQt5.QtGui import QImage, QPixmap
+from UI.AssetCache import getPixmap
+from UI.FrameView import FrameView
 
 import logging
 import numpy as np, cv2
@@ -17,9 +18,7 @@ class ClimbingScreen(QWidget):
         self.stackedLayout.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # Create labels for live feed and clear area image  
-        self.liveFeed = QLabel(self)
-        self.liveFeed.setScaledContents(True)
-        self.liveFeed.setAlignment(Qt.AlignCenter)
+        self.liveFeed = FrameView(self)
 
         # Add the live feed and overlay layouts to the stacked layout
         self.stackedLayout.addWidget(self.liveFeed)
@@ -29,7 +28,7 @@ class ClimbingScreen(QWidget):
 
         # Add the logo to the top left corner
         self.logoLabel = QLabel(self)
-        self.logoLabel.setPixmap(QPixmap("UI/UIAssets/logo.png").scaledToWidth(160, Qt.SmoothTransformation))
+        self.logoLabel.setPixmap(getPixmap("UI/UIAssets/logo.png", width=160))
         self.logoLabel.setStyleSheet("background-color: transparent;")
         self.logoLabel.setFixedSize(160, 160)
         self.logoLabel.move(35, 14)
@@ -84,21 +83,15 @@ class ClimbingScreen(QWidget):
         frame = self.cameraSender.getFrame()
         if frame is None:
             return
+        # the frame is cropped and resized straight out of the camera's frame ring into the live feed's display buffer, and the
+        # skeleton is drawn on that, at the screen's resolution
+        displayFrame = self.liveFeed.showFrame(frame)
+        if displayFrame is None:
+            return
         if self.poseEstimatorModelLoaded:
-            frame = self.drawSkeleton(frame, self.keypoints, self.centerOfGravity)
+            self.drawSkeleton(displayFrame, self.keypoints, self.centerOfGravity)
         else:
             logging.info("Pose estimator model not loaded yet")
-        # Convert image to QImage and display it in the QLabel
-        frame = QImage(frame, frame.shape[1], frame.shape[0], QImage.Format_BGR888)
-        # Convert the QImage to a QPixmap
-        pixmap = QPixmap(frame)
-        # pixmap=QPixmap.scaledToWidth(pixmap, round(self.width()*0.9), Qt.SmoothTransformation)
-        frameRect = QRect(0,int((pixmap.height()-self.height())//2),self.width(),self.height())
-        pixmap=pixmap.copy(frameRect)
-
-        # Display the QImage in the QLabel
-        self.liveFeed.setPixmap(pixmap)
-        pass
 
     @pyqtSlot(np.ndarray, tuple, tuple)
     def onInferenceSignal(self, keypoints, centerOfGravity, armAngles):
@@ -162,10 +155,10 @@ class ClimbingScreen(QWidget):
 
     def drawSkeleton(self, frame, keypoints, centerOfGravity, threshold=0.3) -> np.ndarray:
         """
-        Draw the detected skeleton on a given frame.
+        Draw the detected skeleton on the live feed's display buffer.
 
         Args:
-        frame (numpy.ndarray): The frame to draw the skeleton on.
+        frame (numpy.ndarray): The display buffer to draw the skeleton on, as returned by the live feed's showFrame.
         keypoints (list): List of keypoints (e.g., [[x, y, score], ...]), typically from the MoveNet model.
         centerOfGravity (tuple): The position of the center of gravity (e.g., (x, y)).
         threshold (float): Minimum confidence score for a keypoint to be considered. Defaults to 0.3.
@@ -176,17 +169,19 @@ class ClimbingScreen(QWidget):
         if keypoints is None:
             # print("No keypoints detected")
             return frame
+
+        # keypoints are (y, x) fractions of the camera frame, which the display buffer shows cropped and resized
+        def point(keypoint):
+            return self.liveFeed.mapPoint(keypoint[1], keypoint[0])
+
         for keypoint in keypoints:
-            x, y, score = keypoint[0], keypoint[1], keypoint[2]
+            score = keypoint[2]
             if score > threshold:
-                cv2.circle(frame, (int(y * frame.shape[1]), int(x * frame.shape[0])), 5, (0, 255, 0), -1)
+                cv2.circle(frame, point(keypoint), 5, (0, 255, 0), -1)
 
         # Draw center of gravity
         if centerOfGravity != (None, None):
-            cgX, cgY = centerOfGravity
-            cgX = int(cgX * frame.shape[0])
-            cgY = int(cgY * frame.shape[1])
-            cv2.circle(frame, (cgY, cgX), 5, (0, 0, 255), -1)
+            cv2.circle(frame, point(centerOfGravity), 5, (0, 0, 255), -1)
 
         # Draw lines for arms
         leftShoulder = keypoints[5]
@@ -198,14 +193,14 @@ class ClimbingScreen(QWidget):
         rightWrist = keypoints[10]
 
         if all(keypoint[2] > threshold for keypoint in [leftShoulder, leftElbow]):
-            cv2.line(frame, (int(leftShoulder[1] * frame.shape[1]), int(leftShoulder[0] * frame.shape[0])), (int(leftElbow[1] * frame.shape[1]), int(leftElbow[0] * frame.shape[0])), (0, 255, 0), 2)
+            cv2.line(frame, point(leftShoulder), point(leftElbow), (0, 255, 0), 2)
         if all(keypoint[2] > threshold for keypoint in [leftElbow, leftWrist]):       
-            cv2.line(frame, (int(leftElbow[1] * frame.shape[1]), int(leftElbow[0] * frame.shape[0])), (int(leftWrist[1] * frame.shape[1]), int(leftWrist[0] * frame.shape[0])), (0, 255, 0), 2)
+            cv2.line(frame, point(leftElbow), point(leftWrist), (0, 255, 0), 2)
 
         if all(keypoint[2] > threshold for keypoint in [rightShoulder, rightElbow]):
-            cv2.line(frame, (int(rightShoulder[1] * frame.shape[1]), int(rightShoulder[0] * frame.shape[0])), (int(rightElbow[1] * frame.shape[1]), int(rightElbow[0] * frame.shape[0])), (0, 255, 0), 2)
+            cv2.line(frame, point(rightShoulder), point(rightElbow), (0, 255, 0), 2)
         if all(keypoint[2] > threshold for keypoint in [rightElbow, rightWrist]):       
-            cv2.line(frame, (int(rightElbow[1] * frame.shape[1]), int(rightElbow[0] * frame.shape[0])), (int(rightWrist[1] * frame.shape[1]), int(rightWrist[0] * frame.shape[0])), (0, 255, 0), 2)
+            cv2.line(frame, point(rightElbow), point(rightWrist), (0, 255, 0), 2)
         
         return frame
     
@@ -0,0 +1,81 @@
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QImage, QPainter
+
+
+class FrameView(QWidget):
+    """
+    Shows camera frames filling the widget. Each frame is cropped to the widget's aspect ratio, centred, and resized once into a
+    buffer the size of the widget, which a QImage wraps without copying and paintEvent draws as it is. Drawing on the frame, e.g.
+    the skeleton, is done on the buffer with mapPoint, after showFrame and before the widget is painted.
+    """
+
+    def __init__(self, parent=None):
+        super(FrameView, self).__init__(parent)
+        self.buffer = None # display sized BGR frame
+        self.image = None # QImage sharing the buffer's memory
+        self.crop = None # (x, y, width, height) of the frame the buffer shows
+        self.frameSize = None # (width, height) of the frames
+
+    def showFrame(self, frame) -> np.ndarray:
+        """
+        Crops and resizes a BGR frame into the display buffer, and schedules a repaint. The frame is not kept, so it can be
+        reused, e.g. the camera's frame ring.
+
+        Returns:
+            np.ndarray: The display buffer, to draw on before the widget is painted, or None if the widget has no area, e.g. before
+                it is laid out.
+        """
+        width, height = self.width(), self.height()
+        if width == 0 or height == 0:
+            return None
+        if self.buffer is None or self.buffer.shape[:2] != (height, width):
+            self.buffer = np.zeros((height, width, 3), dtype=np.uint8)
+            # the stride is given explicitly, QImage otherwise expects lines aligned to 4 bytes
+            self.image = QImage(self.buffer.data, width, height, self.buffer.strides[0], QImage.Format_BGR888)
+            self.crop = None
+
+        frameHeight, frameWidth = frame.shape[:2]
+        if self.crop is None or self.frameSize != (frameWidth, frameHeight):
+            self.frameSize = (frameWidth, frameHeight)
+            # largest centred part of the frame with the widget's aspect ratio
+            cropWidth = min(frameWidth, round(frameHeight * width / height))
+            cropHeight = min(frameHeight, round(frameWidth * height / width))
+            self.crop = ((frameWidth - cropWidth) // 2, (frameHeight - cropHeight) // 2, cropWidth, cropHeight)
+
+        x, y, cropWidth, cropHeight = self.crop
+        cropped = frame[y:y + cropHeight, x:x + cropWidth]
+        if (cropWidth, cropHeight) == (width, height):
+            np.copyto(self.buffer, cropped)
+        else:
+            # linear rather than area interpolation when shrinking too, area is several times slower for a barely visible difference
+            cv2.resize(cropped, (width, height), dst=self.buffer, interpolation=cv2.INTER_LINEAR)
+
+        self.update()
+        return self.buffer
+
+    def mapPoint(self, x, y) -> tuple:
+        """
+        Maps a point of the last frame shown, as fractions of the frame's width and height, e.g. a MoveNet keypoint, to a pixel of
+        the display buffer.
+
+        Returns:
+            tuple: (x, y) pixel of the buffer, which may be outside it if the point was cropped.
+        """
+        frameWidth, frameHeight = self.frameSize
+        cropX, cropY, cropWidth, cropHeight = self.crop
+        return (int((x * frameWidth - cropX) * self.buffer.shape[1] / cropWidth),
+                int((y * frameHeight - cropY) * self.buffer.shape[0] / cropHeight))
+
+    def clear(self):
+        self.image = None
+        self.buffer = None
+        self.update()
+
+    def paintEvent(self, event):
+        if self.image is None:
+            return
+        painter = QPainter(self)
+        painter.drawImage(0, 0, self.image)
+        painter.end()
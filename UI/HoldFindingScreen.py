@@ -1,10 +1,10 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QStackedLayout
-from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import QTimer, Qt, pyqtSignal, pyqtSlot, QRect, QSize
+from PyQt5.QtCore import QTimer, Qt, pyqtSignal, pyqtSlot
+from UI.AssetCache import getPixmap
+from UI.FrameView import FrameView
 import cv2, numpy as np, csv
+from DataCapture.ColumnStore import convertCsv
 
-from object_detection.utils import label_map_util, visualization_utils as viz_utils
-from object_detection.utils import ops as utils_ops
 
 class HoldFindingScreen(QWidget):
     holdsFoundSignal = pyqtSignal()
@@ -20,9 +20,7 @@ class HoldFindingScreen(QWidget):
         self.stackedLayout.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # Create labels for live feed and clear area image  
-        self.liveFeed = QLabel(self)
-        self.liveFeed.setScaledContents(True)
-        self.liveFeed.setAlignment(Qt.AlignCenter)
+        self.liveFeed = FrameView(self)
 
         # Add the live feed and overlay layouts to the stacked layout
         self.stackedLayout.addWidget(self.liveFeed)
@@ -32,7 +30,7 @@ class HoldFindingScreen(QWidget):
 
         # Add the logo to the top left corner
         self.logoLabel = QLabel(self)
-        self.logoLabel.setPixmap(QPixmap("UI/UIAssets/logo.png").scaledToWidth(160, Qt.SmoothTransformation))
+        self.logoLabel.setPixmap(getPixmap("UI/UIAssets/logo.png", width=160))
         self.logoLabel.setStyleSheet("background-color: transparent;")
         self.logoLabel.setFixedSize(160, 160)
         self.logoLabel.move(35, 14)
@@ -40,7 +38,7 @@ class HoldFindingScreen(QWidget):
         # clear area image
         self.clearAreaLabel = QLabel(self)
         self.clearAreaLabel.setFixedSize(parent.width()//2, parent.height()//2)
-        clearAreaImage = QPixmap.scaledToWidth(QPixmap("UI/UIAssets/ClearArea.png"), parent.width()//2, Qt.SmoothTransformation)
+        clearAreaImage = getPixmap("UI/UIAssets/ClearArea.png", width=parent.width()//2)
         self.clearAreaLabel.setPixmap(clearAreaImage)
         self.clearAreaLabel.setAlignment(Qt.AlignCenter)
         self.clearAreaLabel.setStyleSheet("background-color: 'transparent';")
@@ -56,6 +54,7 @@ class HoldFindingScreen(QWidget):
         self.statusLabel.setAlignment(Qt.AlignCenter)
         self.statusLabel.setStyleSheet(" background-color: 'transparent';")
         self.statusLabel.move(parent.width() - self.statusLabel.width() - 40, 20)
+        self.statusImage = None
 
         # Set up the camera sender
         self.cameraSender = parent.cameraSender
@@ -90,22 +89,14 @@ class HoldFindingScreen(QWidget):
             frameData = self.cameraSender.getFrame()
 
             if frameData is not None:
-                # Convert the frame data to a QImage
-                frame = QImage(frameData, self.cameraSender.resolution[0], self.cameraSender.resolution[1], QImage.Format_BGR888)
-                # Convert the QImage to a QPixmap
-                pixmap = QPixmap(frame)
-                # pixmap=QPixmap.scaledToWidth(pixmap, round(self.width()*0.9), Qt.SmoothTransformation)
-                frameRect = QRect(0,int((pixmap.height()-self.height())//2),self.width(),self.height())
-                pixmap=pixmap.copy(frameRect)
-
-                # Display the QImage in the QLabel
-                self.liveFeed.setPixmap(pixmap)
+                # cropped and resized straight out of the camera's frame ring into the live feed's display buffer
+                self.liveFeed.showFrame(frameData)
 
             else:
                 # If the frame is empty, display a black screen
-                self.liveFeed.setPixmap(QPixmap())
+                self.liveFeed.clear()
         else:
-            self.liveFeed.setPixmap(self.framePixmapWithHolds)
+            # the frame with the holds was shown once when they were found
             self.clearAreaLabel.hide()
             # self.holdsFoundSignal.emit
 
@@ -114,14 +105,20 @@ class HoldFindingScreen(QWidget):
             # self.statusLabel.move((self.parent.width() - self.statusLabel.width()) // 2,
             #                         self.parent.height() - self.statusLabel.height() - 40)
             if not self.holdsFound:
-                self.statusLabel.setPixmap(QPixmap("UI/UIAssets/FindingHolds.png").scaledToWidth(self.statusLabel.width(), Qt.SmoothTransformation))
+                self.setStatusImage("UI/UIAssets/FindingHolds.png")
             else:
-                self.statusLabel.setPixmap(QPixmap("UI/UIAssets/HoldsFound.png").scaledToWidth(self.statusLabel.width(), Qt.SmoothTransformation))
+                self.setStatusImage("UI/UIAssets/HoldsFound.png")
         else:
             # self.statusLabel.setFixedSize((self.parent.width()*2)//4, self.parent.height()//8)
             # self.statusLabel.move((self.parent.width() - self.statusLabel.width()) // 2,
             #                         self.parent.height() - self.statusLabel.height() - 40)
-            self.statusLabel.setPixmap(QPixmap("UI/UIAssets/LoadingModel.png").scaledToWidth(self.statusLabel.width(), Qt.SmoothTransformation))
+            self.setStatusImage("UI/UIAssets/LoadingModel.png")
+
+    def setStatusImage(self, image):
+        # called on every frame, the label is only updated when the status changes
+        if image != self.statusImage:
+            self.statusImage = image
+            self.statusLabel.setPixmap(getPixmap(image, width=self.statusLabel.width()))
 
     @pyqtSlot(bool)
     def handleCameraConnection(self, connected):
@@ -176,7 +173,8 @@ class HoldFindingScreen(QWidget):
     def findHolds(self):
         # This function is called after the 3-second timer
         # Connect to the FindHolds function with the most recent frame
-        frame = self.cameraSender.getFrame()
+        # copy the frame out of the camera's frame ring, since the holds are drawn on it
+        frame = self.cameraSender.getFrame().copy()
         # convert the frame to a jpg image
         # frame = cv2.imencode('.jpg', frame)[1].tobytes()
         # Call FindHolds function with the frame as an argument
@@ -191,16 +189,18 @@ class HoldFindingScreen(QWidget):
         numHolds = 9
         frameWithHolds = self.holdFindingThread.getImageWithHoldsVolumes(frame, self.detections, minScore) # expects a numpy array
         
-        # Convert image to QImage
-        height, width, channel = frameWithHolds.shape
-        bytesPerLine = 3 * width
-        qImage = QImage(frame.data, width, height, bytesPerLine, QImage.Format_BGR888)
-        self.framePixmapWithHolds = QPixmap(qImage)
+        self.liveFeed.showFrame(frameWithHolds)
         
         # self.getImageWithHoldsVolumes(frame, self.detections, minScore)
         if self.detections is not None:
             self.holdsFound = True
-            self.holdFindingThread.saveDetections(self.detections, frame, maxHolds=numHolds, threshold=minScore)
+            # save the holds to the climber's session, where the pose estimator and the climb analyser read them from
+            session = self.parent.currentSession
+            self.holdFindingThread.saveDetections(self.detections, frame, maxHolds=numHolds, threshold=minScore,
+                                                  path=session.getPath("holdCoordinates"))
+            session.addFile("holdCoordinates")
+            convertCsv(session.getPath("holdCoordinates"), session.getPath("holdCoordinatesColumns"))
+            session.addFile("holdCoordinatesColumns")
             QTimer.singleShot(3000, self.holdsFoundSignal.emit)
     
     def reset(self):
@@ -1,11 +1,12 @@
 from PyQt5.QtCore import pyqtSlot, QTimer, Qt, pyqtSignal, QRectF
 from PyQt5.QtGui import QFont, QPixmap, QImage, QColor, QLinearGradient, QPainter, QPainterPath, QBrush
 from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QGraphicsDropShadowEffect, QDialog, QStackedLayout
+from UI.AssetCache import getPixmap
 
 
 class ResultsScreen(QWidget):
     timeoutSignal = pyqtSignal()
-    def __init__(self, climberName = "", climbSuccessful = False, parent=None):
+    def __init__(self, climberName = "", climbSuccessful = False, parent=None, session=None, liveMetrics=None):
         super().__init__(parent)
 
         # Set up the layout
@@ -25,7 +26,7 @@ class ResultsScreen(QWidget):
 
         # Add the logo to the top left corner
         self.logoLabel = QLabel(self)
-        self.logoLabel.setPixmap(QPixmap("UI/UIAssets/logo.png").scaledToWidth(120, Qt.SmoothTransformation))
+        self.logoLabel.setPixmap(getPixmap("UI/UIAssets/logo.png", width=120))
         self.logoLabel.setStyleSheet("background-color: transparent;")
         self.logoLabel.setFixedSize(120, 120)
         self.logoLabel.move(35, 35)
@@ -33,6 +34,9 @@ class ResultsScreen(QWidget):
 
         self.climbSuccessful = climbSuccessful
         self.climberName = climberName
+        self.session = session # the climb's session, the analysis reads its data from it
+        self.tipBoxWidget = None
+        self.tipSubmetric = None
 
         self.mainLayout.addWidget(self.climbFinishedLabel, alignment=Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
 
@@ -88,17 +92,38 @@ class ResultsScreen(QWidget):
         self.exitTimer.setSingleShot(True)
         self.exitTimer.timeout.connect(self.exitClimbingScreen)
 
-        # start a 0 second timer to start climbing analysis, connect the signal from the climbanalyser to update the metrics
+        self.climbAnalyser = ClimbAnalyserThread(self.climberName, self.climbSuccessful, self, session=self.session)
+        self.climbAnalyser.ClimbAnalysisComplete.connect(self.updateMetrics)
+        # the scores of the live analysis are shown straight away, before the screen is first drawn
+        self.showLiveMetrics(liveMetrics)
+
+        # start a 0 second timer to start climbing analysis of the saved climb data, which refines the live scores,
+        # connect the signal from the climbanalyser to update the metrics
         self.startTimer = QTimer(self)
         self.startTimer.setSingleShot(True)
         self.startTimer.timeout.connect(self.startClimbAnalysis)
-        self.startTimer.start(4000)
+        self.startTimer.start(0)
 
     def startClimbAnalysis(self):
-        self.climbAnalyser = ClimbAnalyserThread(self.climberName, self.climbSuccessful, self)
-        self.climbAnalyser.ClimbAnalysisComplete.connect(self.updateMetrics)
         self.climbAnalyser.start()
 
+    def showLiveMetrics(self, liveMetrics):
+        """
+        Shows the scores calculated from the features the live analysis computed while the climb was recorded
+        (see AnalyseClimb/LiveMetrics.py). Keeps the loading animation if there is no live analysis.
+        """
+        if liveMetrics is None:
+            return
+        try:
+            features = liveMetrics.getFeatures(self.climbSuccessful)
+            if features is None:
+                return
+            self.climbAnalyser.analyse(features)
+        except Exception as e:
+            print("Could not analyse the climb live, waiting for the saved climb data: ", e)
+            return
+        self.showMetrics()
+
     def onTipButtonClicked(self):
         # TODO: Implement the goToTip method to display a climbing tip
         self.timer.stop()
@@ -124,6 +149,16 @@ class ResultsScreen(QWidget):
     def updateMetrics(self):
         """
         Update the metrics with the results from the climb analysis, called when the climb analysis is complete
+        Saves the climbing score to the leaderboard
+        """
+        self.showMetrics()
+
+        # save the climbing score to the leaderboard
+        self.climbAnalyser.saveClimbRecord()
+
+    def showMetrics(self):
+        """
+        Shows the results of the climb analysis, from the live analysis or from the saved climb data
         Makes the tip button visible and clickable
         """
 
@@ -146,24 +181,37 @@ class ResultsScreen(QWidget):
         lowestWeightedSubmetric = self.climbAnalyser.getLowestWeightedSubmetric()
         climbingTip = self.climbAnalyser.getClimbingTip()
 
-        self.pressureWidget.updateImage(pressureVisualisation)
-        self.pressureWidget.updateScore(pressureSubmetrics)
-
-        self.progressWidget.updateImage(progressVisualisation)
-        self.progressWidget.updateScore(progressSubmetrics)
-
-        self.positioningWidget.updateImage(positioningVisualisation)
-        self.positioningWidget.updateScore(positioningSubmetrics)
+        self.updateMetricWidget(self.pressureWidget, pressureSubmetrics, pressureVisualisation, "UI/UIAssets/pressure_placeholder.png")
+        self.updateMetricWidget(self.progressWidget, progressSubmetrics, progressVisualisation, "UI/UIAssets/progress_placeholder.png")
+        self.updateMetricWidget(self.positioningWidget, positioningSubmetrics, positioningVisualisation, "UI/UIAssets/position_placeholder.png")
 
-        # save the climbing score to the leaderboard
-        self.climbAnalyser.saveClimbRecord()
+        # keep the tip that is already shown if the refined scores have the same area of improvement
+        currentIndex = self.stackedLayout.currentIndex()
+        if self.tipBoxWidget is not None:
+            if self.tipSubmetric == lowestWeightedSubmetric:
+                return
+            self.stackedLayout.removeWidget(self.tipBoxWidget)
+            self.tipBoxWidget.deleteLater()
 
+        self.tipSubmetric = lowestWeightedSubmetric
         self.tipDialog = TipDialog(lowestWeightedSubmetric, climbingTip, self)
         self.tipHBoxLayout = QHBoxLayout()
         self.tipHBoxLayout.addWidget(self.tipDialog, alignment=Qt.AlignmentFlag.AlignCenter)
         self.tipBoxWidget = QWidget()
         self.tipBoxWidget.setLayout(self.tipHBoxLayout)
         self.stackedLayout.insertWidget(1, self.tipBoxWidget)
+        self.stackedLayout.setCurrentIndex(currentIndex)
+
+    def updateMetricWidget(self, widget, submetrics, visualisation, placeholder):
+        """
+        Shows a metric's scores and visualisation, or a placeholder if the metric did not finish in time (submetrics is None)
+        and no score is shown for it yet, e.g. from the live analysis
+        """
+        if submetrics is not None:
+            widget.updateImage(visualisation)
+            widget.updateScore(submetrics)
+        elif not widget.hasScore:
+            widget.showPlaceholder(placeholder)
 
     def setCurrentClimber(self, climberName):
         self.climberName = climberName
@@ -218,7 +266,7 @@ class MetricWidget(QWidget):
         self.labelLayout= QHBoxLayout()
         self.labelLayout.setAlignment(Qt.AlignCenter)
         labelLogo = QLabel(self)
-        labelLogo.setPixmap(QPixmap(f"UI/UIAssets/{metric}Icon.png").scaledToWidth(40, Qt.SmoothTransformation))
+        labelLogo.setPixmap(getPixmap(f"UI/UIAssets/{metric}Icon.png", width=40))
         # labelLogo.setPixmap(QPixmap(f"UI/UIAssets/logo.png").scaledToWidth(40, Qt.SmoothTransformation))
         labelText = QLabel(metric, self)
         labelText.setStyleSheet("font-size: 24px; color: #ffffff; font-family: 'Bungee'; text-align: left;")
@@ -226,6 +274,7 @@ class MetricWidget(QWidget):
         labelText.setFixedHeight(40)
 
         self.scoreLabel = QLabel(str(score))
+        self.hasScore = False # True once the metric's scores have been shown
         self.scoreLabel.setFixedWidth(60)
         self.scoreLabel.setStyleSheet("font-size: 28px; color: #ffffff; font-family: 'DM Sans'; font-weight: bold;")
         self.scoreLabel.setAlignment(Qt.AlignmentFlag.AlignRight)
@@ -248,7 +297,7 @@ class MetricWidget(QWidget):
         self.image = QLabel()
         self.image.setStyleSheet("background-color: 'transparent'; border-radius: 15px")
         # self.image.setPixmap(QPixmap(image).scaledToHeight(270, Qt.SmoothTransformation))
-        self.image.setPixmap(QPixmap(image).scaledToWidth(300, Qt.SmoothTransformation))
+        self.image.setPixmap(getPixmap(image, width=300))
         self.image.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.image, alignment=Qt.AlignmentFlag.AlignCenter)
 
@@ -291,16 +340,25 @@ class MetricWidget(QWidget):
             image (numpy array): the image to be displayed
         """
         #decode the image
-        imagePixmap = QPixmap(image)
         #imagePixmap = QPixmap.fromImage(QImage(image.data, image.shape[1], image.shape[0], QImage.Format_RGB888))
-        self.image.setPixmap(imagePixmap.scaledToHeight(250, Qt.SmoothTransformation))
+        self.image.setPixmap(getPixmap(image, height=250))
 
     def updateScore(self, scoreList):
         self.scoreLabel.setText(str(round(scoreList[0])))
+        self.hasScore = True
 
         for i in [0,len(self.submetricWidgetsList)-1]:
             self.submetricWidgetsList[i].updateScore(scoreList[i+1])
 
+    def showPlaceholder(self, image):
+        """
+        show a placeholder image and no scores, for a metric that could not be calculated
+        """
+        self.updateImage(image)
+        self.scoreLabel.setText("-")
+        for submetricWidget in self.submetricWidgetsList:
+            submetricWidget.scoreLabel.setText("-")
+
     
 
     class SubMetric(QWidget):
@@ -1,22 +1,24 @@
 
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QProgressBar
 from PyQt5.QtGui import QPixmap, QFont
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QTimer, pyqtSignal
+from UI.AssetCache import getPixmap
 import os
 
 
 
 class SplashScreen(QWidget):
+    firstPainted = pyqtSignal() # the splash screen is on screen, the app can start loading
     def __init__(self, parent=None):
         super().__init__()
+        self.painted = False
 
         # Set window properties
 
         # Create logo label
-        splashImage = QPixmap("UI/UIAssets/logo.png")
         self.imageLabel = QLabel(self)
         self.imageLabel.setAlignment(Qt.AlignHCenter)
-        self.imageLabel.setPixmap(splashImage.scaled(QSize(int(parent.width()*0.6), int(parent.height()*0.6)), Qt.AspectRatioMode.KeepAspectRatio, Qt.SmoothTransformation))
+        self.imageLabel.setPixmap(getPixmap("UI/UIAssets/logo.png", width=int(parent.width()*0.6), height=int(parent.height()*0.6)))
 
         # Create progress bar
         self._progressBar = QProgressBar(self)
@@ -29,7 +31,7 @@ class SplashScreen(QWidget):
         self._progressBar.setFixedWidth(int(parent.width()*0.65))
         self._progressBar.setFixedHeight(20)
         self._progressBar.setAlignment(Qt.AlignHCenter)
-        self._progressBar.setValue(30)
+        self._progressBar.setValue(0)
 
         # Create text label
         self.splashText = QLabel(self)
@@ -50,6 +52,13 @@ class SplashScreen(QWidget):
         layout.addStretch(1)
         self.setLayout(layout)
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            # after this frame has been drawn
+            QTimer.singleShot(0, self.firstPainted.emit)
+
     def getProgress(self):
         return self._progressBar.value()
     
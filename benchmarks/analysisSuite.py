@@ -0,0 +1,187 @@
+"""
+Benchmark of the climb analysis on synthetic climbs (see benchmarks/syntheticClimb.py) of increasing length: every metric
+function of AnalyseClimb/Pressure.py, Positioning.py and Progress.py, every feature they share, loading a climb from its session
+and scoring it as ClimbAnalyserThread.run does, and feeding it through the live analysis (AnalyseClimb/LiveMetrics.py).
+
+Each case is timed on fresh features, so nothing is served from the cache of a previous run, and its peak memory is measured
+with tracemalloc in a separate run. The growth of each case's time from one length to the next is reported as an exponent, 1
+being linear, so quadratic hot spots show up before they reach the wall. Results can be saved with --json and compared with a
+previous run with --compare.
+
+Run from the repository root:
+    python -m benchmarks.analysisSuite
+    python -m benchmarks.analysisSuite -s 30 120 480 --holds 9 30 --json before.json
+    python -m benchmarks.analysisSuite --compare before.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from AnalyseClimb import Pressure, Positioning, Progress, Scoring
+from AnalyseClimb.ClimbFeatures import ClimbFeatures, FEATURES
+from AnalyseClimb.LiveMetrics import LiveClimbMetrics
+from benchmarks.syntheticClimb import generateClimb, saveSession
+
+SCALING_WARNING = 1.5 # growth exponent above which a case is flagged
+REGRESSION_WARNING = 1.25 # slowdown against --compare above which a case is flagged
+
+
+def metricCases(climbData, holdsCoordinates, forceData, climbSuccessful, sessionsDirectory) -> dict:
+    """
+    Returns the cases to time on a climb: functions of fresh ClimbFeatures, so every run computes everything it needs.
+    """
+    def fresh():
+        return ClimbFeatures(climbData, holdsCoordinates, forceData, climbSuccessful)
+
+    def liveAnalysis(features):
+        liveMetrics = LiveClimbMetrics(holdsCoordinates, climbSuccessful)
+        for row in climbData.to_dict('records'):
+            liveMetrics.addKeypoints(row)
+        for row in forceData.to_numpy():
+            liveMetrics.addForce(row)
+        return liveMetrics.getFeatures()
+
+    session = saveSession(climbData, forceData, holdsCoordinates, root=sessionsDirectory, climbSuccessful=climbSuccessful)
+
+    cases = {f"feature {name}": (lambda name: lambda features: features[name])(name) for name in FEATURES}
+    cases.update({
+        "Pressure.calculatePressure": lambda features: Pressure.calculatePressure(forceData, features),
+        "Pressure.visualisePressure": lambda features: Pressure.visualisePressure(forceData, Pressure.calculatePressure(forceData, features), features),
+        "Positioning.calculatePosition": lambda features: Positioning.calculatePosition(climbData, holdsCoordinates, features),
+        "Positioning.visualisePosition": lambda features: Positioning.visualisePosition(climbData, features),
+        "Progress.calculateProgress": lambda features: Progress.calculateProgress(climbData, holdsCoordinates, climbSuccessful, forceData, features),
+        "Progress.visualiseProgress": lambda features: Progress.visualiseProgress(climbData, holdsCoordinates, climbSuccessful, features),
+        # what ClimbAnalyserThread.run does, without Qt
+        "Scoring.loadClimbFeatures": lambda features: Scoring.loadClimbFeatures(session, climbSuccessful=climbSuccessful),
+        "Scoring.scoreClimb": lambda features: Scoring.scoreClimb(features),
+        "analyser thread": lambda features: Scoring.scoreClimb(Scoring.loadClimbFeatures(session, climbSuccessful=climbSuccessful)),
+        "live analysis": liveAnalysis,
+    })
+    return {name: (fresh, case) for name, case in cases.items()}
+
+
+def timeCase(fresh, case, iterations) -> tuple:
+    """
+    Returns the best time of a case in ms and its peak memory in bytes, or raises what the case raised.
+    """
+    times = []
+    for _ in range(iterations):
+        features = fresh()
+        startTime = time.perf_counter()
+        case(features)
+        times.append((time.perf_counter() - startTime) * 1000)
+
+    features = fresh()
+    tracemalloc.start()
+    try:
+        case(features)
+        _, peakBytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peakBytes
+
+
+def runSuite(durations, holdCounts, iterations, poseRate, forceRate, verbose=False, seed=0) -> list:
+    """
+    Times every case on a climb of each duration and hold count.
+
+    Returns:
+        list: A dict per case and climb, with its "case", "seconds", "holds", "frames", "forceReadings", and its "timeMs" and
+            "peakKiB", or the "error" it raised.
+    """
+    results = []
+    sessionsDirectory = tempfile.mkdtemp()
+    devnull = open(os.devnull, 'w')
+    try:
+        for numHolds in holdCounts:
+            for seconds in durations:
+                climbData, forceData, holdsCoordinates = generateClimb(seconds, poseRate, forceRate, numHolds, seed=seed)
+                print(f"\n{seconds:.0f} s climb, {numHolds} holds: {len(climbData)} frames, {len(forceData)} force readings")
+                cases = metricCases(climbData, holdsCoordinates, forceData, False, sessionsDirectory)
+                for name, (fresh, case) in cases.items():
+                    result = {"case": name, "seconds": seconds, "holds": numHolds, "frames": len(climbData),
+                              "forceReadings": len(forceData)}
+                    try:
+                        # the metrics print their intermediate values, which would bury the timings
+                        with contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+                            timeMs, peakBytes = timeCase(fresh, case, iterations)
+                        result.update(timeMs=timeMs, peakKiB=peakBytes / 1024)
+                        print(f"    {name:40} {timeMs:9.2f} ms {peakBytes / 1024:9.0f} KiB")
+                    except Exception as e:
+                        # the other cases still run
+                        result["error"] = f"{type(e).__name__}: {e}"
+                        print(f"    {name:40} failed: {result['error']}")
+                    results.append(result)
+    finally:
+        devnull.close()
+        shutil.rmtree(sessionsDirectory)
+    return results
+
+
+def scalingExponents(results) -> dict:
+    """
+    Returns the exponent of the growth of each case's time with the climb's length, by (case, holds), from a least squares fit
+    of log time against log frames. 1 is linear, 2 quadratic.
+    """
+    exponents = {}
+    keys = {(result["case"], result["holds"]) for result in results if "timeMs" in result}
+    for case, holds in sorted(keys):
+        points = [(result["frames"], result["timeMs"]) for result in results
+                  if result["case"] == case and result["holds"] == holds and "timeMs" in result]
+        if len(points) < 2:
+            continue
+        frames, times = np.log(np.array(points, dtype=np.float64).clip(1e-3)).T
+        exponents[(case, holds)] = float(np.polyfit(frames, times, 1)[0])
+    return exponents
+
+
+def compareResults(results, previous):
+    """
+    Prints the cases that got slower than in a previous run, on the same climbs.
+    """
+    previousTimes = {(result["case"], result["seconds"], result["holds"]): result["timeMs"] for result in previous if "timeMs" in result}
+    slower = 0
+    for result in results:
+        key = (result["case"], result["seconds"], result["holds"])
+        if "timeMs" not in result or key not in previousTimes:
+            continue
+        ratio = result["timeMs"] / max(previousTimes[key], 1e-6)
+        if ratio > REGRESSION_WARNING:
+            slower += 1
+            print(f"    {result['case']:40} {result['seconds']:.0f} s, {result['holds']} holds: "
+                  f"{previousTimes[key]:.2f} -> {result['timeMs']:.2f} ms ({ratio:.1f}x)")
+    print(f"{slower} cases are more than {REGRESSION_WARNING}x slower than in the previous run")
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Benchmark every metric of the climb analysis on synthetic climbs of increasing length.")
+    argParser.add_argument('-s', '--seconds', type=float, nargs='+', default=[30, 120, 480], help="Lengths of the climbs (default: 30 120 480)")
+    argParser.add_argument('--holds', type=int, nargs='+', default=[9], help="Numbers of holds (default: 9)")
+    argParser.add_argument('-p', '--pose-rate', type=float, default=7.5, help="Pose estimations per second (default: 7.5)")
+    argParser.add_argument('-f', '--force-rate', type=float, default=10, help="Force readings per second (default: 10)")
+    argParser.add_argument('-n', '--iterations', type=int, default=3, help="Runs per timing, the best is kept (default: 3)")
+    argParser.add_argument('--json', type=str, default=None, help="Save the results to this file")
+    argParser.add_argument('--compare', type=str, default=None, help="Results of a previous run to compare with")
+    argParser.add_argument('-v', '--verbose', action='store_true', help="Show what the metrics print")
+    args = argParser.parse_args()
+
+    results = runSuite(sorted(args.seconds), args.holds, args.iterations, args.pose_rate, args.force_rate, args.verbose)
+
+    print(f"\nGrowth of the time with the climb's length (1 is linear, flagged above {SCALING_WARNING}):")
+    for (case, holds), exponent in scalingExponents(results).items():
+        print(f"    {case:40} {holds:3} holds {exponent:5.2f}" + ("  <-- superlinear" if exponent > SCALING_WARNING else ""))
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compareResults(results, json.load(f)["results"])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"arguments": vars(args), "results": results}, f, indent=2)
+        print(f"Saved the results to {args.json}")
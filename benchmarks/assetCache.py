@@ -0,0 +1,69 @@
+"""
+Benchmark of the UI asset cache (UI/AssetCache.py): the time to get the status image HoldFindingScreen.updateLiveFeed shows on
+every camera frame, and the images a ResultsScreen shows for every climb, read and scaled from disk each time as the screens
+used to, against getPixmap. The cache's hit and miss counters are printed at the end.
+
+Run from the repository root:
+    python -m benchmarks.assetCache
+    python -m benchmarks.assetCache -n 300
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap
+
+from UI import AssetCache
+
+# the images and sizes the screens ask for, in a 1280x800 window
+FRAME_ASSETS = [("UI/UIAssets/FindingHolds.png", 320, None)]
+CLIMB_ASSETS = [("UI/UIAssets/logo.png", 120, None)] + \
+               [(f"UI/UIAssets/{metric}Icon.png", 40, None) for metric in ["Pressure", "Positioning", "Progress"]] + \
+               [("UI/UIAssets/position/Position_30_60.png", 300, None), ("UI/UIAssets/position/Position_30_60.png", None, 250)]
+
+
+def loadFromDisk(path, width, height) -> QPixmap:
+    # what the screens did before the cache
+    pixmap = QPixmap(path)
+    if width is not None:
+        return pixmap.scaledToWidth(width, Qt.SmoothTransformation)
+    return pixmap.scaledToHeight(height, Qt.SmoothTransformation)
+
+
+def timeAssets(getAsset, assets, iterations) -> float:
+    """
+    Returns the median time in ms to get every asset once.
+    """
+    times = []
+    for _ in range(iterations):
+        startTime = time.perf_counter()
+        for path, width, height in assets:
+            getAsset(path, width, height)
+        times.append((time.perf_counter() - startTime) * 1000)
+    return float(np.median(times))
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Benchmark the UI asset cache against reading the images from disk.")
+    argParser.add_argument('-n', '--iterations', type=int, default=100, help="Times each set of images is got (default: 100)")
+    args = argParser.parse_args()
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+
+    for label, assets in [("status image, per camera frame", FRAME_ASSETS), ("results screen images, per climb", CLIMB_ASSETS)]:
+        diskTime = timeAssets(loadFromDisk, assets, args.iterations)
+        AssetCache.clearCache()
+        startTime = time.perf_counter()
+        timeAssets(AssetCache.getPixmap, assets, 1)
+        firstTime = (time.perf_counter() - startTime) * 1000
+        cachedTime = timeAssets(AssetCache.getPixmap, assets, args.iterations)
+        print(f"{label}:")
+        print(f"    read and scaled from disk {diskTime:9.3f} ms")
+        print(f"    cache, first time         {firstTime:9.3f} ms")
+        print(f"    cache                     {cachedTime:9.3f} ms ({diskTime / max(cachedTime, 1e-6):.0f}x faster)")
+        print(f"    {AssetCache.getCacheStats()}")
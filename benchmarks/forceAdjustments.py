@@ -0,0 +1,101 @@
+"""
+Benchmark of the force data filters used by the pressure metric: the loops Pressure.detect_spikes and
+Pressure.calculate_adjustments used to be, against the NumPy versions, checking that they give the same results.
+
+Runs on data/forceData.csv, and on a synthetic climb of --seconds with spikes, zero runs and missing readings.
+
+Run from the repository root:
+    python -m benchmarks.forceAdjustments
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from AnalyseClimb import Pressure
+
+
+def legacyDetectSpikes(column):
+    # what Pressure.detect_spikes used to do
+    for i in range(1, len(column) - 1):
+        value = column[i]
+        if isinstance(value, (int, float)) and abs(value - column[i-1]) > 8000 and abs(value - column[i+1]) > 8000:
+            column[i] = column[i+1]
+    return column
+
+
+def legacyCalculateAdjustments(df):
+    # what Pressure.calculate_adjustments used to do
+    largest_std_dev = 0
+    for column in df.columns[1:]:
+        df[column] = legacyDetectSpikes(df[column])
+        non_zero_indices = df[column][df[column] != 0].index
+        for i in range(len(non_zero_indices) - 1):
+            start_index = non_zero_indices[i]
+            end_index = non_zero_indices[i + 1] + 1
+            non_zero_values = df[column][start_index:end_index]
+            if len(non_zero_values) > 2:
+                std_dev = np.std(non_zero_values)
+                if std_dev > largest_std_dev:
+                    largest_std_dev = std_dev
+    return largest_std_dev/1000*6
+
+
+def syntheticForceData(seconds, numHolds=9, seed=0) -> pd.DataFrame:
+    """
+    Force readings every 100 ms: each hold is pressed and let go of a few times, with load cell spikes (some of them in a row)
+    and missing readings.
+    """
+    rng = np.random.default_rng(seed)
+    rows = int(seconds * 10)
+    data = {"Time": np.arange(rows) * 100.0}
+    for hold in range(numHolds):
+        pressed = np.cumsum(rng.random(rows) < 0.05) % 2 == 1
+        force = np.where(pressed, rng.normal(3000, 800, rows).clip(0), 0.0)
+        spikes = rng.random(rows) < 0.01
+        force[spikes] += 20000
+        force[np.minimum(np.flatnonzero(spikes)[::3] + 1, rows - 1)] = 25000 # spikes in a row
+        force[rng.random(rows) < 0.005] = np.nan
+        data[f"hold{hold}"] = np.round(force, 2)
+    return pd.DataFrame(data)
+
+
+def compare(name, forceData, iterations):
+    legacyTime = time.perf_counter()
+    for _ in range(iterations):
+        legacySd = legacyCalculateAdjustments(forceData.copy())
+    legacyTime = (time.perf_counter() - legacyTime) / iterations * 1000
+
+    newTime = time.perf_counter()
+    for _ in range(iterations):
+        newSd = Pressure.calculate_adjustments(forceData.copy())
+    newTime = (time.perf_counter() - newTime) / iterations * 1000
+
+    legacyDespiked = forceData.copy()
+    for column in legacyDespiked.columns[1:]:
+        legacyDespiked[column] = legacyDetectSpikes(legacyDespiked[column])
+    despiked = Pressure.remove_spikes(forceData.copy())
+    sameSpikes = legacyDespiked.equals(despiked)
+
+    print(f"{name}: {len(forceData)} rows, spikes {'match' if sameSpikes else 'DIFFER'}, "
+          f"adjustment sd {legacySd:.6f} / {newSd:.6f} ({'match' if np.isclose(legacySd, newSd, rtol=1e-9) else 'DIFFER'})")
+    print(f"    legacy {legacyTime:8.2f} ms, NumPy {newTime:6.2f} ms, {legacyTime / newTime:.0f}x faster")
+    return sameSpikes and np.isclose(legacySd, newSd, rtol=1e-9)
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Benchmark the force spike filter and adjustment detector against the old loops.")
+    argParser.add_argument('-f', '--force-data', type=str, default="data/forceData.csv", help="Force data to check (default: data/forceData.csv)")
+    argParser.add_argument('-s', '--seconds', type=float, default=120, help="Length of the synthetic climb (default: 120)")
+    argParser.add_argument('-n', '--iterations', type=int, default=5, help="Runs per timing (default: 5)")
+    args = argParser.parse_args()
+
+    forceData = pd.read_csv(args.force_data)
+    allMatch = compare(args.force_data, forceData, args.iterations)
+    allMatch &= compare(f"synthetic {args.seconds:.0f} s climb", syntheticForceData(args.seconds), args.iterations)
+
+    # the pressure score as ClimbAnalyserThread calculates it
+    scores = Pressure.calculatePressure(forceData)
+    print(f"Pressure scores on {args.force_data}: {scores}")
+    if not allMatch:
+        raise SystemExit("The NumPy filters do not match the old loops")
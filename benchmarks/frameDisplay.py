@@ -0,0 +1,99 @@
+"""
+Benchmark of showing camera frames on screen, as ClimbingScreen and HoldFindingScreen do on every frame: the frame converted to
+a QImage, copied into a QPixmap, cropped with QPixmap.copy and scaled by a QLabel with setScaledContents, as the screens used
+to, against the FrameView (UI/FrameView.py), which crops with a NumPy view and resizes once into a buffer it paints as it is.
+
+Frames from the synthetic frame source are shown at the camera's frame rate for a while, each painted straight away, and the
+CPU time of the process is reported per frame and as a share of one core.
+
+Run from the repository root:
+    python -m benchmarks.frameDisplay
+    python -m benchmarks.frameDisplay -s 20 --resolution 1920 1080
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+WINDOW_SIZE = (1280, 800)
+
+
+class LabelView:
+    """
+    How the screens showed frames before the FrameView.
+    """
+    def __init__(self, parent):
+        from PyQt5.QtWidgets import QLabel
+        from PyQt5.QtCore import Qt
+        self.widget = QLabel(parent)
+        self.widget.setScaledContents(True)
+        self.widget.setAlignment(Qt.AlignCenter)
+
+    def showFrame(self, frame):
+        from PyQt5.QtCore import QRect
+        from PyQt5.QtGui import QImage, QPixmap
+        displayFrame = frame.copy()
+        pixmap = QPixmap(QImage(displayFrame, displayFrame.shape[1], displayFrame.shape[0], QImage.Format_BGR888))
+        frameRect = QRect(0, int((pixmap.height() - self.widget.height()) // 2), self.widget.width(), self.widget.height())
+        self.widget.setPixmap(pixmap.copy(frameRect))
+
+
+class FrameViewView:
+    def __init__(self, parent):
+        from UI.FrameView import FrameView
+        self.widget = FrameView(parent)
+
+    def showFrame(self, frame):
+        self.widget.showFrame(frame)
+
+
+def displayFrames(view, frames, fps, seconds) -> tuple:
+    """
+    Shows the frames over and over at fps for a number of seconds, painting each one straight away.
+
+    Returns:
+        tuple: CPU time per frame in ms, and the CPU time as a share of the time taken, 1 being one core.
+    """
+    numFrames = int(fps * seconds)
+    startTime = time.perf_counter()
+    startCpuTime = time.process_time()
+    for index in range(numFrames):
+        view.showFrame(frames[index % len(frames)])
+        view.widget.repaint()
+        # wait for the next frame, like the camera thread's frame signal
+        delay = startTime + (index + 1) / fps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    cpuTime = time.process_time() - startCpuTime
+    return cpuTime / numFrames * 1000, cpuTime / (time.perf_counter() - startTime)
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Benchmark showing camera frames on screen, before and after the FrameView.")
+    argParser.add_argument('-s', '--seconds', type=float, default=10, help="Seconds of frames shown by each view (default: 10)")
+    argParser.add_argument('--fps', type=float, default=30, help="Camera frame rate (default: 30)")
+    argParser.add_argument('--resolution', type=int, nargs=2, default=[1280, 720], help="Camera resolution (default: 1280 720)")
+    args = argParser.parse_args()
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication, QMainWindow
+    from DataCapture.FrameSources import SyntheticSource
+
+    # frames are made before timing, so drawing them is not timed
+    source = SyntheticSource(tuple(args.resolution), fps=args.fps, realTime=False)
+    frames = [source.read(None)[1] for _ in range(int(args.fps))]
+
+    app = QApplication(sys.argv[:1])
+    print(f"{args.resolution[0]}x{args.resolution[1]} frames at {args.fps:.0f} fps in a {WINDOW_SIZE[0]}x{WINDOW_SIZE[1]} window:")
+    for label, viewClass in [("QLabel, QPixmap copies", LabelView), ("FrameView", FrameViewView)]:
+        window = QMainWindow()
+        window.setFixedSize(*WINDOW_SIZE)
+        view = viewClass(window)
+        window.setCentralWidget(view.widget)
+        window.show()
+        app.processEvents()
+        frameTime, cpuShare = displayFrames(view, frames, args.fps, args.seconds)
+        print(f"    {label:24} {frameTime:7.2f} ms CPU per frame, {cpuShare * 100:5.1f}% of a core")
+        window.close()
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of MoveNet frame preprocessing: the old path, which allocates a new array at every step and copies the result
+into the input tensor with set_tensor, against writing the resized RGB frame straight into the input tensor.
+
+Run from the repository root:
+    python -m benchmarks.preprocessing
+"""
+import argparse
+import time
+import tracemalloc
+import cv2
+import numpy as np
+
+from DataCapture.MoveNet import writeResizedRGB
+
+INPUT_SIZES = {"lightning": 192, "thunder": 256}
+
+
+def legacyPreprocess(frame, inputSize, inputTensor):
+    # what PoseEstimatorThread.preprocessFrame and runInference used to do
+    inputFrame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    inputFrame = cv2.resize(inputFrame, (inputSize, inputSize))
+    inputFrame = np.expand_dims(inputFrame, axis=0)
+    inputFrame = inputFrame.astype(np.uint8)
+    np.copyto(inputTensor, inputFrame) # set_tensor copies the frame into the interpreter
+
+
+def inPlacePreprocess(frame, inputSize, inputTensor):
+    writeResizedRGB(frame, inputTensor[0])
+
+
+def timePreprocess(preprocess, frames, inputSize, iterations):
+    """
+    Returns the mean time per frame in ms, and the bytes allocated per frame.
+    """
+    inputTensor = np.zeros((1, inputSize, inputSize, 3), dtype=np.uint8) # stands in for the interpreter's input tensor
+    for frame in frames[:5]:
+        preprocess(frame, inputSize, inputTensor) # warm up
+
+    startTime = time.perf_counter()
+    for i in range(iterations):
+        preprocess(frames[i % len(frames)], inputSize, inputTensor)
+    frameTime = (time.perf_counter() - startTime) / iterations * 1000
+
+    tracemalloc.start()
+    preprocess(frames[0], inputSize, inputTensor)
+    _, peakBytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return frameTime, peakBytes
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Benchmark MoveNet frame preprocessing.")
+    argParser.add_argument('-n', '--iterations', type=int, default=500, help="Frames to preprocess per run (default: 500)")
+    argParser.add_argument('-W', '--width', type=int, default=1280, help="Camera frame width (default: 1280)")
+    argParser.add_argument('-H', '--height', type=int, default=720, help="Camera frame height (default: 720)")
+    args = argParser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(4)]
+
+    print(f"{args.width}x{args.height} frames, {args.iterations} iterations")
+    for model, inputSize in INPUT_SIZES.items():
+        legacyTime, legacyBytes = timePreprocess(legacyPreprocess, frames, inputSize, args.iterations)
+        inPlaceTime, inPlaceBytes = timePreprocess(inPlacePreprocess, frames, inputSize, args.iterations)
+        print(f"{model} ({inputSize}x{inputSize}):")
+        print(f"    legacy:   {legacyTime:.3f} ms/frame, {legacyBytes / 1024:.0f} KiB allocated per frame")
+        print(f"    in place: {inPlaceTime:.3f} ms/frame, {inPlaceBytes / 1024:.0f} KiB allocated per frame")
+        print(f"    saved:    {legacyTime - inPlaceTime:.3f} ms/frame ({(1 - inPlaceTime / legacyTime) * 100:.0f}%)")
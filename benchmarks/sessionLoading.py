@@ -0,0 +1,85 @@
+"""
+Benchmark of loading a climb for analysis: parsing the CSV files with pd.read_csv, as ClimbAnalyserThread used to, against
+memory-mapped column tables (DataCapture/ColumnStore.py), both as whole DataFrames and reading only the columns one metric needs.
+
+The data in data/ is tiled to the length of a full climb, see --seconds.
+
+Run from the repository root:
+    python -m benchmarks.sessionLoading
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from DataCapture.ColumnStore import LEGACY_CSV_ROLES, convertCsv, loadColumns
+
+# columns the arm bend metric reads, see AnalyseClimb/Positioning.py measure_arm_angle
+ARM_ANGLE_COLUMNS = ["Timestamp(ms)", "Left Arm Angle", "Right Arm Angle"]
+
+
+def tileCsv(csvPath, outputPath, rows):
+    """
+    Repeats the rows of a CSV file until it has the given number of rows, continuing the timestamps.
+    """
+    data = pd.read_csv(csvPath)
+    repeats = max(1, int(np.ceil(rows / len(data))))
+    tiled = pd.concat([data] * repeats, ignore_index=True).iloc[:rows]
+    timeColumn = data.columns[0]
+    if timeColumn in ("Timestamp(ms)", "Time"):
+        duration = data[timeColumn].iloc[-1] - data[timeColumn].iloc[0] + 1
+        tiled[timeColumn] = tiled[timeColumn] + np.repeat(np.arange(repeats) * duration, len(data))[:rows]
+    tiled.to_csv(outputPath, index=False)
+
+
+def timeLoad(load, iterations) -> float:
+    """
+    Returns the mean time per load in ms.
+    """
+    load() # warm up the page cache
+    startTime = time.perf_counter()
+    for _ in range(iterations):
+        load()
+    return (time.perf_counter() - startTime) / iterations * 1000
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Benchmark loading climb data from CSV files against column tables.")
+    argParser.add_argument('-d', '--data', type=str, default="data", help="Directory with output.csv, forceData.csv and holdCoordinates.csv (default: data)")
+    argParser.add_argument('-s', '--seconds', type=float, default=120, help="Length of the climb to tile the data to (default: 120)")
+    argParser.add_argument('-n', '--iterations', type=int, default=50, help="Loads per run (default: 50)")
+    args = argParser.parse_args()
+
+    # rows per second of a climb: keypoints at the default pose rate, force readings every 100 ms
+    rowsPerSecond = {"output.csv": 7.5, "forceData.csv": 10}
+
+    directory = tempfile.mkdtemp()
+    try:
+        csvPaths, tables = {}, {}
+        for csvName in LEGACY_CSV_ROLES:
+            csvPaths[csvName] = os.path.join(directory, csvName)
+            if csvName in rowsPerSecond:
+                tileCsv(os.path.join(args.data, csvName), csvPaths[csvName], int(args.seconds * rowsPerSecond[csvName]))
+            else:
+                shutil.copy(os.path.join(args.data, csvName), csvPaths[csvName])
+            tables[csvName] = convertCsv(csvPaths[csvName])
+
+        csvBytes = sum(os.path.getsize(path) for path in csvPaths.values())
+        tableBytes = sum(os.path.getsize(os.path.join(table, name)) for table in tables.values() for name in os.listdir(table))
+        print(f"{args.seconds:.0f} s climb: {len(pd.read_csv(csvPaths['output.csv']))} keypoint rows, "
+              f"{len(pd.read_csv(csvPaths['forceData.csv']))} force rows")
+        print(f"CSV files: {csvBytes / 1024:.0f} KiB, column tables: {tableBytes / 1024:.0f} KiB")
+
+        results = {
+            "pd.read_csv, all files": lambda: [pd.read_csv(path) for path in csvPaths.values()],
+            "column tables, all files": lambda: [loadColumns(table).toDataFrame() for table in tables.values()],
+            "pd.read_csv, arm angle columns": lambda: pd.read_csv(csvPaths["output.csv"], usecols=ARM_ANGLE_COLUMNS),
+            "column tables, arm angle columns": lambda: [np.asarray(loadColumns(tables["output.csv"])[column]) for column in ARM_ANGLE_COLUMNS],
+        }
+        for name, load in results.items():
+            print(f"{name:34} {timeLoad(load, args.iterations):7.2f} ms")
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,163 @@
+"""
+Benchmark of the kiosk's startup: how long the app takes to import, which modules that time goes to (from python -X importtime),
+whether any of the heavy dependencies that only some code paths need are imported at startup, and the time from launching the
+app to the first frame of the splash screen and to the lobby.
+
+Each launch is a fresh interpreter, so nothing is already imported. The app is run with the synthetic frame source by default,
+so no camera is needed, and with Qt's offscreen platform when there is no display.
+
+Run from the repository root:
+    python -m benchmarks.startupTime
+    python -m benchmarks.startupTime -n 5 --source camera
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+
+APP_MODULE = "ClimbingRocksApp"
+
+# dependencies that take a long time to import, and are only needed once the app is running: they should not be imported
+# before the splash screen is shown
+HEAVY_MODULES = ["tensorflow", "object_detection", "pandas", "matplotlib", "seaborn", "PIL", "scipy"]
+
+
+def importTimes(module=APP_MODULE) -> list:
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        list: A (name, self time in ms, cumulative time in ms, depth) tuple per imported module, in the order they finished
+            importing, depth 0 being the modules imported by the module itself.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not import {module}:\n{result.stderr.strip().splitlines()[-1]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        selfTime, cumulativeTime, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), int(selfTime) / 1000, int(cumulativeTime) / 1000, depth))
+    return modules
+
+
+def reportImports(modules, top):
+    totalTime = sum(selfTime for _, selfTime, _, _ in modules)
+    print(f"Importing {APP_MODULE}: {totalTime:.0f} ms, {len(modules)} modules")
+
+    # the packages the time goes to, with everything they import themselves
+    packages = {}
+    for name, selfTime, _, _ in modules:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + selfTime
+    print("Slowest packages:")
+    for package, packageTime in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"    {package:30} {packageTime:8.1f} ms")
+
+    heavy = [package for package in HEAVY_MODULES if package in packages]
+    if heavy:
+        print(f"Imported at startup, but only needed later: {', '.join(heavy)}")
+        # what pulls each of them in: the module imported just before each one at a lower depth
+        for package in heavy:
+            for index, (name, _, _, depth) in enumerate(modules):
+                if name == package:
+                    importer = next((other for other, _, _, otherDepth in modules[index + 1:] if otherDepth < depth), APP_MODULE)
+                    print(f"    {package} is imported by {importer}")
+                    break
+    else:
+        print(f"None of {', '.join(HEAVY_MODULES)} are imported at startup")
+    return totalTime
+
+
+def runApp(frameSourceArgs, timeout):
+    """
+    Starts the app, and prints the time it was imported, the splash screen first painted, and the lobby shown. Run in a fresh
+    interpreter by launchApp.
+    """
+    def report(event):
+        print(f"{event} {time.time()}", flush=True)
+
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+    from PyQt5.QtWidgets import QApplication
+    import ClimbingRocksApp
+    report("imported")
+
+    class SplashPaintWatcher(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Paint:
+                report("splash")
+                watched.removeEventFilter(self)
+            return False
+
+    app = QApplication(sys.argv[:1])
+    mainWindow = ClimbingRocksApp.MainWindow(frameSourceArgs=frameSourceArgs)
+    watcher = SplashPaintWatcher()
+    mainWindow.splashScreen.installEventFilter(watcher)
+    mainWindow.show()
+
+    def checkLobby():
+        if getattr(mainWindow, "lobbyScreen", None) is not None and mainWindow.centralWidget() is mainWindow.lobbyScreen:
+            report("lobby")
+            # the camera, hold finding and pose threads are still starting, nothing needs to be cleaned up
+            os._exit(0)
+    lobbyTimer = QTimer()
+    lobbyTimer.timeout.connect(checkLobby)
+    lobbyTimer.start(1)
+    QTimer.singleShot(int(timeout * 1000), lambda: os._exit(1))
+    app.exec_()
+
+
+def launchApp(source, timeout) -> dict:
+    """
+    Launches the app in a fresh interpreter.
+
+    Returns:
+        dict: Seconds from launching the app until it was "imported", the "splash" screen first painted, and the "lobby" shown.
+            Events that did not happen within the timeout are missing.
+    """
+    env = dict(os.environ)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    startTime = time.time()
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.startupTime", "--run-app", "--source", source,
+                                "--timeout", str(timeout)], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+    events = {}
+    for line in process.stdout:
+        event, _, eventTime = line.strip().rpartition(" ")
+        if event in ("imported", "splash", "lobby"):
+            events[event] = float(eventTime) - startTime
+    process.wait()
+    return events
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Benchmark the startup of the kiosk app.")
+    argParser.add_argument('-n', '--launches', type=int, default=3, help="Launches of the app, the median is reported (default: 3)")
+    argParser.add_argument('--source', type=str, choices=['camera', 'video', 'synthetic'], default='synthetic',
+                           help="Where frames come from (default: synthetic)")
+    argParser.add_argument('--top', type=int, default=15, help="Number of packages to list (default: 15)")
+    argParser.add_argument('--timeout', type=float, default=60, help="Seconds to wait for the lobby (default: 60)")
+    argParser.add_argument('--run-app', action='store_true', help=argparse.SUPPRESS)
+    args = argParser.parse_args()
+
+    if args.run_app:
+        runApp({"sourceType": args.source}, args.timeout)
+        raise SystemExit(1)
+
+    reportImports(importTimes(), args.top)
+
+    launches = [launchApp(args.source, args.timeout) for _ in range(args.launches)]
+    print(f"\nLaunching the app ({args.source} frames), median of {args.launches}:")
+    for event, label in [("imported", "imported"), ("splash", "first splash screen frame"), ("lobby", "lobby")]:
+        times = [launch[event] for launch in launches if event in launch]
+        if times:
+            print(f"    {label:26} {np.median(times) * 1000:8.0f} ms" + (f" ({len(times)} of {args.launches} launches)" if len(times) < args.launches else ""))
+        else:
+            print(f"    {label:26} not reached within {args.timeout:.0f} s")
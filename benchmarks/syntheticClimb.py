@@ -0,0 +1,158 @@
+"""
+Generator of synthetic climbs, in the formats the app records: keypoints like output.csv, force data like forceData.csv, and
+a hold map like holdCoordinates.csv. The climber moves up a wall of holds with pauses, presses the holds as they pass them, and
+the recordings have the pose estimator's jitter, missing keypoints, load cell spikes and missing force readings.
+
+Used by benchmarks/analysisSuite.py, and can save climbs as sessions (see DataCapture/Session.py), e.g. to try
+AnalyseClimb/Rescore.py on a large archive.
+
+Run from the repository root:
+    python -m benchmarks.syntheticClimb -n 20 -s 120 -o data/synthetic_sessions
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+from DataCapture.KeypointBuffer import TIMESTAMP_COLUMN, FEATURE_COLUMNS, RECORDED_KEYPOINTS
+from DataCapture.Session import Session, RECORDED
+from DataCapture.ColumnStore import convertSession
+
+HOLD_COLUMNS = ["holdNumber", "left", "right", "top", "bottom"]
+
+# where each keypoint is relative to the climber's hips, as (vertical, horizontal) fractions of the frame, the top of the frame
+# being 0 like in holdCoordinates.csv
+KEYPOINT_OFFSETS = {
+    'left_shoulder': (-0.20, -0.05), 'right_shoulder': (-0.20, 0.05),
+    'left_elbow': (-0.28, -0.09), 'right_elbow': (-0.28, 0.09),
+    'left_wrist': (-0.36, -0.08), 'right_wrist': (-0.36, 0.08),
+    'left_hip': (0.0, -0.04), 'right_hip': (0.0, 0.04),
+    'left_knee': (0.12, -0.07), 'right_knee': (0.12, 0.07),
+    'left_ankle': (0.24, -0.06), 'right_ankle': (0.24, 0.06),
+}
+
+
+def generateHolds(numHolds, rng) -> pd.DataFrame:
+    """
+    Holds from the bottom of the wall to the top, zigzagging left and right, in the order of holdCoordinates.csv.
+    """
+    top = np.linspace(0.9, 0.1, numHolds) + rng.normal(0, 0.01, numHolds)
+    left = 0.45 + 0.12 * np.where(np.arange(numHolds) % 2 == 0, -1, 1) + rng.normal(0, 0.03, numHolds)
+    return pd.DataFrame({"holdNumber": np.arange(numHolds),
+                         "left": left.round(4),
+                         "right": (left + 0.05).round(4),
+                         "top": top.round(4),
+                         "bottom": (top + 0.06).round(4)})
+
+
+def generateClimb(seconds=60, poseRate=7.5, forceRate=10, numHolds=9, noise=0.01, missingRate=0.05, spikeRate=0.01,
+                  seed=0) -> tuple:
+    """
+    Generates a climb.
+
+    Args:
+        seconds: Length of the climb. Defaults to 60.
+        poseRate: Pose estimations per second. Defaults to 7.5, every 4th frame of a 30 fps camera.
+        forceRate: Force readings per second. Defaults to 10.
+        numHolds: Number of holds on the wall, and of force sensors. Defaults to 9.
+        noise: Standard deviation of the keypoints' jitter, as a fraction of the frame. Defaults to 0.01.
+        missingRate: Fraction of keypoints the pose estimator misses, and of force readings that are missing. Defaults to 0.05.
+        spikeRate: Fraction of force readings that are load cell spikes. Defaults to 0.01.
+        seed: Seed of the random numbers. Defaults to 0.
+
+    Returns:
+        tuple: (climbData, forceData, holdsCoordinates) DataFrames, with the columns of output.csv, forceData.csv and
+            holdCoordinates.csv.
+    """
+    rng = np.random.default_rng(seed)
+    holds = generateHolds(numHolds, rng)
+
+    # timestamps of the pose estimations, with jitter and the odd stall in inference
+    frames = max(2, int(seconds * poseRate))
+    intervals = rng.normal(1000 / poseRate, 1000 / poseRate * 0.1, frames).clip(1)
+    intervals[rng.random(frames) < 0.02] *= 4
+    timestamps = np.cumsum(intervals).astype(np.int64)
+    progress = timestamps / timestamps[-1]
+
+    # the hips go from below the bottom hold to the top hold, in moves separated by pauses
+    moves = np.cumsum(rng.random(frames) < 2 / poseRate) # about a move every 2 seconds
+    moveProgress = np.maximum.accumulate(np.minimum(progress, (moves + 1) / (moves.max() + 1)))
+    hipsVertical = 0.95 - moveProgress * 0.6 + rng.normal(0, noise, frames)
+    hipsHorizontal = 0.45 + 0.05 * np.sin(progress * 12) + rng.normal(0, noise, frames)
+
+    data = {TIMESTAMP_COLUMN: timestamps}
+    keypoints = {}
+    for keypoint in RECORDED_KEYPOINTS:
+        vertical, horizontal = KEYPOINT_OFFSETS[keypoint]
+        reach = 0.04 * np.sin(progress * 20 + (0 if keypoint.startswith('left') else np.pi)) if 'wrist' in keypoint else 0
+        keypoints[f'{keypoint}_X'] = hipsHorizontal + horizontal + rng.normal(0, noise, frames)
+        keypoints[f'{keypoint}_Y'] = hipsVertical + vertical + reach + rng.normal(0, noise, frames)
+        missing = rng.random(frames) < missingRate
+        keypoints[f'{keypoint}_X'][missing] = np.nan
+        keypoints[f'{keypoint}_Y'][missing] = np.nan
+
+    # the centre of gravity is recorded in MoveNet's (y, x) order, like in output.csv
+    centreVertical = np.nanmean([keypoints[f'{keypoint}_Y'] for keypoint in RECORDED_KEYPOINTS], axis=0)
+    centreHorizontal = np.nanmean([keypoints[f'{keypoint}_X'] for keypoint in RECORDED_KEYPOINTS], axis=0)
+    features = {'Center of Gravity X': centreVertical, 'Center of Gravity Y': centreHorizontal,
+                'Left Arm Angle': 120 + 50 * np.sin(progress * 20) + rng.normal(0, 10, frames),
+                'Right Arm Angle': 120 + 50 * np.sin(progress * 20 + np.pi) + rng.normal(0, 10, frames)}
+    for column in FEATURE_COLUMNS:
+        values = features[column].clip(0, 180) if 'Angle' in column else features[column]
+        values[rng.random(frames) < missingRate] = np.nan
+        data[column] = values.round(2) if 'Angle' in column else values.round(5)
+    for column, values in keypoints.items():
+        data[column] = values.round(5)
+    climbData = pd.DataFrame(data)
+
+    # force readings: each hold is loaded while the climber's hips are near it
+    readings = max(2, int(seconds * forceRate))
+    times = np.arange(readings) * 1000 / forceRate + rng.uniform(0, 50)
+    hipsAtReading = np.interp(times, timestamps, hipsVertical)
+    force = {"Time": times}
+    for hold in range(numHolds):
+        distance = np.abs(hipsAtReading - 0.2 - holds["top"][hold])
+        pressed = distance < 0.15
+        values = np.where(pressed, rng.normal(3000, 800, readings).clip(0) * (1 - distance / 0.15), 0.0)
+        spikes = rng.random(readings) < spikeRate
+        values[spikes] += rng.uniform(10000, 25000, spikes.sum())
+        values[rng.random(readings) < missingRate] = np.nan
+        force[f"hold{hold}"] = values.round(2)
+    forceData = pd.DataFrame(force)
+
+    return climbData, forceData, holds
+
+
+def saveSession(climbData, forceData, holdsCoordinates, climberName="synthetic", root="data/sessions", climbSuccessful=False):
+    """
+    Saves a climb as a recorded session, with its CSV files and their column tables. Returns the session.
+    """
+    session = Session.create(climberName, root)
+    climbData.to_csv(session.getPath("keypoints"), index=False)
+    forceData.to_csv(session.getPath("force"), index=False, float_format="%.2f")
+    holdsCoordinates.to_csv(session.getPath("holdCoordinates"), index=False)
+    for role in ["keypoints", "force", "holdCoordinates"]:
+        session.addFile(role)
+    convertSession(session)
+    session.update(status=RECORDED, climbSuccessful=climbSuccessful)
+    return session
+
+
+if __name__ == '__main__':
+    argParser = argparse.ArgumentParser(description="Generate synthetic climbs and save them as sessions.")
+    argParser.add_argument('-n', '--number', type=int, default=1, help="Number of climbs (default: 1)")
+    argParser.add_argument('-s', '--seconds', type=float, default=60, help="Length of each climb (default: 60)")
+    argParser.add_argument('-p', '--pose-rate', type=float, default=7.5, help="Pose estimations per second (default: 7.5)")
+    argParser.add_argument('-f', '--force-rate', type=float, default=10, help="Force readings per second (default: 10)")
+    argParser.add_argument('--holds', type=int, default=9, help="Number of holds (default: 9)")
+    argParser.add_argument('--noise', type=float, default=0.01, help="Keypoint jitter, as a fraction of the frame (default: 0.01)")
+    argParser.add_argument('--missing-rate', type=float, default=0.05, help="Fraction of missing keypoints and force readings (default: 0.05)")
+    argParser.add_argument('--spike-rate', type=float, default=0.01, help="Fraction of force readings that are spikes (default: 0.01)")
+    argParser.add_argument('-o', '--output', type=str, default="data/sessions", help="Directory to save the sessions to (default: data/sessions)")
+    args = argParser.parse_args()
+
+    for i in range(args.number):
+        climbData, forceData, holdsCoordinates = generateClimb(args.seconds, args.pose_rate, args.force_rate, args.holds,
+                                                               args.noise, args.missing_rate, args.spike_rate, seed=i)
+        session = saveSession(climbData, forceData, holdsCoordinates, climberName=f"synthetic {i}", root=args.output,
+                              climbSuccessful=bool(i % 2))
+        print(f"{session.directory}: {len(climbData)} frames, {len(forceData)} force readings, {len(holdsCoordinates)} holds")
@@ -6,6 +6,8 @@ import time
 import argparse
 import csv
 
+from DataCapture.PoseFeatures import calculatePoseFeatures, getPoseTuples
+
 # Argument parsing
 argParser = argparse.ArgumentParser(description="Real-time or video-based MoveNet pose analysis.")
 argParser.add_argument('-i', '--input', type=str, choices=['i', 'v', 'r'], default='r',
@@ -139,34 +141,7 @@ def calculateArmAngles(keypoints, threshold=0.3):
     Returns:
     tuple: The angle of each arm (e.g., (leftArmAngle, rightArmAngle)). If a keypoint is not visible, the angle is None.
     """
-    
-    leftShoulder = keypoints[keypointDict['left_shoulder']]
-    leftElbow = keypoints[keypointDict['left_elbow']]
-    leftWrist = keypoints[keypointDict['left_wrist']]
-
-    rightShoulder = keypoints[keypointDict['right_shoulder']]
-    rightElbow = keypoints[keypointDict['right_elbow']]
-    rightWrist = keypoints[keypointDict['right_wrist']]
-
-    # Calculate angles for both arms
-    # leftArmAngle = math.degrees(math.atan2(leftWrist[1] - leftElbow[1], leftWrist[0] - leftElbow[0]) - math.atan2(leftShoulder[1] - leftElbow[1], leftShoulder[0] - leftElbow[0]))
-    # rightArmAngle = math.degrees(math.atan2(rightWrist[1] - rightElbow[1], rightWrist[0] - rightElbow[0]) - math.atan2(rightShoulder[1] - rightElbow[1], rightShoulder[0] - rightElbow[0]))
-
-    # Initialize angles as None
-    leftArmAngle = None
-    rightArmAngle = None
-
-    # Check visibility before calculating angles
-    if all(part[2] > threshold for part in [leftShoulder, leftElbow, leftWrist]):
-        leftArmAngle = math.degrees(math.atan2(leftWrist[1] - leftElbow[1], leftWrist[0] - leftElbow[0]) - math.atan2(leftShoulder[1] - leftElbow[1], leftShoulder[0] - leftElbow[0]))
-        leftArmAngle = abs(round(leftArmAngle, 2))
-        
-
-    if all(part[2] > threshold for part in [rightShoulder, rightElbow, rightWrist]):
-        rightArmAngle = math.degrees(math.atan2(rightWrist[1] - rightElbow[1], rightWrist[0] - rightElbow[0]) - math.atan2(rightShoulder[1] - rightElbow[1], rightShoulder[0] - rightElbow[0]))
-        rightArmAngle = abs(round(rightArmAngle, 2))
-
-    return leftArmAngle, rightArmAngle
+    return getPoseTuples(calculatePoseFeatures(keypoints, threshold))[1]
 
 
 def calculateCenterOfGravity(keypoints, threshold=0.3):
@@ -180,27 +155,7 @@ def calculateCenterOfGravity(keypoints, threshold=0.3):
     Returns:
     tuple: The position of the center of gravity (e.g., (x, y)). If no keypoints are above the threshold, returns (None, None).
     """
-    totalX, totalY, points = 0, 0, 0
-
-    cgPoints = {"leftShoulder": keypoints[keypointDict['left_shoulder']], 
-                "rightShoulder": keypoints[keypointDict['right_shoulder']], 
-                "leftHip": keypoints[keypointDict['left_hip']], 
-                "rightHip": keypoints[keypointDict['right_hip']]}  
-
-    for keypoint in cgPoints.values():
-        x, y, score = keypoint[0], keypoint[1], keypoint[2]
-
-        if score > threshold:
-            totalX += x
-            totalY += y
-            points += 1
-
-    if points > 0:
-        cgX = round (totalX / points, 5)
-        cgY = round (totalY / points, 5)
-        return (cgX, cgY)
-    else:
-        return (None, None)
+    return getPoseTuples(calculatePoseFeatures(keypoints, threshold))[0]
     
 def getClosestHoldFromLimb(limbPosition, holdPositions):
     """
@@ -292,8 +247,8 @@ def main():
             interpreter.invoke()
             keypoints = interpreter.get_tensor(int(outputDetails[0]['index']))[0][0]
             
-            centerOfGravity = calculateCenterOfGravity(keypoints)
-            leftArmAngle, rightArmAngle = calculateArmAngles(keypoints)
+            # centre of gravity and arm angles in one pass, with the same code as the app
+            centerOfGravity, (leftArmAngle, rightArmAngle) = getPoseTuples(calculatePoseFeatures(keypoints))
 
             timestamp = int((time.time() * 1000) - startTime)
 